@@ -30,6 +30,12 @@ ADD CONSTRAINT ck_donnees_mesure
 CHECK (mesure IS NULL OR mesure >= 0);
 GO
 
+-- CHECK: fenêtre de résumé valide
+ALTER TABLE DonneesResume
+ADD CONSTRAINT ck_resume_fenetre
+CHECK (dateDebut < dateFin AND nbMesures > 0 AND minimum <= maximum);
+GO
+
 -- CHECK: type non vide (après trim)
 ALTER TABLE Evenement
 ADD CONSTRAINT ck_evenement_type
@@ -111,6 +117,22 @@ REFERENCES Salle (idSalle_PK)
 
 GO
 
+-- DonneesResume → Capteur
+ALTER TABLE DonneesResume
+ADD CONSTRAINT fk_resume_capteur
+FOREIGN KEY (idCapteur)
+REFERENCES Capteur (idCapteur_PK)
+
+GO
+
+-- DonneesResume → Salle
+ALTER TABLE DonneesResume
+ADD CONSTRAINT fk_resume_salle
+FOREIGN KEY (noSalle)
+REFERENCES Salle (idSalle_PK)
+
+GO
+
 -- Evenement → Donnees
 ALTER TABLE Evenement
 ADD CONSTRAINT fk_evenement_donnee
@@ -4,6 +4,7 @@ GO
 -- Supprimer les tables si elles existent (dans le bon ordre à cause des dépendances)
 
 IF OBJECT_ID('Evenement', 'U') IS NOT NULL DROP TABLE Evenement;
+IF OBJECT_ID('DonneesResume', 'U') IS NOT NULL DROP TABLE DonneesResume;
 IF OBJECT_ID('Donnees', 'U') IS NOT NULL DROP TABLE Donnees;
 IF OBJECT_ID('Capteur', 'U') IS NOT NULL DROP TABLE Capteur;
 IF OBJECT_ID('Reservation', 'U') IS NOT NULL DROP TABLE Reservation;
@@ -67,6 +68,26 @@ CREATE TABLE Donnees (
 );
 GO
 
+-- DonneesResume (un résumé par capteur et par fenêtre d'agrégation)
+CREATE TABLE DonneesResume (
+    idResume_PK                 INT IDENTITY(1,1)           PRIMARY KEY,
+    dateDebut                   DATETIME2                   NOT NULL,
+    dateFin                     DATETIME2                   NOT NULL,
+    idCapteur                   INT                         NOT NULL,
+    noSalle                     INT                         NOT NULL,
+    nbMesures                   INT                         NOT NULL,
+    moyenne                     FLOAT                       NOT NULL,
+    minimum                     FLOAT                       NOT NULL,
+    maximum                     FLOAT                       NOT NULL,
+    leq                         FLOAT                       NULL,
+    l10                         FLOAT                       NULL,
+    l50                         FLOAT                       NULL,
+    l90                         FLOAT                       NULL,
+    bandes                      NVARCHAR(400)               NULL
+
+);
+GO
+
 -- Evenement
 CREATE TABLE Evenement (
     idEvenement_PK              INT IDENTITY(1,1)           PRIMARY KEY,
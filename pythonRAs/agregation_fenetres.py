@@ -0,0 +1,183 @@
+"""
+Agrégation des mesures de son par fenêtres de temps
+Au lieu d'une ligne Donnees par seconde, chaque capteur produit un résumé par
+fenêtre (moyenne, min, max, Leq, L10/L50/L90, niveaux par bande) écrit dans DonneesResume.
+Les mesures brutes ne sont conservées qu'autour des événements: les dernières
+secondes avant l'événement et quelques secondes après.
+"""
+
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Callable
+
+import numpy as np
+
+from analyse_spectrale import formater_bandes
+from metriques_acoustiques import moyenne_energetique
+
+
+class _Fenetre:
+    """Accumulateur des mesures d'un capteur sur une fenêtre"""
+
+    def __init__(self, debut: datetime):
+        self.debut = debut
+        self.derniere = debut
+        self.nb = 0
+        self.somme = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.niveaux = []   # Tableaux de niveaux « fast » de chaque mesure
+        self.bandes = {}    # Fréquence centrale -> niveaux de bande de chaque mesure
+
+    def ajouter(self, date_heure: datetime, mesure: dict):
+        niveau = mesure['niveau_db']
+        self.derniere = max(self.derniere, date_heure)
+        self.nb += 1
+        self.somme += niveau
+        self.minimum = niveau if self.minimum is None else min(self.minimum, niveau)
+        self.maximum = niveau if self.maximum is None else max(self.maximum, niveau)
+        niveaux = mesure.get('niveaux_rapides')
+        self.niveaux.append(np.atleast_1d(niveaux if niveaux is not None else niveau))
+        for centre, niveau_bande in (mesure.get('bandes') or {}).items():
+            self.bandes.setdefault(centre, []).append(niveau_bande)
+
+
+class AgregateurFenetres:
+    """Résumés par fenêtre et conservation des mesures brutes autour des événements"""
+
+    def __init__(self, id_salle: int, ecrire_resume: Callable[[dict], object],
+                 ecrire_brut: Callable[[datetime, int, float], object],
+                 duree_fenetre: float = 60.0, avant_evenement: float = 30.0,
+                 apres_evenement: float = 30.0):
+        """
+        Initialise l'agrégateur
+
+        Args:
+            id_salle: ID de la salle des capteurs
+            ecrire_resume: Fonction appelée avec chaque résumé terminé (dict)
+            ecrire_brut: Fonction appelée (date_heure, id_capteur, niveau_db) pour
+                         chaque mesure brute à conserver
+            duree_fenetre: Durée d'une fenêtre en secondes, alignée sur l'horloge (défaut: 60)
+            avant_evenement: Secondes de mesures brutes gardées avant un événement (défaut: 30)
+            apres_evenement: Secondes de mesures brutes gardées après un événement (défaut: 30)
+        """
+        if duree_fenetre <= 0:
+            raise ValueError("La durée de fenêtre doit être positive")
+
+        self.id_salle = id_salle
+        self.ecrire_resume = ecrire_resume
+        self.ecrire_brut = ecrire_brut
+        self.duree_fenetre = duree_fenetre
+        self.avant_evenement = timedelta(seconds=avant_evenement)
+        self.apres_evenement = timedelta(seconds=apres_evenement)
+
+        self._fenetres = {}      # id_capteur -> _Fenetre en cours
+        self._recentes = {}      # id_capteur -> deque[(date_heure, niveau)] non écrites
+        self._brut_jusqua = {}   # id_capteur -> fin de la période brute après un événement
+
+        # Statistiques
+        self.compteur_mesures = 0
+        self.compteur_resumes = 0
+        self.compteur_bruts = 0
+
+    def ajouter(self, id_capteur: int, date_heure: datetime, mesure: dict,
+                evenement: bool = False, prolonger: bool = False):
+        """
+        Ajoute une mesure au résumé de sa fenêtre
+
+        Une mesure ordinaire n'est écrite telle quelle que dans la période qui suit
+        un événement; sinon elle est gardée en mémoire au cas où un événement suivrait.
+
+        Args:
+            id_capteur: ID du capteur
+            date_heure: Horodatage de la mesure
+            mesure: Dictionnaire de mesure (niveau_db; niveaux_rapides et bandes optionnels)
+            evenement: La mesure déclenche un événement; l'appelant l'écrit lui-même
+                       avec son événement (défaut: False)
+            prolonger: Un épisode de bruit fort est en cours: la période brute est
+                       repoussée à apres_evenement après cette mesure (défaut: False)
+        """
+        self.compteur_mesures += 1
+
+        debut = self._debut_fenetre(date_heure)
+        fenetre = self._fenetres.get(id_capteur)
+        if fenetre is not None and fenetre.debut != debut:
+            self._terminer(id_capteur, fenetre, fenetre.debut + timedelta(seconds=self.duree_fenetre))
+            fenetre = None
+        if fenetre is None:
+            fenetre = self._fenetres[id_capteur] = _Fenetre(debut)
+        fenetre.ajouter(date_heure, mesure)
+
+        recentes = self._recentes.setdefault(id_capteur, deque())
+        niveau = mesure['niveau_db']
+
+        if evenement:
+            # Les secondes qui précèdent l'événement deviennent des mesures brutes
+            while recentes:
+                self._ecrire_brut(id_capteur, *recentes.popleft())
+            self._brut_jusqua[id_capteur] = date_heure + self.apres_evenement
+            return
+
+        if prolonger:
+            self._brut_jusqua[id_capteur] = max(self._brut_jusqua.get(id_capteur, datetime.min),
+                                                date_heure + self.apres_evenement)
+
+        if date_heure <= self._brut_jusqua.get(id_capteur, datetime.min):
+            self._ecrire_brut(id_capteur, date_heure, niveau)
+            return
+
+        recentes.append((date_heure, niveau))
+        limite = date_heure - self.avant_evenement
+        while recentes and recentes[0][0] < limite:
+            recentes.popleft()
+
+    def vider(self):
+        """Écrit le résumé des fenêtres en cours (à l'arrêt), jusqu'à leur dernière mesure"""
+        for id_capteur, fenetre in list(self._fenetres.items()):
+            fin = min(fenetre.debut + timedelta(seconds=self.duree_fenetre),
+                      fenetre.derniere + timedelta(seconds=1))
+            self._terminer(id_capteur, fenetre, fin)
+        self._fenetres.clear()
+
+    def reduction(self) -> float:
+        """Mesures reçues par ligne écrite (résumés et mesures brutes)"""
+        ecrites = self.compteur_resumes + self.compteur_bruts
+        return self.compteur_mesures / ecrites if ecrites else 0.0
+
+    def _debut_fenetre(self, date_heure: datetime) -> datetime:
+        """Début de la fenêtre contenant date_heure (fenêtres alignées sur minuit)"""
+        minuit = date_heure.replace(hour=0, minute=0, second=0, microsecond=0)
+        ecoule = (date_heure - minuit).total_seconds()
+        return minuit + timedelta(seconds=ecoule - ecoule % self.duree_fenetre)
+
+    def _ecrire_brut(self, id_capteur: int, date_heure: datetime, niveau: float):
+        """Écrit une mesure brute conservée"""
+        self.ecrire_brut(date_heure, id_capteur, niveau)
+        self.compteur_bruts += 1
+
+    def _terminer(self, id_capteur: int, fenetre: _Fenetre, fin: datetime):
+        """Calcule et écrit le résumé d'une fenêtre"""
+        del self._fenetres[id_capteur]
+        if fenetre.nb == 0:
+            return
+
+        niveaux = np.concatenate(fenetre.niveaux)
+        l90, l50, l10 = np.percentile(niveaux, [10, 50, 90])
+
+        self.ecrire_resume({
+            'id_capteur': id_capteur,
+            'id_salle': self.id_salle,
+            'date_debut': fenetre.debut,
+            'date_fin': fin,
+            'nb_mesures': fenetre.nb,
+            'moyenne': fenetre.somme / fenetre.nb,
+            'minimum': fenetre.minimum,
+            'maximum': fenetre.maximum,
+            'leq': moyenne_energetique(niveaux),
+            'l10': float(l10),
+            'l50': float(l50),
+            'l90': float(l90),
+            'bandes': formater_bandes({centre: moyenne_energetique(niveaux_bande)
+                                       for centre, niveaux_bande in fenetre.bandes.items()})
+        })
+        self.compteur_resumes += 1
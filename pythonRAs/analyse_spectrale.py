@@ -0,0 +1,184 @@
+"""
+Analyse spectrale du son par bandes d'octave ou de tiers d'octave (FFT réelle NumPy)
+Chaque fenêtre d'échantillons est découpée en trames (fenêtre de Hann), dont les
+spectres de puissance sont moyennés puis sommés par bande. Les niveaux de bande
+utilisent la même calibration que metriques_acoustiques: la somme énergétique
+des bandes redonne le Leq de la fenêtre.
+
+Les niveaux de bande servent à classer le bruit (bourdonnement de ventilation,
+voix, impact) pour que le détecteur de bruit fort puisse ignorer certaines classes.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+from config import MICRO_DB_DECALAGE
+from metriques_acoustiques import niveau_db
+
+# Fréquences centrales nominales (IEC 61260) des tiers d'octave; une sur trois pour les octaves
+CENTRES_TIERS_OCTAVE = (25, 31.5, 40, 50, 63, 80, 100, 125, 160, 200, 250, 315, 400, 500, 630,
+                        800, 1000, 1250, 1600, 2000, 2500, 3150, 4000, 5000, 6300, 8000, 10000)
+CENTRES_OCTAVE = CENTRES_TIERS_OCTAVE[1::3]
+
+# Classes de bruit
+BOURDONNEMENT = "BOURDONNEMENT"   # Stable et grave: ventilation, moteur
+VOIX = "VOIX"                     # Fluctuant, énergie entre 250 Hz et 4 kHz
+IMPACT = "IMPACT"                 # Bref et beaucoup plus fort que le reste de la fenêtre
+AUTRE = "AUTRE"
+
+
+class AnalyseurSpectral:
+    """Niveaux par bande d'une fenêtre d'échantillons (tables précalculées à la création)"""
+
+    def __init__(self, frequence: float, taille_fft: int = 1024, tiers_octave: bool = False,
+                 decalage_db: float = MICRO_DB_DECALAGE):
+        """
+        Initialise l'analyseur
+
+        Args:
+            frequence: Fréquence d'échantillonnage en Hz
+            taille_fft: Échantillons par trame FFT (défaut: 1024)
+            tiers_octave: Bandes de tiers d'octave au lieu d'octaves (défaut: False)
+            decalage_db: Calibration, dB SPL d'un RMS de 1 unité ADC (défaut: config)
+        """
+        self.frequence = float(frequence)
+        self.taille_fft = int(taille_fft)
+        self.tiers_octave = tiers_octave
+        self.decalage_db = decalage_db
+
+        self._fenetre = np.hanning(self.taille_fft).astype(np.float32)
+        # Puissance d'un bin -> contribution à la moyenne quadratique (Parseval, fenêtre compensée)
+        self._normalisation = 1.0 / (self.taille_fft * float(np.sum(self._fenetre ** 2)))
+
+        # Bandes utilisables: au-dessus de la résolution et sous Nyquist (bande haute tronquée)
+        nyquist = self.frequence / 2
+        resolution = self.frequence / self.taille_fft
+        demi = 2 ** (1 / 6) if tiers_octave else 2 ** 0.5
+        pas = 1 / 3 if tiers_octave else 1
+        centres = CENTRES_TIERS_OCTAVE if tiers_octave else CENTRES_OCTAVE
+
+        self.centres = []
+        bords = []
+        for i, nominale in enumerate(centres):
+            exacte = 1000.0 * 2 ** ((i - centres.index(1000)) * pas)
+            bas, haut = exacte / demi, min(exacte * demi, nyquist)
+            if bas >= resolution and exacte < nyquist:
+                self.centres.append(nominale)
+                bords.append((bas, haut))
+
+        # Bin FFT -> indice de bande (-1 hors bandes)
+        frequences = np.fft.rfftfreq(self.taille_fft, 1.0 / self.frequence)
+        self._bande_du_bin = np.full(len(frequences), -1, dtype=np.int64)
+        for j, (bas, haut) in enumerate(bords):
+            self._bande_du_bin[(frequences >= bas) & (frequences < haut)] = j
+        self._bins = self._bande_du_bin >= 0
+
+    def analyser(self, valeurs: np.ndarray) -> Optional[dict]:
+        """
+        Niveaux par bande d'une fenêtre
+
+        Args:
+            valeurs: Échantillons ADC de la fenêtre, dans l'ordre
+
+        Returns:
+            {fréquence centrale nominale: niveau en dB}, None si la fenêtre est vide
+        """
+        n = len(valeurs)
+        if n == 0 or not self.centres:
+            return None
+
+        signal = np.asarray(valeurs, dtype=np.float32)
+        signal = signal - signal.mean()
+
+        # Trames complètes (une seule, complétée par des zéros, si la fenêtre est courte)
+        nb_trames = n // self.taille_fft
+        if nb_trames == 0:
+            trames = np.zeros((1, self.taille_fft), dtype=np.float32)
+            trames[0, :n] = signal
+        else:
+            trames = signal[:nb_trames * self.taille_fft].reshape(nb_trames, self.taille_fft)
+
+        spectres = np.fft.rfft(trames * self._fenetre, axis=1)
+        puissance = (spectres.real ** 2 + spectres.imag ** 2).mean(axis=0) * self._normalisation
+        puissance[1:-1] *= 2.0   # Spectre unilatéral
+
+        energies = np.bincount(self._bande_du_bin[self._bins], weights=puissance[self._bins],
+                               minlength=len(self.centres))
+        niveaux = niveau_db(energies, self.decalage_db)
+        return {centre: float(niveau) for centre, niveau in zip(self.centres, niveaux)}
+
+
+def classer(bandes: Optional[dict], metriques: dict) -> str:
+    """
+    Classe un bruit à partir de ses niveaux de bande et de ses métriques
+
+    Règles simples, à ajuster sur le terrain:
+      - IMPACT: Lmax dépasse le niveau médian (L50) d'au moins 15 dB
+      - BOURDONNEMENT: niveau stable (L10 - L90 < 3 dB) et 60 % de l'énergie sous 200 Hz
+      - VOIX: niveau fluctuant et 60 % de l'énergie entre 250 Hz et 4 kHz
+
+    Args:
+        bandes: {fréquence centrale: dB} (AnalyseurSpectral.analyser)
+        metriques: Dictionnaire de calculer_metriques (lmax, l10, l50, l90)
+
+    Returns:
+        IMPACT, BOURDONNEMENT, VOIX ou AUTRE
+    """
+    if metriques['lmax'] - metriques['l50'] >= 15.0:
+        return IMPACT
+    if not bandes:
+        return AUTRE
+
+    centres = np.array(list(bandes.keys()), dtype=np.float64)
+    energies = 10.0 ** (np.array(list(bandes.values()), dtype=np.float64) / 10.0)
+    total = energies.sum()
+    graves = energies[centres < 200].sum() / total
+    voix = energies[(centres >= 250) & (centres <= 4000)].sum() / total
+    stable = metriques['l10'] - metriques['l90'] < 3.0
+
+    if stable and graves >= 0.6:
+        return BOURDONNEMENT
+    if not stable and voix >= 0.6:
+        return VOIX
+    return AUTRE
+
+
+def formater_bandes(bandes: Optional[dict]) -> Optional[str]:
+    """Niveaux de bande en texte compact pour la BD, ex: '63:45.1;125:47.3'"""
+    if not bandes:
+        return None
+    return ";".join(f"{centre:g}:{niveau:.1f}" for centre, niveau in bandes.items())
+
+
+def lire_bandes(texte: Optional[str]) -> dict:
+    """Inverse de formater_bandes"""
+    if not texte:
+        return {}
+    bandes = {}
+    for paire in texte.split(";"):
+        centre, niveau = paire.split(":")
+        bandes[float(centre)] = float(niveau)
+    return bandes
+
+
+if __name__ == "__main__":
+    from metriques_acoustiques import calculer_metriques
+
+    # Exemple: bourdonnement à 100 Hz puis voix simulée (porteuses modulées entre 300 Hz et 3 kHz)
+    frequence = 8000
+    t = np.arange(frequence) / frequence
+    rng = np.random.default_rng(0)
+    exemples = {
+        "bourdonnement": 512 + 60 * np.sin(2 * np.pi * 100 * t) + rng.normal(0, 2, frequence),
+        "voix": 512 + sum(40 * np.sin(2 * np.pi * f * t) for f in (300, 700, 1500, 2800))
+                * (0.5 + 0.5 * np.sin(2 * np.pi * 3 * t)) ** 2,
+    }
+
+    analyseur = AnalyseurSpectral(frequence, tiers_octave=False)
+    for nom, signal in exemples.items():
+        valeurs = np.clip(signal, 0, 1023).astype(np.uint16)
+        metriques = calculer_metriques(valeurs, frequence)
+        bandes = analyseur.analyser(valeurs)
+        print(f"{nom}: Leq {metriques['leq']:.1f} dB, classe {classer(bandes, metriques)}")
+        print(f"  {formater_bandes(bandes)}")
@@ -0,0 +1,82 @@
+"""
+Envoi des mesures de son par bande morte
+Une mesure ordinaire n'est écrite dans Donnees que si elle s'écarte de plus de
+ecart_db de la dernière valeur écrite pour ce capteur, ou si le battement est
+écoulé. Entre deux lignes, la valeur est implicitement celle de la ligne
+précédente (échantillonner-bloquer): le graphique est tracé en escalier et les
+statistiques pondèrent chaque ligne par la durée pendant laquelle elle vaut.
+"""
+
+from datetime import datetime, timedelta
+
+from config import BANDE_MORTE_DB, BANDE_MORTE_BATTEMENT
+
+
+class FiltreBandeMorte:
+    """Dernière valeur écrite par capteur et décision d'envoi"""
+
+    def __init__(self, ecart_db: float = BANDE_MORTE_DB, battement: float = BANDE_MORTE_BATTEMENT):
+        """
+        Initialise le filtre
+
+        Args:
+            ecart_db: Écart minimum en dB avec la dernière valeur écrite (défaut: config,
+                      0 = toutes les mesures sont écrites)
+            battement: Secondes maximum sans écriture, même si la valeur ne change pas (défaut: config)
+        """
+        self.ecart_db = ecart_db
+        self.battement = timedelta(seconds=battement)
+        self._derniers = {}    # id_capteur -> (date_heure, niveau) de la dernière valeur écrite
+        self._implicites = {}  # id_capteur -> (date_heure, niveau) de la dernière valeur non écrite
+
+        # Statistiques
+        self.compteur_envoyees = 0
+        self.compteur_supprimees = 0
+
+    def a_envoyer(self, id_capteur: int, date_heure: datetime, niveau: float) -> bool:
+        """
+        Décide si une mesure ordinaire doit être écrite (et la retient si oui)
+
+        Args:
+            id_capteur: ID du capteur
+            date_heure: Horodatage de la mesure
+            niveau: Niveau en dB
+
+        Returns:
+            True si la mesure doit être écrite, False si elle est implicite
+        """
+        dernier = self._derniers.get(id_capteur)
+        if (dernier is not None and abs(niveau - dernier[1]) < self.ecart_db
+                and date_heure - dernier[0] < self.battement):
+            self._implicites[id_capteur] = (date_heure, niveau)
+            self.compteur_supprimees += 1
+            return False
+
+        self.envoyee(id_capteur, date_heure, niveau)
+        return True
+
+    def envoyee(self, id_capteur: int, date_heure: datetime, niveau: float):
+        """Retient une mesure écrite sans passer par le filtre (mesure d'un événement)"""
+        self._derniers[id_capteur] = (date_heure, niveau)
+        self._implicites.pop(id_capteur, None)
+        self.compteur_envoyees += 1
+
+    def vider(self) -> list:
+        """
+        Dernières mesures non écrites, à écrire à l'arrêt pour dater la fin de la période
+
+        Le filtre repart ensuite de zéro: la prochaine mesure de chaque capteur est écrite.
+
+        Returns:
+            Liste de (id_capteur, date_heure, niveau)
+        """
+        restantes = [(id_capteur, date_heure, niveau)
+                     for id_capteur, (date_heure, niveau) in self._implicites.items()]
+        self._derniers.clear()
+        self._implicites.clear()
+        return restantes
+
+    def reduction(self) -> float:
+        """Part des mesures non écrites (0 à 1)"""
+        total = self.compteur_envoyees + self.compteur_supprimees
+        return self.compteur_supprimees / total if total else 0.0
@@ -1,13 +1,25 @@
 """
 Script de capture continue de photos avec la Pi Camera
 Les photos sont prises toutes les 5 secondes et envoyées vers la BD
+La capture, l'encodage JPEG et l'envoi tournent chacun dans leur thread, reliés
+par des files bornées: une BD lente ne décale plus la capture suivante.
 """
 
+import os
 import time
 from datetime import datetime
 from io import BytesIO
+from typing import Optional
+from PIL import Image
 from db_connection import DatabaseConnection
-from config import DB_SERVER, DB_NAME, DB_USERNAME, DB_PASSWORD, ID_SALLE
+from detection_changement import DetecteurChangement
+from pipeline import Etage
+from planificateur import Planificateur
+from reference_cache import shared_cache
+from spool_local import SpoolLocal
+from config import DB_SERVER, DB_NAME, DB_USERNAME, DB_PASSWORD, ID_SALLE, SPOOL_DIR, SPOOL_QUOTA_MO
+from config import CAMERA_PRECHAUFFAGE, PHOTO_QUALITE_JPEG, PHOTO_SEUIL_CHANGEMENT
+from config import PIPELINE_FILE_ENCODAGE, PIPELINE_POLITIQUE_ENCODAGE, PIPELINE_FILE_ENVOI, PIPELINE_POLITIQUE_ENVOI
 
 try:
     from picamera2 import Picamera2
@@ -20,7 +32,9 @@ except ImportError:
 class CapturePhotosContinu:
     """Capture des photos en continu et les envoie vers la BD"""
 
-    def __init__(self, db_connection: DatabaseConnection, id_salle: int, intervalle: int = 5):
+    def __init__(self, db_connection: DatabaseConnection, id_salle: int, intervalle: int = 5,
+                 spool: Optional[SpoolLocal] = None, qualite_jpeg: int = PHOTO_QUALITE_JPEG,
+                 detection: Optional[DetecteurChangement] = None):
         """
         Initialise le système de capture
 
@@ -28,13 +42,28 @@ class CapturePhotosContinu:
             db_connection: Connexion à la base de données
             id_salle: ID de la salle à monitorer
             intervalle: Intervalle en secondes entre chaque photo (défaut: 5)
+            spool: Spool local; si fourni, les photos y sont déposées
+                   et rejouées vers la BD en arrière-plan (défaut: None)
+            qualite_jpeg: Qualité de l'encodage JPEG (défaut: config)
+            detection: Si fourni, une photo presque identique à la dernière envoyée
+                       n'est ni encodée ni envoyée (défaut: None, tout envoyer)
         """
         self.db = db_connection
+        self.spool = spool
         self.id_salle = id_salle
         self.intervalle = intervalle
         self.camera = None
         self.id_capteur_camera = None
         self.compteur_photos = 0
+        self.planificateur = None
+
+        # Pipeline: la boucle capture, les étages encodent et envoient
+        self.qualite_jpeg = qualite_jpeg
+        self.detection = detection
+        self.etage_encodage = None
+        self.etage_envoi = None
+        self.compteur_captures = 0
+        self.temps_capture = 0.0
 
     def setup(self):
         """Configure la caméra et récupère l'ID du capteur"""
@@ -42,16 +71,13 @@ class CapturePhotosContinu:
 
         # 1. Récupérer l'ID du capteur caméra
         try:
-            capteur = self.db.execute_query(
-                "SELECT idCapteur_PK FROM Capteur WHERE type = 'CAMERA'"
-            )
+            self.id_capteur_camera = shared_cache(self.db).sensor_id('CAMERA')
 
-            if not capteur:
+            if self.id_capteur_camera is None:
                 print("✗ Aucun capteur CAMERA trouvé dans la BD")
                 print("   Lancez d'abord: python initialiser_bd.py")
                 return False
 
-            self.id_capteur_camera = capteur[0][0]
             print(f"✓ Capteur CAMERA trouvé - ID: {self.id_capteur_camera}")
 
         except Exception as e:
@@ -67,9 +93,9 @@ class CapturePhotosContinu:
         try:
             self.camera = Picamera2()
 
-            # Configuration pour capture d'images JPEG
+            # Configuration pour capture d'images (encodées en JPEG par le pipeline)
             config = self.camera.create_still_configuration(
-                main={"size": (1920, 1080)},  # Résolution Full HD
+                main={"size": (1920, 1080), "format": "BGR888"},  # Full HD, tableaux en ordre RGB
                 buffer_count=2
             )
             self.camera.configure(config)
@@ -77,9 +103,9 @@ class CapturePhotosContinu:
 
             print("✓ Pi Camera initialisée (1920x1080)")
 
-            # Temps de stabilisation de la caméra
-            print("⏳ Stabilisation de la caméra (2 secondes)...")
-            time.sleep(2)
+            # Temps de stabilisation de la caméra (une seule fois, le flux reste démarré)
+            print(f"⏳ Stabilisation de la caméra ({CAMERA_PRECHAUFFAGE:g} secondes)...")
+            time.sleep(CAMERA_PRECHAUFFAGE)
 
         except Exception as e:
             print(f"✗ Erreur lors de l'initialisation de la caméra: {e}")
@@ -93,34 +119,106 @@ class CapturePhotosContinu:
         print("\n✓ Configuration terminée\n")
         return True
 
-    def capturer_photo(self) -> bytes:
+    def capturer_image(self) -> Optional[tuple]:
         """
-        Capture une photo directement en mémoire
+        Capture l'image suivante du flux, sans l'encoder (étage capture)
 
         Returns:
-            Bytes de l'image JPEG (ou None si erreur)
+            (date_heure, tableau NumPy hauteur x largeur x 3 en RGB), ou None si erreur
         """
         if not CAMERA_AVAILABLE or not self.camera:
             print("✗ Caméra non disponible")
             return None
 
         try:
-            # Capturer directement dans un BytesIO (en mémoire)
-            buffer = BytesIO()
-            self.camera.capture_file(buffer, format='jpeg')
-            buffer.seek(0)
-            return buffer.read()
+            debut = time.monotonic()
+            date_heure = datetime.now()
+            image = self.camera.capture_array("main")
+            self.temps_capture += time.monotonic() - debut
+            self.compteur_captures += 1
+            return date_heure, image
 
         except Exception as e:
             print(f"✗ Erreur lors de la capture: {e}")
             return None
 
-    def envoyer_photo_bd(self, photo_blob: bytes) -> bool:
+    def encoder_jpeg(self, image_capturee: tuple) -> Optional[tuple]:
+        """
+        Encode une image capturée en JPEG (étage encodage)
+
+        Args:
+            image_capturee: (date_heure, tableau RGB) de capturer_image
+
+        Returns:
+            (date_heure, bytes JPEG)
+        """
+        date_heure, image = image_capturee
+        buffer = BytesIO()
+        Image.fromarray(image).save(buffer, format='JPEG', quality=self.qualite_jpeg)
+        return date_heure, buffer.getvalue()
+
+    def _filtrer_et_encoder(self, image_capturee: tuple) -> Optional[tuple]:
+        """
+        Étage encodage: ignore l'image si elle n'a pas changé, sinon l'encode en JPEG
+
+        Returns:
+            (date_heure, bytes JPEG, note pour la description), ou None si l'image est ignorée
+        """
+        note = None
+        if self.detection is not None:
+            garder, note = self.detection.evaluer(*image_capturee)
+            if not garder:
+                return None
+
+        date_heure, photo_blob = self.encoder_jpeg(image_capturee)
+        return date_heure, photo_blob, note
+
+    def _envoyer(self, photo: tuple):
+        """Étage envoi: (date_heure, bytes JPEG, note) vers le spool ou la BD"""
+        date_heure, photo_blob, note = photo
+        self.envoyer_photo_bd(photo_blob, date_heure, note)
+
+    def demarrer_pipeline(self):
+        """Crée et démarre les étages encodage et envoi"""
+        self.etage_envoi = Etage("envoi", self._envoyer, PIPELINE_FILE_ENVOI,
+                                 PIPELINE_POLITIQUE_ENVOI, terminer=self.db.release_connection)
+        self.etage_encodage = Etage("encodage", self._filtrer_et_encoder, PIPELINE_FILE_ENCODAGE,
+                                    PIPELINE_POLITIQUE_ENCODAGE, suivant=self.etage_envoi)
+        self.etage_envoi.demarrer()
+        self.etage_encodage.demarrer()
+
+    def stats_pipeline(self) -> dict:
+        """
+        Statistiques par étage du pipeline
+
+        Returns:
+            Dictionnaire: capture (captures, duree_moyenne_ms, et avec la détection de
+            changement: gardees, ignorees, maintien), encodage et envoi
+            (voir Etage.stats: débit, profondeur de file, supprimés, erreurs)
+        """
+        stats = {'capture': {
+            'captures': self.compteur_captures,
+            'duree_moyenne_ms': (self.temps_capture / self.compteur_captures * 1000
+                                 if self.compteur_captures else 0.0)
+        }}
+        if self.detection is not None:
+            stats['capture'].update(gardees=self.detection.compteur_gardees,
+                                    ignorees=self.detection.compteur_ignorees,
+                                    maintien=self.detection.compteur_maintien)
+        for etage in (self.etage_encodage, self.etage_envoi):
+            if etage is not None:
+                stats[etage.nom] = etage.stats()
+        return stats
+
+    def envoyer_photo_bd(self, photo_blob: bytes, date_heure: Optional[datetime] = None,
+                         note: Optional[str] = None) -> bool:
         """
         Envoie la photo vers la base de données
 
         Args:
             photo_blob: Bytes de l'image JPEG
+            date_heure: Heure de la capture (défaut: maintenant)
+            note: Complément de la description de l'événement, ex. images ignorées (défaut: None)
 
         Returns:
             True si succès, False sinon
@@ -130,40 +228,38 @@ class CapturePhotosContinu:
             return False
 
         try:
-            date_heure = datetime.now()
-
-            # CRITIQUE: Créer un NOUVEAU cursor à chaque appel
-            cursor = self.db.connection.cursor()
-
-            # Insérer la photo dans la BD
-            query = """
-                INSERT INTO Donnees (dateHeure, idCapteur, mesure, photoBlob, noSalle)
-                VALUES (GETDATE(), ?, NULL, ?, ?)
-            """
-
-            cursor.execute(query, (self.id_capteur_camera, photo_blob, self.id_salle))
-            self.db.connection.commit()
-
-            # Récupérer l'ID de la donnée insérée
-            cursor.execute("SELECT @@IDENTITY")
-            id_donnee = cursor.fetchone()[0]
+            date_heure = date_heure or datetime.now()
+            description = f'Photo capturée à {date_heure.strftime("%H:%M:%S")}'
+            suffixe = f" - {note}" if note else ""
+            if note:
+                description += f" ({note})"
+            taille_kb = len(photo_blob) / 1024
 
-            # Créer un événement
-            cursor.execute(
-                """INSERT INTO Evenement (type, idDonnee, description)
-                   VALUES (?, ?, ?)""",
-                ('CAPTURE', int(id_donnee), f'Photo capturée à {date_heure.strftime("%H:%M:%S")}')
+            # Spool local: dépôt sur disque, l'envoi vers la BD se fait en arrière-plan
+            if self.spool is not None:
+                self.spool.ajouter_donnee_evenement(
+                    date_heure, self.id_capteur_camera, self.id_salle, 'CAPTURE',
+                    description, photo_blob=photo_blob
+                )
+                self.compteur_photos += 1
+                print(f"[{date_heure.strftime('%H:%M:%S')}] Photo #{self.compteur_photos} mise en spool "
+                      f"({taille_kb:.1f} KB){suffixe}")
+                return True
+
+            # Photo + événement CAPTURE en un seul lot et une seule transaction
+            ids = self.db.insert_donnee_evenement(
+                self.id_capteur_camera, self.id_salle, 'CAPTURE',
+                description, photo_blob=photo_blob, date_heure=date_heure
             )
-            self.db.connection.commit()
+            if ids is None:
+                return False
 
-            # CRITIQUE: Fermer le cursor
-            cursor.close()
+            id_donnee = ids[0]
 
             self.compteur_photos += 1
-            taille_kb = len(photo_blob) / 1024
 
             print(f"[{date_heure.strftime('%H:%M:%S')}] Photo #{self.compteur_photos} envoyée "
-                  f"({taille_kb:.1f} KB) - ID: {int(id_donnee)}")
+                  f"({taille_kb:.1f} KB) - ID: {id_donnee}{suffixe}")
 
             return True
 
@@ -171,7 +267,6 @@ class CapturePhotosContinu:
             print(f"✗ Erreur lors de l'envoi: {e}")
             import traceback
             traceback.print_exc()
-            self.db.connection.rollback()
             return False
 
     def capturer_en_continu(self):
@@ -185,19 +280,25 @@ class CapturePhotosContinu:
         print("\nAppuyez sur Ctrl+C pour arrêter\n")
         print("─" * 63)
 
+        # Encodage et envoi dans leurs threads: la boucle ne fait que capturer
+        self.demarrer_pipeline()
+
+        # Échéances absolues: la capture ne rallonge pas la période
+        self.planificateur = Planificateur(self.intervalle, "Photos")
+
         try:
             while True:
-                # Capturer la photo en mémoire
-                photo_blob = self.capturer_photo()
+                # Capturer l'image et la confier au pipeline (jamais bloquant: si l'encodage
+                # est en retard, la plus ancienne image en attente est abandonnée)
+                image = self.capturer_image()
 
-                if photo_blob:
-                    # Envoyer directement vers la BD
-                    self.envoyer_photo_bd(photo_blob)
+                if image is not None:
+                    self.etage_encodage.deposer(image)
                 else:
                     print("✗ Échec de la capture")
 
-                # Attendre avant la prochaine capture
-                time.sleep(self.intervalle)
+                # Attendre l'échéance de la prochaine capture
+                self.planificateur.attendre()
 
         except KeyboardInterrupt:
             print("\n\n" + "─" * 63)
@@ -206,6 +307,24 @@ class CapturePhotosContinu:
 
     def cleanup(self):
         """Nettoie les ressources (caméra)"""
+        if self.planificateur is not None:
+            print(self.planificateur.resume())
+
+        # Terminer les photos en cours, dans l'ordre des étages
+        if self.etage_encodage is not None:
+            self.etage_encodage.arreter()
+            self.etage_envoi.arreter()
+            capture = self.stats_pipeline()['capture']
+            print("✓ Pipeline photos:")
+            print(f"   capture  | {capture['captures']:5d} image(s) ({capture['duree_moyenne_ms']:.0f} ms)")
+            if self.detection is not None:
+                print(f"   changement | {self.detection.compteur_gardees} gardée(s) "
+                      f"(dont {self.detection.compteur_maintien} de maintien), "
+                      f"{self.detection.compteur_ignorees} identique(s) ignorée(s) "
+                      f"(-{self.detection.reduction():.0%})")
+            print(f"   {self.etage_encodage.resume()}")
+            print(f"   {self.etage_envoi.resume()}")
+
         if self.camera:
             try:
                 self.camera.stop()
@@ -228,11 +347,19 @@ def main():
         print("\n✗ Impossible de se connecter à la base de données")
         return 1
 
+    # Spool local: les photos survivent à une BD lente ou injoignable
+    spool = SpoolLocal(db, os.path.join(SPOOL_DIR, "photos.db"), taille_lot=20,
+                       quota_mo=SPOOL_QUOTA_MO)
+
     # Créer le système de capture
-    capture_system = CapturePhotosContinu(db, ID_SALLE, intervalle=5)
+    capture_system = CapturePhotosContinu(
+        db, ID_SALLE, intervalle=5, spool=spool,
+        detection=DetecteurChangement() if PHOTO_SEUIL_CHANGEMENT else None
+    )
 
     # Configuration
     if not capture_system.setup():
+        spool.arreter()
         db.disconnect()
         return 1
 
@@ -243,6 +370,7 @@ def main():
     finally:
         # Nettoyage
         capture_system.cleanup()
+        spool.arreter()
         db.disconnect()
         print("✓ Connexion BD fermée\n")
 
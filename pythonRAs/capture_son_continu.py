@@ -3,25 +3,38 @@ Script de capture continue du son avec micro électret + MCP3008
 Les mesures sont prises toutes les secondes et envoyées vers la BD
 """
 
-import spidev
-import time
+import os
 from datetime import datetime
+from typing import Optional
 from db_connection import DatabaseConnection
-from config import DB_SERVER, DB_NAME, DB_USERNAME, DB_PASSWORD, ID_SALLE
-
-try:
-    import spidev
-    SPI_AVAILABLE = True
-except ImportError:
-    print("⚠ spidev non disponible - mode simulation")
-    SPI_AVAILABLE = False
+from agregation_fenetres import AgregateurFenetres
+from analyse_spectrale import AnalyseurSpectral, classer
+from bande_morte import FiltreBandeMorte
+from detecteur_episodes import DetecteurEpisodes, Episode, DEBUT, FIN
+from echantillonneur_adc import EchantillonneurMCP3008
+from ligne_de_base import LignesDeBase
+from source_trace import SourceTrace
+from metriques_acoustiques import calculer_metriques
+from planificateur import Planificateur
+from reference_cache import shared_cache
+from spool_local import SpoolLocal
+from config import DB_SERVER, DB_NAME, DB_USERNAME, DB_PASSWORD, ID_SALLE, SPOOL_DIR, SPOOL_QUOTA_MO, ADC_FREQUENCE, ADC_CANAUX
+from config import AGREGATION_FENETRE, AGREGATION_AVANT_EVENEMENT, AGREGATION_APRES_EVENEMENT
+from config import ANALYSE_TAILLE_FFT, ANALYSE_TIERS_OCTAVE, BRUIT_FORT_CLASSES_IGNOREES
+from config import LIGNE_BASE_DIR, ADC_TRACE, ADC_TRACE_VITESSE, BANDE_MORTE_DB
+from config import BRUIT_FORT_HYSTERESIS, BRUIT_FORT_DUREE_MIN, BRUIT_FORT_ECART_FUSION, BRUIT_FORT_INTERVALLE_MAJ
 
 
 class CaptureSonContinu:
-    """Capture du son en continu avec micro électret + MCP3008"""
+    """Capture du son en continu avec un ou plusieurs micros électret + MCP3008"""
 
     def __init__(self, db_connection: DatabaseConnection, id_salle: int,
-                 intervalle: int = 1, seuil_bruit_fort: float = 50.0):
+                 intervalle: int = 1, seuil_bruit_fort: float = 50.0,
+                 taille_lot: int = 30, delai_lot: float = 10.0,
+                 spool: Optional[SpoolLocal] = None, frequence: float = ADC_FREQUENCE,
+                 canaux: Optional[dict] = None, fenetre_agregation: Optional[float] = None,
+                 ligne_base: Optional[LignesDeBase] = None, source: Optional[SourceTrace] = None,
+                 bande_morte: Optional[FiltreBandeMorte] = None):
         """
         Initialise le système de capture audio
 
@@ -29,106 +42,182 @@ class CaptureSonContinu:
             db_connection: Connexion à la base de données
             id_salle: ID de la salle à monitorer
             intervalle: Intervalle en secondes entre chaque mesure (défaut: 1)
-            seuil_bruit_fort: Seuil pour déclencher événement BRUIT_FORT (défaut: 50.0)
+            seuil_bruit_fort: Seuil d'entrée minimum d'un épisode BRUIT_FORT; le seuil suit
+                              le bruit de fond au-dessus (défaut: 50.0)
+            taille_lot: Mesures regroupées par insertion (défaut: 30, 1 = envoi immédiat)
+            delai_lot: Attente maximale en secondes avant l'envoi d'un lot (défaut: 10)
+            spool: Spool local; si fourni, toutes les mesures y sont déposées
+                   et rejouées vers la BD en arrière-plan (défaut: None)
+            frequence: Fréquence d'échantillonnage continue par micro en Hz (défaut: config)
+            canaux: Canal MCP3008 -> nom du Capteur BRUIT, ex: {0: 'MIC-ELECTRET-1'}
+                    (défaut: ADC_CANAUX de config)
+            fenetre_agregation: Si fourni, un résumé par fenêtre de cette durée (s) est écrit
+                                dans DonneesResume et les mesures ordinaires ne sont gardées
+                                qu'autour des événements (défaut: None, chaque mesure est écrite)
+            ligne_base: Suivi de la valeur au repos et du bruit de fond; s'il a un fichier,
+                        la ligne de base sauvegardée remplace la calibration (défaut: en mémoire)
+            source: Trace ADC rejouée au lieu du MCP3008, en temps réel ou accélérée;
+                    le programme s'arrête à la fin de la trace (défaut: None)
+            bande_morte: Si fourni, une mesure ordinaire n'est écrite dans Donnees que si elle
+                         change assez ou si le battement est écoulé (défaut: None, tout écrire)
         """
         self.db = db_connection
         self.id_salle = id_salle
         self.intervalle = intervalle
         self.seuil_bruit_fort = seuil_bruit_fort
-
-        self.spi = None
-        self.id_capteur_bruit = None
+        self.taille_lot = taille_lot
+        self.delai_lot = delai_lot
+        self.lot = None
+        self.spool = spool
+        self.fenetre_agregation = fenetre_agregation
+        self.agregateur = None
+        self.analyseur = None
+        self.detecteur = None
+        self.bande_morte = bande_morte
+        self.planificateur = None
+
+        self.echantillonneur = None
+        self.id_capteur_bruit = None  # Capteur du premier canal
         self.compteur_mesures = 0
 
         # Paramètres ADC MCP3008
-        self.adc_channel = 0  # Canal 0 pour le micro
+        self.canaux = dict(canaux or ADC_CANAUX)
+        self.capteurs = {}  # Canal -> idCapteur (canaux dont le capteur existe)
+        self.adc_channel = min(self.canaux)
         self.spi_bus = 0
         self.spi_device = 0
         self.spi_speed = 1350000
+        self.frequence = frequence
+        self.source = source
+        self.positions_lecture = {}  # Canal -> position du tampon circulaire déjà consommée
 
-        # Calibration
-        self.valeur_repos = None
+        # Calibration (suivie ensuite en continu par la ligne de base)
+        self.valeurs_repos = {}  # Canal -> valeur ADC au repos
         self.est_calibre = False
+        self.ligne_base = ligne_base or LignesDeBase()
 
     def setup(self):
-        """Configure le MCP3008 et récupère l'ID du capteur"""
+        """Configure le MCP3008 et récupère l'ID du capteur de chaque canal"""
         print("=== Configuration du système de capture audio ===\n")
 
-        # 1. Récupérer l'ID du capteur de bruit
+        # 1. Associer chaque canal à son capteur BRUIT
         try:
-            capteur = self.db.execute_query(
-                "SELECT idCapteur_PK FROM Capteur WHERE type = 'BRUIT'"
-            )
+            references = shared_cache(self.db)
+
+            for canal, nom in sorted(self.canaux.items()):
+                id_capteur = references.sensor_id_by_name(nom)
+                if id_capteur is None and len(self.canaux) == 1:
+                    # Un seul micro: le premier capteur BRUIT convient
+                    id_capteur = references.sensor_id('BRUIT')
+
+                if id_capteur is None or references.sensor_type(id_capteur) != 'BRUIT':
+                    print(f"⚠ Canal {canal}: capteur BRUIT '{nom}' introuvable - canal ignoré")
+                    continue
 
-            if not capteur:
+                self.capteurs[canal] = id_capteur
+                print(f"✓ Canal {canal} → capteur BRUIT {references.sensors()[id_capteur]['nom']} "
+                      f"- ID: {id_capteur}")
+
+            if not self.capteurs:
                 print("✗ Aucun capteur BRUIT trouvé dans la BD")
                 print("   Lancez d'abord: python initialiser_bd.py")
                 return False
 
-            self.id_capteur_bruit = capteur[0][0]
-            print(f"✓ Capteur BRUIT trouvé - ID: {self.id_capteur_bruit}")
+            self.adc_channel = min(self.capteurs)
+            self.id_capteur_bruit = self.capteurs[self.adc_channel]
 
         except Exception as e:
             print(f"✗ Erreur lors de la récupération du capteur: {e}")
             return False
 
-        # 2. Initialiser le SPI et MCP3008
-        if SPI_AVAILABLE:
-            try:
-                self.spi = spidev.SpiDev()
-                self.spi.open(self.spi_bus, self.spi_device)
-                self.spi.max_speed_hz = self.spi_speed
-                print(f"✓ MCP3008 initialisé (SPI {self.spi_bus}.{self.spi_device})")
-
-                # Calibration
-                if self.calibrer():
-                    print(f"✓ Calibration terminée - Valeur repos: {self.valeur_repos}")
-                else:
-                    print("⚠ Calibration échouée - Utilisation de valeur par défaut")
-                    self.valeur_repos = 512
-                    self.est_calibre = False
+        # 2. Démarrer l'échantillonnage continu du MCP3008 (tous les canaux à chaque tick)
+        self.echantillonneur = EchantillonneurMCP3008(frequence=self.frequence,
+                                                      spi_bus=self.spi_bus, spi_device=self.spi_device,
+                                                      vitesse_spi=self.spi_speed,
+                                                      canaux=sorted(self.capteurs), source=self.source)
+        self.frequence = self.echantillonneur.frequence
+        self.analyseur = AnalyseurSpectral(self.frequence, ANALYSE_TAILLE_FFT, ANALYSE_TIERS_OCTAVE)
+        if not self.echantillonneur.demarrer():
+            print("   Vérifiez que le SPI est activé (raspi-config)")
+            return False
 
-            except Exception as e:
-                print(f"✗ Erreur lors de l'initialisation du MCP3008: {e}")
-                print("   Vérifiez que le SPI est activé (raspi-config)")
-                return False
+        if not self.echantillonneur.simulation:
+            if self.source is not None:
+                print(f"✓ Rejeu de la trace {self.source.chemin} ({self.source.duree:.0f}s, "
+                      f"{self.frequence:.0f} Hz, vitesse x{self.source.vitesse:g})")
+                # La trace ne doit pas remplacer la ligne de base du vrai micro
+                self.ligne_base.chemin = None
+            else:
+                print(f"✓ MCP3008 initialisé (SPI {self.spi_bus}.{self.spi_device}, "
+                      f"{self.frequence:.0f} Hz x {len(self.capteurs)} canal(aux))")
+
+            # Ligne de base sauvegardée: pas besoin des 2 secondes de calibration
+            if self.ligne_base.charger(self.capteurs):
+                self.valeurs_repos = {canal: int(self.ligne_base.valeur_repos(canal))
+                                      for canal in self.capteurs}
+                self.est_calibre = True
+                print(f"✓ Ligne de base restaurée - Valeur(s) repos: {self.valeurs_repos} "
+                      f"(calibration sautée)")
+            elif self.calibrer():
+                print(f"✓ Calibration terminée - Valeur(s) repos: {self.valeurs_repos}")
+            else:
+                print("⚠ Calibration échouée - Utilisation de valeur par défaut")
+                self.valeurs_repos = {canal: 512 for canal in self.capteurs}
+                self.est_calibre = False
         else:
             print("⚠ Mode simulation - Pas de vrai MCP3008")
-            self.valeur_repos = 512
+            self.valeurs_repos = {canal: 512 for canal in self.capteurs}
+            # Les valeurs simulées ne doivent pas remplacer la ligne de base du vrai micro
+            self.ligne_base.chemin = None
+
+        for canal, valeur_repos in self.valeurs_repos.items():
+            if self.ligne_base.valeur_repos(canal) is None:
+                self.ligne_base.initialiser(canal, valeur_repos)
+
+        # 3. Tampon d'insertions groupées pour les mesures ordinaires
+        if self.spool is not None:
+            print(f"✓ Spool local: {self.spool.chemin} ({self.spool.en_attente()} en attente)")
+        elif self.taille_lot > 1:
+            self.lot = self.db.batch_writer(max_rows=self.taille_lot, max_delay=self.delai_lot)
+            print(f"✓ Envoi par lots de {self.taille_lot} mesures (max {self.delai_lot:.0f}s)")
+
+        # 4. Agrégation par fenêtres: résumés + mesures brutes autour des événements
+        if self.fenetre_agregation:
+            self.agregateur = AgregateurFenetres(
+                self.id_salle, self._ecrire_resume, self._ecrire_brut,
+                duree_fenetre=self.fenetre_agregation,
+                avant_evenement=AGREGATION_AVANT_EVENEMENT,
+                apres_evenement=AGREGATION_APRES_EVENEMENT
+            )
+            print(f"✓ Agrégation par fenêtres de {self.fenetre_agregation:.0f}s")
+
+        # 5. Un seul événement BRUIT_FORT par épisode de bruit
+        self.detecteur = DetecteurEpisodes(
+            self.seuil_bruit_fort, self.seuil_bruit_fort - BRUIT_FORT_HYSTERESIS,
+            duree_min=BRUIT_FORT_DUREE_MIN, ecart_fusion=BRUIT_FORT_ECART_FUSION,
+            intervalle_maj=BRUIT_FORT_INTERVALLE_MAJ, classes_ignorees=BRUIT_FORT_CLASSES_IGNOREES
+        )
 
         print("\n✓ Configuration terminée\n")
         return True
 
     def read_adc(self, channel: int) -> int:
         """
-        Lit une valeur du MCP3008
+        Dernière valeur lue par l'échantillonneur continu (sans attendre l'ADC)
 
         Args:
-            channel: Canal à lire (0-7)
+            channel: Canal à lire (seuls les canaux échantillonnés sont disponibles)
 
         Returns:
-            Valeur brute (0-1023)
+            Valeur brute (0-1023), -1 si indisponible
         """
-        if not SPI_AVAILABLE or self.spi is None:
-            # Mode simulation
-            import random
-            return random.randint(480, 550)
-
-        if channel < 0 or channel > 7:
-            return -1
-
-        try:
-            # Commande SPI pour lire le canal
-            adc = self.spi.xfer2([1, (8 + channel) << 4, 0])
-            data = ((adc[1] & 3) << 8) + adc[2]
-            return data
-        except Exception as e:
-            print(f"✗ Erreur lecture ADC: {e}")
+        if self.echantillonneur is None:
             return -1
+        return self.echantillonneur.derniere_valeur(channel)
 
     def calibrer(self) -> bool:
         """
-        Calibre le micro en mesurant la valeur au repos
+        Calibre chaque micro en mesurant sa valeur au repos
 
         Returns:
             True si succès, False sinon
@@ -136,67 +225,67 @@ class CaptureSonContinu:
         print("⏳ Calibration... (silence pendant 2 secondes)")
 
         try:
-            valeurs_repos = []
-            for i in range(20):
-                valeur = self.read_adc(self.adc_channel)
-                if valeur >= 0:
-                    valeurs_repos.append(valeur)
-                time.sleep(0.1)
-
-            if len(valeurs_repos) > 0:
-                self.valeur_repos = sum(valeurs_repos) // len(valeurs_repos)
-                self.est_calibre = True
-                return True
-            else:
+            # 2 secondes d'échantillons continus depuis le démarrage
+            nb_echantillons = int(2 * self.echantillonneur.frequence)
+            if not self.echantillonneur.attendre(nb_echantillons, timeout=4.0):
                 return False
 
+            for canal, tampon in self.echantillonneur.tampons.items():
+                valeurs = tampon.derniers(nb_echantillons)
+                metriques = calculer_metriques(valeurs, self.echantillonneur.frequence)
+                self.valeurs_repos[canal] = int(metriques['moyenne'])
+                self.positions_lecture[canal] = tampon.total
+                self.ligne_base.initialiser(canal, metriques['moyenne'], metriques['l90'])
+            self.ligne_base.sauvegarder(forcer=True)
+            self.est_calibre = True
+            return True
+
         except Exception as e:
             print(f"✗ Erreur calibration: {e}")
             return False
 
-    def mesurer_son(self) -> dict:
+    def mesurer_son(self, canal: Optional[int] = None) -> dict:
         """
-        Mesure le niveau sonore
+        Mesure le niveau sonore d'un micro
+
+        Tous les échantillons reçus depuis la mesure précédente sont pris en compte:
+        aucun pic entre deux mesures n'est manqué.
+
+        Args:
+            canal: Canal du micro (défaut: le premier)
 
         Returns:
-            Dictionnaire avec valeur_brute, voltage, difference, niveau_db
+            Dictionnaire avec canal, id_capteur, valeur_brute, voltage, difference,
+            niveau_db (dB SPL) et les métriques de calculer_metriques (rms, leq, lmax, l10, ...)
         """
-        # Lire plusieurs échantillons pour lisser
-        nb_echantillons = 10
-        valeurs = []
-
-        for _ in range(nb_echantillons):
-            valeur = self.read_adc(self.adc_channel)
-            if valeur >= 0:
-                valeurs.append(valeur)
-            time.sleep(0.01)
+        canal = self.adc_channel if canal is None else canal
+        tampon = self.echantillonneur.tampons[canal]
+        valeurs, self.positions_lecture[canal], _ = tampon.depuis(self.positions_lecture.get(canal, 0))
 
-        if not valeurs:
+        metriques = calculer_metriques(valeurs, self.echantillonneur.frequence)
+        if metriques is None:
             return None
 
-        # Calculer la moyenne et le pic
-        valeur_moyenne = sum(valeurs) // len(valeurs)
-        valeur_max = max(valeurs)
-        valeur_min = min(valeurs)
-        amplitude = valeur_max - valeur_min
+        # Niveaux par bande et classe du bruit (pour ignorer la ventilation, par exemple)
+        metriques['bandes'] = self.analyseur.analyser(valeurs)
+        metriques['classe'] = classer(metriques['bandes'], metriques)
+
+        valeur_moyenne = int(metriques['moyenne'])
 
         # Convertir en voltage (0-3.3V pour le Raspberry Pi)
         voltage = (valeur_moyenne * 3.3) / 1023
 
         # Différence par rapport au repos
-        difference = abs(valeur_moyenne - self.valeur_repos) if self.valeur_repos else 0
-
-        # Conversion approximative en dB
-        # Formule simplifiée : dB = 20 * log10(amplitude / ref)
-        # Ici on utilise une échelle arbitraire 0-100
-        niveau_db = min(100, (amplitude / 12.23) * 10)  # Échelle 0-100
+        valeur_repos = self.valeurs_repos.get(canal)
+        difference = abs(valeur_moyenne - valeur_repos) if valeur_repos else 0
 
         return {
+            **metriques,
+            'canal': canal,
+            'id_capteur': self.capteurs[canal],
             'valeur_brute': valeur_moyenne,
-            'amplitude': amplitude,
             'voltage': voltage,
-            'difference': difference,
-            'niveau_db': niveau_db
+            'difference': difference
         }
 
     def envoyer_mesure_bd(self, mesure: dict) -> bool:
@@ -210,37 +299,94 @@ class CaptureSonContinu:
             True si succès, False sinon
         """
         try:
-            date_heure = datetime.now()
+            date_heure = self.echantillonneur.maintenant()
             niveau_db = mesure['niveau_db']
+            id_capteur = mesure.get('id_capteur', self.id_capteur_bruit)
+            canal = mesure.get('canal', self.adc_channel)
+            seuil = self.ligne_base.seuil(canal, self.seuil_bruit_fort)
+
+            # Épisodes de bruit fort: seule la mesure qui confirme un épisode porte l'événement
+            bruit_fort = None
+            for etat, episode in self.detecteur.ajouter(id_capteur, date_heure, mesure, seuil):
+                if etat == DEBUT:
+                    bruit_fort = episode
+                else:
+                    self._suivre_episode(etat, episode)
+
+            # La ligne de base suit le micro; le bruit de fond seulement hors épisode
+            calme = (not self.detecteur.en_cours(id_capteur)
+                     and niveau_db < seuil - self.detecteur.hysteresis)
+            self.ligne_base.mettre_a_jour(canal, mesure, calme)
+            self.valeurs_repos[canal] = int(self.ligne_base.valeur_repos(canal))
+
+            # Agrégation: la mesure ordinaire entre dans le résumé de sa fenêtre
+            if self.agregateur is not None:
+                self.agregateur.ajouter(id_capteur, date_heure, mesure, evenement=bruit_fort is not None,
+                                        prolonger=self.detecteur.actif(id_capteur))
+                if not bruit_fort:
+                    self.compteur_mesures += 1
+                    heure = date_heure.strftime('%H:%M:%S')
+                    print(f"[{heure}] {self._etiquette(mesure)}Mesure #{self.compteur_mesures:4d} | "
+                          f"Niveau: {niveau_db:5.1f} dB | "
+                          f"Amplitude: {mesure['amplitude']:4d} | "
+                          f"Agrégée")
+                    return True
+
+            # Bande morte: une mesure ordinaire proche de la dernière écrite est implicite
+            if self.bande_morte is not None:
+                if bruit_fort is not None:
+                    self.bande_morte.envoyee(id_capteur, date_heure, niveau_db)
+                elif not self.bande_morte.a_envoyer(id_capteur, date_heure, niveau_db):
+                    self.compteur_mesures += 1
+                    heure = date_heure.strftime('%H:%M:%S')
+                    print(f"[{heure}] {self._etiquette(mesure)}Mesure #{self.compteur_mesures:4d} | "
+                          f"Niveau: {niveau_db:5.1f} dB | "
+                          f"Amplitude: {mesure['amplitude']:4d} | "
+                          f"Inchangée")
+                    return True
+
+            # Spool local: dépôt sur disque, l'envoi vers la BD se fait en arrière-plan
+            if self.spool is not None:
+                return self._deposer_spool(date_heure, mesure, bruit_fort)
+
+            # Mesure ordinaire: mise en lot (l'ID n'est utile que pour un événement)
+            if self.lot is not None and bruit_fort is None:
+                self.lot.add(date_heure, id_capteur, niveau_db, self.id_salle)
+                self.compteur_mesures += 1
+
+                heure = date_heure.strftime('%H:%M:%S')
+                print(f"[{heure}] {self._etiquette(mesure)}Mesure #{self.compteur_mesures:4d} | "
+                      f"Niveau: {niveau_db:5.1f} dB | "
+                      f"Amplitude: {mesure['amplitude']:4d} | "
+                      f"En lot ({self.lot.pending()})")
+                return True
 
-            # Insérer la mesure
-            self.db.execute_non_query(
-                """INSERT INTO Donnees (dateHeure, idCapteur, mesure, photoBlob, noSalle)
-                   VALUES (?, ?, ?, NULL, ?)""",
-                (date_heure, self.id_capteur_bruit, niveau_db, self.id_salle)
-            )
+            # Début d'épisode: la mesure et son événement partent en un seul lot
+            if bruit_fort is not None:
+                ids = self.db.insert_donnee_evenement(
+                    id_capteur, self.id_salle, 'BRUIT_FORT', bruit_fort.description(),
+                    mesure=niveau_db, date_heure=date_heure
+                )
+                id_donnee, bruit_fort.id_evenement = ids if ids else (None, None)
+            else:
+                id_donnee = self.db.insert_donnee(id_capteur, self.id_salle,
+                                                  mesure=niveau_db, date_heure=date_heure)
 
-            # Récupérer l'ID de la donnée insérée
-            id_donnee = self.db.execute_query("SELECT @@IDENTITY AS id")[0][0]
+            if id_donnee is None:
+                return False
 
             self.compteur_mesures += 1
 
             # Affichage
             heure = date_heure.strftime('%H:%M:%S')
-            print(f"[{heure}] Mesure #{self.compteur_mesures:4d} | "
+            print(f"[{heure}] {self._etiquette(mesure)}Mesure #{self.compteur_mesures:4d} | "
                   f"Niveau: {niveau_db:5.1f} dB | "
                   f"Amplitude: {mesure['amplitude']:4d} | "
                   f"ID: {id_donnee}")
 
-            # Créer un événement si bruit fort
-            if niveau_db > self.seuil_bruit_fort:
-                self.db.execute_non_query(
-                    """INSERT INTO Evenement (type, idDonnee, description)
-                       VALUES (?, ?, ?)""",
-                    ('BRUIT_FORT', id_donnee,
-                     f'Niveau sonore élevé: {niveau_db:.1f} dB (amplitude: {mesure["amplitude"]})')
-                )
-                print(f"         ⚠ BRUIT_FORT détecté!")
+            if bruit_fort is not None:
+                print(f"         ⚠ BRUIT_FORT: épisode commencé à {bruit_fort.debut.strftime('%H:%M:%S')} "
+                      f"(Event ID: {bruit_fort.id_evenement})")
 
             return True
 
@@ -248,6 +394,97 @@ class CaptureSonContinu:
             print(f"✗ Erreur lors de l'envoi: {e}")
             return False
 
+    def _deposer_spool(self, date_heure: datetime, mesure: dict,
+                       bruit_fort: Optional[Episode] = None) -> bool:
+        """
+        Dépose la mesure dans le spool local
+
+        La mesure qui confirme un épisode de bruit fort est déposée tout de suite avec
+        son événement; la description est ensuite mise à jour pendant l'épisode
+        (dans le spool, ou dans la BD si la ligne a déjà été rejouée).
+
+        Args:
+            date_heure: Horodatage de la mesure
+            mesure: Dictionnaire contenant les données de mesure
+            bruit_fort: Épisode confirmé par cette mesure (défaut: None)
+
+        Returns:
+            True si succès
+        """
+        niveau_db = mesure['niveau_db']
+        id_capteur = mesure.get('id_capteur', self.id_capteur_bruit)
+
+        if bruit_fort is not None:
+            bruit_fort.ligne_spool = self.spool.ajouter_donnee_evenement(
+                date_heure, id_capteur, self.id_salle, 'BRUIT_FORT', bruit_fort.description(),
+                mesure=niveau_db
+            )
+        else:
+            self.spool.ajouter_mesure(date_heure, id_capteur, niveau_db, self.id_salle)
+
+        self.compteur_mesures += 1
+
+        heure = date_heure.strftime('%H:%M:%S')
+        print(f"[{heure}] {self._etiquette(mesure)}Mesure #{self.compteur_mesures:4d} | "
+              f"Niveau: {niveau_db:5.1f} dB | "
+              f"Amplitude: {mesure['amplitude']:4d} | "
+              f"Spool")
+
+        if bruit_fort is not None:
+            print(f"         ⚠ BRUIT_FORT: épisode commencé à {bruit_fort.debut.strftime('%H:%M:%S')}")
+
+        return True
+
+    def _suivre_episode(self, etat: str, episode: Episode):
+        """
+        Met à jour l'événement d'un épisode en cours (description définitive à sa fin)
+
+        Args:
+            etat: MISE_A_JOUR ou FIN
+            episode: Épisode de DetecteurEpisodes
+        """
+        if episode.id_evenement is None and episode.ligne_spool is not None:
+            if not self.spool.maj_evenement(episode.ligne_spool, episode.description()):
+                # L'événement a quitté le spool: mise à jour directe dans la BD
+                episode.id_evenement = self.spool.evenement_rejoue(episode.ligne_spool)
+                episode.ligne_spool = None
+
+        if episode.id_evenement is not None:
+            self.db.update_evenement(episode.id_evenement, episode.description(), durable=etat == FIN)
+
+        if etat == FIN:
+            print(f"         ✓ Fin d'épisode: {episode.description()}")
+
+    def _ecrire_brut(self, date_heure: datetime, id_capteur: int, niveau_db: float):
+        """Écrit une mesure brute conservée par l'agrégateur (spool, lot ou BD)"""
+        if self.bande_morte is not None and not self.bande_morte.a_envoyer(id_capteur, date_heure, niveau_db):
+            return
+
+        if self.spool is not None:
+            self.spool.ajouter_mesure(date_heure, id_capteur, niveau_db, self.id_salle)
+        elif self.lot is not None:
+            self.lot.add(date_heure, id_capteur, niveau_db, self.id_salle)
+        else:
+            self.db.insert_donnee(id_capteur, self.id_salle, mesure=niveau_db, date_heure=date_heure)
+
+    def _ecrire_resume(self, resume: dict):
+        """Écrit le résumé d'une fenêtre (spool ou BD)"""
+        if self.spool is not None:
+            self.spool.ajouter_resume(resume)
+        elif not self.db.insert_resume(resume):
+            return
+
+        print(f"         📊 Résumé {resume['date_debut'].strftime('%H:%M:%S')}-"
+              f"{resume['date_fin'].strftime('%H:%M:%S')} | {resume['nb_mesures']} mesures | "
+              f"Moy: {resume['moyenne']:5.1f} dB | Leq: {resume['leq']:5.1f} dB | "
+              f"Max: {resume['maximum']:5.1f} dB")
+
+    def _etiquette(self, mesure: dict) -> str:
+        """Préfixe d'affichage du canal, seulement s'il y a plusieurs micros"""
+        if len(self.capteurs) > 1 and 'canal' in mesure:
+            return f"C{mesure['canal']} "
+        return ""
+
     def capturer_en_continu(self):
         """Boucle principale de capture continue"""
         print("╔═══════════════════════════════════════════════════════════╗")
@@ -255,24 +492,37 @@ class CaptureSonContinu:
         print("╚═══════════════════════════════════════════════════════════╝\n")
         print(f"🎤 Intervalle: {self.intervalle} seconde(s)")
         print(f"🏢 Salle: {self.id_salle}")
-        print(f"📊 Seuil bruit fort: {self.seuil_bruit_fort} dB")
+        print(f"📊 Seuil bruit fort: {self.seuil_bruit_fort} dB minimum, "
+              f"bruit de fond + {self.ligne_base.marge_db:.0f} dB")
         print(f"💾 Stockage: Base de données")
         print("\nAppuyez sur Ctrl+C pour arrêter\n")
         print("─" * 63)
 
+        # Échéances absolues: la mesure et l'envoi ne rallongent pas la période
+        # (plus courte si une trace est rejouée accélérée)
+        self.planificateur = Planificateur(self.intervalle / self.echantillonneur.vitesse, "Son")
+
         try:
             while True:
-                # Mesurer le son
-                mesure = self.mesurer_son()
+                # Fin d'une trace rejouée: dernière mesure puis arrêt
+                fin_trace = self.echantillonneur.termine
 
-                if mesure:
-                    # Envoyer vers la BD
-                    self.envoyer_mesure_bd(mesure)
-                else:
-                    print("✗ Échec de la mesure")
+                # Mesurer le son de chaque micro
+                for canal in self.capteurs:
+                    mesure = self.mesurer_son(canal)
+
+                    if mesure:
+                        # Envoyer vers la BD
+                        self.envoyer_mesure_bd(mesure)
+                    else:
+                        print(f"✗ Échec de la mesure (canal {canal})")
+
+                if fin_trace:
+                    print(f"\n✓ Fin de la trace - {self.compteur_mesures} mesures capturées")
+                    break
 
-                # Attendre avant la prochaine mesure
-                time.sleep(self.intervalle)
+                # Attendre l'échéance de la prochaine mesure
+                self.planificateur.attendre()
 
         except KeyboardInterrupt:
             print("\n\n─" * 63)
@@ -280,13 +530,46 @@ class CaptureSonContinu:
             print("✓ Programme terminé")
 
     def cleanup(self):
-        """Nettoie les ressources (SPI)"""
-        if self.spi:
-            try:
-                self.spi.close()
-                print("✓ SPI fermé proprement")
-            except:
-                pass
+        """Nettoie les ressources (épisodes et fenêtres en cours, lot de mesures en attente, SPI)"""
+        if self.planificateur is not None:
+            print(self.planificateur.resume())
+
+        if self.detecteur is not None:
+            for etat, episode in self.detecteur.terminer():
+                self._suivre_episode(etat, episode)
+
+        if self.ligne_base.sauvegarder(forcer=True):
+            fonds = {canal: round(self.ligne_base.niveau_fond(canal), 1)
+                     for canal in self.capteurs if self.ligne_base.niveau_fond(canal) is not None}
+            print(f"✓ Ligne de base sauvegardée - Bruit de fond: {fonds} dB")
+
+        if self.agregateur is not None:
+            self.agregateur.vider()
+            print(f"✓ Agrégation: {self.agregateur.compteur_mesures} mesures → "
+                  f"{self.agregateur.compteur_resumes} résumé(s) + "
+                  f"{self.agregateur.compteur_bruts} mesure(s) brute(s)")
+
+        if self.bande_morte is not None:
+            # La dernière valeur implicite de chaque capteur date la fin de la période stable
+            for id_capteur, date_heure, niveau_db in self.bande_morte.vider():
+                self._ecrire_brut(date_heure, id_capteur, niveau_db)
+            print(f"✓ Bande morte: {self.bande_morte.compteur_envoyees} mesure(s) écrite(s), "
+                  f"{self.bande_morte.compteur_supprimees} implicite(s) "
+                  f"(-{self.bande_morte.reduction():.0%})")
+
+        if self.lot is not None:
+            nb = self.db.flush_batches()
+            if nb:
+                print(f"✓ {nb} mesure(s) en attente envoyée(s)")
+
+        if self.echantillonneur is not None:
+            self.echantillonneur.arreter()
+            if self.source is not None:
+                stats = self.echantillonneur.stats()
+                print(f"✓ Rejeu: {stats['echantillons'] / self.frequence:.0f}s de trace, "
+                      f"{stats['frequence_mesuree']:.0f} échantillons/s, "
+                      f"{stats['blocs_en_retard']} bloc(s) en retard")
+            print("✓ Échantillonnage arrêté, SPI fermé proprement")
 
 
 def main():
@@ -295,6 +578,15 @@ def main():
     print("║        SalleSense - Capture Son en Continu               ║")
     print("╚═══════════════════════════════════════════════════════════╝\n")
 
+    # Trace enregistrée rejouée au lieu du micro (banc d'essai, incident du terrain)
+    source = None
+    if ADC_TRACE:
+        try:
+            source = SourceTrace(ADC_TRACE, ADC_TRACE_VITESSE)
+        except (OSError, ValueError) as e:
+            print(f"✗ Trace illisible: {e}")
+            return 1
+
     # Connexion à la base de données
     db = DatabaseConnection(DB_SERVER, DB_NAME, DB_USERNAME, DB_PASSWORD)
 
@@ -302,12 +594,22 @@ def main():
         print("\n✗ Impossible de se connecter à la base de données")
         return 1
 
+    # Spool local: les mesures survivent à une BD lente ou injoignable
+    spool = SpoolLocal(db, os.path.join(SPOOL_DIR, "son.db"), quota_mo=SPOOL_QUOTA_MO)
+
+    # Ligne de base sauvegardée entre deux lancements (remplace la calibration)
+    ligne_base = LignesDeBase(os.path.join(LIGNE_BASE_DIR, "son.json"))
+
     # Créer le système de capture
     # Paramètres : intervalle=1s, seuil_bruit_fort=50dB
-    capture_system = CaptureSonContinu(db, ID_SALLE, intervalle=1, seuil_bruit_fort=70.0)
+    capture_system = CaptureSonContinu(db, ID_SALLE, intervalle=1, seuil_bruit_fort=70.0,
+                                       spool=spool, fenetre_agregation=AGREGATION_FENETRE,
+                                       ligne_base=ligne_base, source=source,
+                                       bande_morte=FiltreBandeMorte() if BANDE_MORTE_DB else None)
 
     # Configuration
     if not capture_system.setup():
+        spool.arreter()
         db.disconnect()
         return 1
 
@@ -318,6 +620,7 @@ def main():
     finally:
         # Nettoyage
         capture_system.cleanup()
+        spool.arreter()
         db.disconnect()
         print("✓ Connexion BD fermée\n")
 
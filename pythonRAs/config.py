@@ -17,6 +17,20 @@ SOUND_PIN = 18  # Pin GPIO pour le module micro (sortie digitale)
 ADC_CHANNEL = 0  # Canal ADC pour le micro
 SPI_BUS = 0
 SPI_DEVICE = 0
+ADC_FREQUENCE = 8000     # Fréquence d'échantillonnage continue du micro (Hz)
+ADC_TAILLE_BLOC = 256    # Échantillons lus par réveil du thread d'échantillonnage
+ADC_DUREE_TAMPON = 10.0  # Secondes conservées dans le tampon circulaire
+# Canaux MCP3008 balayés -> nom du Capteur BRUIT associé (un micro par canal)
+# La fréquence s'applique à chaque canal: baisser ADC_FREQUENCE si plusieurs canaux
+ADC_CANAUX = {ADC_CHANNEL: "MIC-ELECTRET-1"}
+
+# Rejeu d'une trace ADC enregistrée au lieu du MCP3008 (voir source_trace.py)
+ADC_TRACE = None         # Fichier .wav, .npy ou .adc (None = micro réel ou simulation)
+ADC_TRACE_VITESSE = 1.0  # 1 = temps réel, 10 = dix fois plus vite
+
+# Calibration du micro: dB SPL = 20 * log10(RMS en unités ADC) + MICRO_DB_DECALAGE
+# Pour calibrer: placer un sonomètre à côté du micro et ajuster jusqu'à lire la même valeur
+MICRO_DB_DECALAGE = 35.0
 
 # Configuration capteurs
 SEUIL_BRUIT_FORT = 70.0  # Seuil en dB (ou valeur arbitraire) pour déclencher un événement
@@ -25,7 +39,51 @@ SEUIL_BRUIT_FORT = 70.0  # Seuil en dB (ou valeur arbitraire) pour déclencher u
 INTERVALLE_BRUIT = 5   # Secondes entre chaque mesure de bruit
 INTERVALLE_PHOTO = 60  # Secondes entre chaque capture photo
 
+# Analyse spectrale du son (bandes d'octave ou de tiers d'octave)
+ANALYSE_TAILLE_FFT = 1024       # Échantillons par trame FFT
+ANALYSE_TIERS_OCTAVE = False    # True: tiers d'octave, False: octaves
+BRUIT_FORT_CLASSES_IGNOREES = ("BOURDONNEMENT",)  # Classes qui ne déclenchent pas BRUIT_FORT
+
+# Ligne de base adaptative du micro (valeur au repos et bruit de fond suivis en continu)
+LIGNE_BASE_DIR = "etat"                 # Dossier où la dernière ligne de base est sauvegardée
+LIGNE_BASE_CONSTANTE = 600.0            # Constante de temps du suivi en secondes
+LIGNE_BASE_MARGE_DB = 15.0              # Seuil bruit fort = bruit de fond + marge (jamais sous le seuil fixe)
+LIGNE_BASE_AGE_MAX = 7 * 24 * 3600      # Âge max d'une sauvegarde (au-delà: nouvelle calibration)
+
+# Épisodes de bruit fort (un seul événement BRUIT_FORT par épisode)
+BRUIT_FORT_HYSTERESIS = 5.0       # dB sous le seuil d'entrée pour mettre l'épisode en pause
+BRUIT_FORT_DUREE_MIN = 2.0        # Secondes de bruit avant de créer l'événement
+BRUIT_FORT_ECART_FUSION = 10.0    # Secondes de calme qui terminent l'épisode
+BRUIT_FORT_INTERVALLE_MAJ = 10.0  # Secondes entre deux mises à jour de l'événement en cours
+
+# Agrégation des mesures de son (un résumé par fenêtre dans DonneesResume)
+AGREGATION_FENETRE = 60           # Secondes par résumé (None = écrire chaque mesure)
+AGREGATION_AVANT_EVENEMENT = 30   # Secondes de mesures brutes gardées avant un bruit fort
+AGREGATION_APRES_EVENEMENT = 30   # Secondes de mesures brutes gardées après un bruit fort
+
+# Bande morte: une mesure de son n'est écrite que si elle change (les périodes stables sont implicites)
+BANDE_MORTE_DB = 1.0              # Écart minimum en dB avec la dernière valeur écrite (0 = tout écrire)
+BANDE_MORTE_BATTEMENT = 60        # Secondes max sans écriture: la valeur est réécrite même inchangée
+
 # Configuration photos
 PHOTO_DIR = "photos"  # Dossier où sauvegarder les photos
 PHOTO_WIDTH = 1920    # Largeur des photos (pixels)
 PHOTO_HEIGHT = 1080   # Hauteur des photos (pixels)
+CAMERA_PRECHAUFFAGE = 2.0  # Secondes d'ajustement (exposition, balance des blancs) au démarrage du flux
+PHOTO_QUALITE_JPEG = 85    # Qualité de l'encodage JPEG (1-95)
+
+# Détection de changement: les photos presque identiques à la dernière envoyée sont ignorées
+PHOTO_SEUIL_CHANGEMENT = 1.0  # % minimum de pixels changés pour envoyer la photo (0 = tout envoyer)
+PHOTO_SEUIL_PIXEL = 20        # Écart de gris (0-255) à partir duquel un pixel a changé
+PHOTO_MAINTIEN = 10           # Minutes max sans photo envoyée (image de maintien, 0 = jamais)
+
+# Pipeline photos: capture → encodage JPEG → envoi, un thread et une file bornée par étage
+# Politiques si la file est pleine: "bloquer", "supprimer_ancien" ou "supprimer_nouveau"
+PIPELINE_FILE_ENCODAGE = 2                      # Images brutes en attente (~6 Mo chacune en 1080p)
+PIPELINE_POLITIQUE_ENCODAGE = "supprimer_ancien"  # La capture ne doit jamais attendre
+PIPELINE_FILE_ENVOI = 10                        # Photos JPEG en attente d'envoi
+PIPELINE_POLITIQUE_ENVOI = "bloquer"            # L'encodage attend; ce sont les images brutes qui sautent
+
+# Configuration spool local (mesures conservées sur disque si la BD est lente ou injoignable)
+SPOOL_DIR = "spool"      # Dossier des fichiers spool (un par script de capture)
+SPOOL_QUOTA_MO = 200     # Taille maximale d'un spool en Mo (les plus anciennes lignes sont abandonnées)
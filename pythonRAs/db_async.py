@@ -0,0 +1,116 @@
+"""
+Façade asyncio pour la base de données SalleSense
+Les appels pyodbc (bloquants) sont exécutés dans un pool de threads dédié;
+chaque appel emprunte une connexion au pool de DatabaseConnection et la rend
+à la fin, pour la laisser aux autres utilisateurs du pool (spool, lots, etc.).
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional, Tuple
+
+from db_connection import DatabaseConnection
+
+
+class AsyncDatabaseConnection:
+    """Équivalent awaitable de DatabaseConnection"""
+
+    def __init__(self, db_connection: DatabaseConnection, max_workers: Optional[int] = None):
+        """
+        Initialise la façade
+
+        Args:
+            db_connection: Connexion (pool) à utiliser
+            max_workers: Appels simultanés au maximum (défaut: taille max du pool); un appel
+                         qui ne trouve pas de connexion libre attend la fin d'un autre appel
+        """
+        self.db = db_connection
+        self.max_workers = max_workers or db_connection.pool_max
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix="db-async")
+
+    async def _run(self, fonction, *args, **kwargs):
+        """Exécute un appel bloquant dans le pool de threads dédié, puis rend sa connexion"""
+        def appel():
+            try:
+                return fonction(*args, **kwargs)
+            finally:
+                self.db.release_connection()
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, appel)
+
+    async def connect(self) -> bool:
+        """Établit la connexion (voir DatabaseConnection.connect)"""
+        return await self._run(self.db.connect)
+
+    async def disconnect(self):
+        """Ferme le pool de threads puis la connexion (sans bloquer la boucle d'événements)"""
+        def fermer():
+            self._executor.shutdown(wait=True)
+            self.db.disconnect()
+
+        await asyncio.get_running_loop().run_in_executor(None, fermer)
+
+    async def execute_query(self, query: str, params: Optional[tuple] = None) -> list:
+        """Exécute une requête SELECT (voir DatabaseConnection.execute_query)"""
+        return await self._run(self.db.execute_query, query, params)
+
+    async def execute_non_query(self, query: str, params: Optional[tuple] = None,
+                                durable: bool = False) -> bool:
+        """Exécute une requête INSERT, UPDATE ou DELETE (voir DatabaseConnection.execute_non_query)"""
+        return await self._run(self.db.execute_non_query, query, params, durable)
+
+    async def execute_many(self, query: str, rows: list) -> bool:
+        """Exécute une requête pour plusieurs lignes (voir DatabaseConnection.execute_many)"""
+        return await self._run(self.db.execute_many, query, rows)
+
+    async def insert_returning_id(self, table: str, valeurs: dict,
+                                  id_colonne: str = "idDonnee_PK") -> Optional[int]:
+        """Insère une ligne et retourne son ID (voir DatabaseConnection.insert_returning_id)"""
+        return await self._run(self.db.insert_returning_id, table, valeurs, id_colonne)
+
+    async def insert_donnee(self, id_capteur: int, id_salle: int, mesure: Optional[float] = None,
+                            photo_blob: Optional[bytes] = None,
+                            date_heure: Optional[datetime] = None,
+                            durable: bool = False) -> Optional[int]:
+        """Insère une Donnee (voir DatabaseConnection.insert_donnee)"""
+        return await self._run(self.db.insert_donnee, id_capteur, id_salle, mesure=mesure,
+                               photo_blob=photo_blob, date_heure=date_heure, durable=durable)
+
+    async def insert_donnee_evenement(self, id_capteur: int, id_salle: int,
+                                      type_evenement: str, description: str,
+                                      mesure: Optional[float] = None,
+                                      photo_blob: Optional[bytes] = None,
+                                      date_heure: Optional[datetime] = None) -> Optional[Tuple[int, int]]:
+        """Insère une Donnee et son Evenement (voir DatabaseConnection.insert_donnee_evenement)"""
+        return await self._run(self.db.insert_donnee_evenement, id_capteur, id_salle,
+                               type_evenement, description, mesure=mesure,
+                               photo_blob=photo_blob, date_heure=date_heure)
+
+    async def __aenter__(self):
+        """Support du context manager asynchrone (async with)"""
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Ferme automatiquement la connexion à la sortie"""
+        await self.disconnect()
+
+
+# Exemple d'utilisation
+if __name__ == "__main__":
+    from config import DB_SERVER, DB_NAME, DB_USERNAME, DB_PASSWORD
+
+    async def demo():
+        async with AsyncDatabaseConnection(
+                DatabaseConnection(DB_SERVER, DB_NAME, DB_USERNAME, DB_PASSWORD)) as db:
+            # Les deux requêtes s'exécutent en parallèle, chacune sur sa connexion
+            salles, capteurs = await asyncio.gather(
+                db.execute_query("SELECT idSalle_PK, numero FROM Salle"),
+                db.execute_query("SELECT idCapteur_PK, nom, type FROM Capteur"),
+            )
+            print(f"{len(salles)} salle(s), {len(capteurs)} capteur(s)")
+
+    asyncio.run(demo())
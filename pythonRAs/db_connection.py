@@ -3,15 +3,744 @@ Module de connexion à la base de données SalleSense
 Nécessite: pip install pyodbc
 """
 
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
 import pyodbc
-from typing import Optional, Tuple
+from typing import BinaryIO, Iterator, Optional, Tuple
+from query_stats import QueryStats, payload_size
+from reference_cache import invalidate_for_statement
+
+
+class ConnectionPool:
+    """
+    Pool de connexions pyodbc partagé entre les threads d'un processus
+
+    Chaque thread emprunte sa propre connexion (et son propre curseur) au
+    premier usage et la garde jusqu'à release() ou jusqu'à sa fin. Un thread
+    de nettoyage récupère les connexions des threads terminés et ferme les
+    connexions inactives au-delà de min_size.
+    """
+
+    def __init__(self, connection_string: str, min_size: int = 1, max_size: int = 4,
+                 idle_timeout: float = 300.0, acquire_timeout: float = 30.0):
+        """
+        Initialise le pool (aucune connexion n'est ouverte avant open())
+
+        Args:
+            connection_string: Chaîne de connexion ODBC
+            min_size: Nombre de connexions gardées ouvertes en permanence
+            max_size: Nombre maximal de connexions simultanées
+            idle_timeout: Secondes d'inactivité avant fermeture d'une connexion excédentaire
+            acquire_timeout: Secondes d'attente maximale quand le pool est plein
+        """
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Tailles de pool invalides (0 <= min_size <= max_size, max_size >= 1)")
+
+        self.connection_string = connection_string
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+
+        self._cond = threading.Condition()
+        self._idle = []          # [(connexion, instant du dernier retour)]
+        self._checked_out = {}   # ident thread -> (thread, connexion, curseur)
+        self._statements = {}    # connexion -> {nom instruction préparée: curseur dédié}
+        self._size = 0
+        self._closed = False
+        self._stop_reaper = threading.Event()
+        self._reaper = None
+
+    def open(self):
+        """Ouvre min_size connexions et démarre le thread de nettoyage"""
+        for _ in range(self.min_size):
+            connection = pyodbc.connect(self.connection_string)
+            with self._cond:
+                self._idle.append((connection, time.monotonic()))
+                self._size += 1
+
+        self._reaper = threading.Thread(target=self._reap_loop, name="db-pool-reaper", daemon=True)
+        self._reaper.start()
+
+    def checkout(self) -> Tuple[pyodbc.Connection, pyodbc.Cursor]:
+        """
+        Retourne la connexion et le curseur du thread courant, en empruntant
+        une connexion au pool si le thread n'en a pas encore
+
+        Returns:
+            (connexion, curseur) réservés au thread courant
+
+        Raises:
+            pyodbc.Error: Si le pool est fermé ou épuisé après acquire_timeout
+        """
+        thread = threading.current_thread()
+        ident = threading.get_ident()
+        deadline = time.monotonic() + self.acquire_timeout
+
+        with self._cond:
+            entry = self._checked_out.get(ident)
+            if entry is not None:
+                if entry[0] is thread:
+                    return entry[1], entry[2]
+                # Identifiant réutilisé par un nouveau thread: rendre l'ancienne connexion
+                self._return_locked(ident)
+
+            while True:
+                if self._closed:
+                    raise pyodbc.Error("Pool de connexions fermé")
+
+                if self._idle:
+                    connection, _ = self._idle.pop()
+                    break
+
+                if self._size < self.max_size:
+                    # Réserver la place puis ouvrir la connexion hors du verrou
+                    self._size += 1
+                    connection = None
+                    break
+
+                if self._reclaim_dead_locked():
+                    continue
+
+                restant = deadline - time.monotonic()
+                if restant <= 0:
+                    raise pyodbc.Error(
+                        f"Pool de connexions épuisé ({self.max_size} connexion(s) occupée(s))"
+                    )
+                self._cond.wait(restant)
+
+        if connection is None:
+            try:
+                connection = pyodbc.connect(self.connection_string)
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+
+        cursor = connection.cursor()
+        with self._cond:
+            self._checked_out[ident] = (thread, connection, cursor)
+        return connection, cursor
+
+    def statement_cursor(self, nom: str, preparer) -> pyodbc.Cursor:
+        """
+        Retourne le curseur dédié à une instruction préparée sur la connexion
+        du thread courant; il suit la connexion d'un emprunteur à l'autre
+
+        Args:
+            nom: Nom de l'instruction
+            preparer: Fonction(connexion) -> curseur, appelée à la première utilisation
+
+        Returns:
+            Curseur dédié
+        """
+        connection, _ = self.checkout()
+        with self._cond:
+            cursor = self._statements.get(connection, {}).get(nom)
+        if cursor is None:
+            cursor = preparer(connection)
+            with self._cond:
+                self._statements.setdefault(connection, {})[nom] = cursor
+        return cursor
+
+    def current(self) -> Optional[Tuple[pyodbc.Connection, pyodbc.Cursor]]:
+        """Retourne (connexion, curseur) du thread courant s'il en a emprunté une, sinon None"""
+        with self._cond:
+            entry = self._checked_out.get(threading.get_ident())
+            if entry is None or entry[0] is not threading.current_thread():
+                return None
+            return entry[1], entry[2]
+
+    def release(self):
+        """Rend au pool la connexion empruntée par le thread courant"""
+        with self._cond:
+            self._return_locked(threading.get_ident())
+
+    def reap(self):
+        """Récupère les connexions des threads terminés et ferme les connexions inactives en trop"""
+        a_fermer = []
+        with self._cond:
+            self._reclaim_dead_locked()
+            maintenant = time.monotonic()
+            conserves = []
+            # Les plus anciennes en premier: on ferme celles-là en priorité
+            for connection, dernier_usage in self._idle:
+                if (maintenant - dernier_usage > self.idle_timeout
+                        and self._size - len(a_fermer) > self.min_size):
+                    a_fermer.append(connection)
+                else:
+                    conserves.append((connection, dernier_usage))
+            self._idle = conserves
+            self._size -= len(a_fermer)
+
+        for connection in a_fermer:
+            self._close_connection(connection)
+
+    def close(self):
+        """Ferme toutes les connexions du pool (empruntées ou non)"""
+        self._stop_reaper.set()
+        with self._cond:
+            self._closed = True
+            connexions = [c for c, _ in self._idle]
+            connexions += [entry[1] for entry in self._checked_out.values()]
+            self._idle = []
+            self._checked_out = {}
+            self._size = 0
+            self._cond.notify_all()
+
+        for connection in connexions:
+            self._close_connection(connection)
+
+    def stats(self) -> dict:
+        """Retourne un instantané de l'état du pool"""
+        with self._cond:
+            return {
+                'taille': self._size,
+                'inactives': len(self._idle),
+                'empruntees': len(self._checked_out),
+                'min': self.min_size,
+                'max': self.max_size,
+            }
+
+    def _return_locked(self, ident: int):
+        """Remet la connexion d'un thread dans la liste des inactives (verrou déjà pris)"""
+        entry = self._checked_out.pop(ident, None)
+        if entry is None:
+            return
+
+        _, connection, cursor = entry
+        try:
+            cursor.close()
+            # Ne jamais transmettre une transaction entamée au prochain emprunteur
+            connection.rollback()
+            self._idle.append((connection, time.monotonic()))
+        except pyodbc.Error:
+            # Connexion morte: on libère simplement sa place
+            self._size -= 1
+            self._statements.pop(connection, None)
+        self._cond.notify()
+
+    def _close_connection(self, connection: pyodbc.Connection):
+        """Ferme une connexion retirée du pool et ses curseurs dédiés"""
+        with self._cond:
+            curseurs = self._statements.pop(connection, {})
+        try:
+            for cursor in curseurs.values():
+                cursor.close()
+            connection.close()
+        except pyodbc.Error:
+            pass
+
+    def _reclaim_dead_locked(self) -> bool:
+        """Rend au pool les connexions des threads terminés (verrou déjà pris)"""
+        morts = [ident for ident, (thread, _, _) in self._checked_out.items()
+                 if not thread.is_alive()]
+        for ident in morts:
+            self._return_locked(ident)
+        return bool(morts)
+
+    def _reap_loop(self):
+        """Boucle du thread de nettoyage"""
+        periode = max(1.0, min(self.idle_timeout / 2, 30.0))
+        while not self._stop_reaper.wait(periode):
+            self.reap()
+
+
+class BatchWriter:
+    """
+    Tampon d'insertions dans Donnees, vidé en un seul executemany
+
+    Les lignes sont accumulées puis écrites avec fast_executemany dès que
+    max_rows lignes sont en attente ou que la plus ancienne attend depuis
+    max_delay secondes. L'écriture se fait dans un thread dédié (avec sa
+    propre connexion du pool): l'appelant n'attend jamais le serveur.
+    """
+
+    INSERT_DONNEES = """INSERT INTO Donnees (dateHeure, idCapteur, mesure, photoBlob, noSalle)
+                        VALUES (?, ?, ?, NULL, ?)"""
+
+    def __init__(self, db: 'DatabaseConnection', max_rows: int = 50, max_delay: float = 5.0,
+                 max_pending: Optional[int] = None):
+        """
+        Initialise le tampon et démarre son thread d'écriture
+
+        Args:
+            db: Connexion (pool) utilisée pour les écritures
+            max_rows: Nombre de lignes déclenchant l'écriture du lot (défaut: 50)
+            max_delay: Attente maximale en secondes d'une ligne dans le tampon (défaut: 5)
+            max_pending: Lignes conservées au maximum si la BD est en erreur
+                         (défaut: 20 lots; les plus anciennes sont abandonnées)
+        """
+        self.db = db
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.max_pending = max_pending or max_rows * 20
+
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.flushes = 0
+
+        self._rows = []
+        self._first_at = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._flush_loop, name="db-batch-writer", daemon=True)
+        self._thread.start()
+
+    def add(self, date_heure, id_capteur: int, mesure: float, id_salle: int):
+        """
+        Ajoute une mesure au tampon (ne bloque pas sur la BD)
+
+        Args:
+            date_heure: Horodatage de la mesure
+            id_capteur: ID du capteur
+            mesure: Valeur mesurée
+            id_salle: ID de la salle
+        """
+        with self._lock:
+            if not self._rows:
+                self._first_at = time.monotonic()
+            self._rows.append((date_heure, id_capteur, mesure, id_salle))
+            plein = len(self._rows) >= self.max_rows
+
+        if plein:
+            self._wake.set()
+
+    def pending(self) -> int:
+        """Nombre de lignes en attente d'écriture"""
+        with self._lock:
+            return len(self._rows)
+
+    def flush(self) -> int:
+        """
+        Écrit immédiatement toutes les lignes en attente
+
+        Returns:
+            Nombre de lignes écrites (0 si rien à écrire ou en cas d'erreur)
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows = self._rows
+                self._rows = []
+                self._first_at = None
+
+            if not rows:
+                return 0
+
+            if not self.db.execute_many_prepared('donnees_lot', rows):
+                self._requeue(rows)
+                return 0
+
+            self.rows_written += len(rows)
+            self.flushes += 1
+            return len(rows)
+
+    def close(self):
+        """Arrête le thread d'écriture et vide le tampon (à appeler à l'arrêt)"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.max_delay + 5)
+        self.flush()
+
+    def _requeue(self, rows: list):
+        """Remet en tête du tampon un lot non écrit, en respectant max_pending"""
+        with self._lock:
+            self._rows = rows + self._rows
+            surplus = len(self._rows) - self.max_pending
+            if surplus > 0:
+                del self._rows[:surplus]
+                self.rows_dropped += surplus
+                print(f"⚠ Tampon plein: {surplus} mesure(s) abandonnée(s)")
+            if self._rows:
+                self._first_at = time.monotonic()
+
+    def _flush_loop(self):
+        """Boucle du thread d'écriture"""
+        try:
+            while not self._stop.is_set():
+                self._wake.wait(timeout=min(self.max_delay, 1.0))
+                self._wake.clear()
+
+                with self._lock:
+                    nb = len(self._rows)
+                    age = time.monotonic() - self._first_at if self._first_at else 0
+
+                if nb and (nb >= self.max_rows or age >= self.max_delay):
+                    self.flush()
+        finally:
+            self.db.release_connection()
+
+
+class GroupCommitter:
+    """
+    Validation groupée (group commit) des écritures
+
+    Les écritures sont exécutées dans l'ordre par un thread dédié (avec sa
+    propre connexion du pool), dans une transaction laissée ouverte et validée
+    toutes les max_statements écritures ou max_delay secondes: un seul vidage
+    du journal du serveur pour tout le groupe. Une écriture durable valide
+    immédiatement le groupe en cours. L'appelant attend l'exécution de son
+    écriture (et sa validation si elle est durable), pas celle du groupe.
+
+    Si la transaction du groupe est annulée (ROLLBACK d'un déclencheur, échec
+    de la validation), les écritures déjà exécutées sont rejouées dans une
+    nouvelle transaction; seules celles qui échouent à nouveau sont perdues.
+    Une insertion rejouée reçoit un nouvel ID (IDENTITY).
+    """
+
+    def __init__(self, db: 'DatabaseConnection', max_statements: int = 50, max_delay: float = 1.0):
+        """
+        Initialise le groupe et démarre son thread d'écriture
+
+        Args:
+            db: Connexion (pool) utilisée pour les écritures
+            max_statements: Écritures déclenchant la validation (défaut: 50)
+            max_delay: Attente maximale en secondes d'une écriture non validée (défaut: 1)
+        """
+        self.db = db
+        self.max_statements = max_statements
+        self.max_delay = max_delay
+
+        self.statements = 0
+        self.commits = 0
+        self.lost = 0
+
+        self._queue = queue.Queue()
+        self._pending = 0
+        self._actions = []  # Écritures du groupe en cours, rejouées si la transaction est annulée
+        self._first_at = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._commit_loop, name="db-group-commit", daemon=True)
+        self._thread.start()
+
+    def submit(self, action, durable: bool = False):
+        """
+        Exécute une écriture dans la transaction du groupe
+
+        Args:
+            action: Fonction sans argument exécutée dans le thread d'écriture,
+                    qui écrit (sans commit) via db.cursor et retourne un résultat
+            durable: Valider le groupe avant de rendre la main (défaut: False)
+
+        Returns:
+            Résultat de action
+
+        Raises:
+            pyodbc.Error: Si l'écriture échoue, ou sa validation pour une écriture durable
+        """
+        if self._closed:
+            raise pyodbc.Error("Validation groupée arrêtée")
+
+        demande = {'action': action, 'durable': durable, 'fait': threading.Event(),
+                   'resultat': None, 'erreur': None}
+        self._queue.put(demande)
+        demande['fait'].wait()
+
+        if demande['erreur'] is not None:
+            raise demande['erreur']
+        return demande['resultat']
+
+    def commit(self) -> bool:
+        """
+        Valide immédiatement les écritures en attente
+
+        Returns:
+            True si succès (ou rien à valider), False sinon
+        """
+        try:
+            self.submit(None, durable=True)
+            return True
+        except pyodbc.Error:
+            return False
+
+    def pending(self) -> int:
+        """Nombre d'écritures exécutées mais pas encore validées"""
+        return self._pending
+
+    def close(self):
+        """Valide les écritures en attente et arrête le thread d'écriture"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.max_delay + 30)
+
+    def _commit_group(self, action=None) -> bool:
+        """
+        Valide le groupe en cours (depuis le thread d'écriture)
+
+        En cas d'échec, le groupe est rejoué dans une nouvelle transaction puis
+        validé une seconde fois.
+
+        Args:
+            action: Écriture dont l'appelant attend la validation (défaut: None)
+
+        Returns:
+            True si le groupe est validé et que action n'a pas été perdue
+        """
+        if not self._pending:
+            self._first_at = None
+            return True
+
+        perdues = []
+        ok = False
+        for essai in (1, 2):
+            try:
+                self.db.connection.commit()
+                self.commits += 1
+                ok = True
+                break
+            except pyodbc.Error as e:
+                self.db._rollback()
+                if essai == 1:
+                    print(f"✗ Erreur de validation groupée, nouvel essai: {e}")
+                    perdues = self._replay("Validation groupée échouée")
+                else:
+                    print(f"✗ Erreur de validation groupée ({self._pending} écriture(s) perdue(s)): {e}")
+                    self.lost += self._pending
+
+        self._pending = 0
+        self._actions = []
+        self._first_at = None
+        return ok and action not in perdues
+
+    def _replay(self, raison: str) -> list:
+        """
+        Rejoue dans une nouvelle transaction les écritures du groupe annulé
+        (depuis le thread d'écriture, la transaction précédente déjà annulée)
+
+        Une écriture refusée est abandonnée; si son erreur annule à nouveau la
+        transaction, les écritures rejouées avant elle sont rejouées encore.
+
+        Args:
+            raison: Cause de l'annulation, pour le message
+
+        Returns:
+            Écritures perdues
+        """
+        restantes, self._actions = self._actions, []
+        print(f"⚠ {raison}: {len(restantes)} écriture(s) rejouée(s) dans une nouvelle transaction")
+
+        rejouees = []
+        perdues = []
+        while restantes:
+            action = restantes.pop(0)
+            try:
+                action()
+                rejouees.append(action)
+            except pyodbc.Error as e:
+                print(f"✗ Écriture rejouée refusée, perdue: {e}")
+                perdues.append(action)
+                if self._transaction_lost():
+                    restantes = rejouees + restantes
+                    rejouees = []
+                    self.db._rollback()
+
+        self.lost += len(perdues)
+        self._actions = rejouees
+        self._pending = len(rejouees)
+        self._first_at = time.monotonic() if rejouees else None
+        return perdues
+
+    def _transaction_lost(self) -> bool:
+        """True si l'erreur précédente a annulé toute la transaction (ex: ROLLBACK d'un trigger)"""
+        try:
+            return self.db.cursor.execute("SELECT @@TRANCOUNT").fetchval() == 0
+        except pyodbc.Error:
+            return False
+
+    def _run(self, demande: dict):
+        """Exécute une demande (depuis le thread d'écriture)"""
+        if demande['action'] is not None:
+            try:
+                demande['resultat'] = demande['action']()
+                self.statements += 1
+                self._pending += 1
+                self._actions.append(demande['action'])
+                if self._first_at is None:
+                    self._first_at = time.monotonic()
+            except Exception as e:
+                demande['erreur'] = e
+                if isinstance(e, pyodbc.Error) and self._pending and self._transaction_lost():
+                    self.db._rollback()
+                    self._replay("Transaction du groupe annulée")
+
+        echu = self._first_at is not None and time.monotonic() - self._first_at >= self.max_delay
+        if demande['durable'] or self._pending >= self.max_statements or echu:
+            if not self._commit_group(demande['action']) and demande['durable'] and demande['erreur'] is None:
+                demande['erreur'] = pyodbc.Error("Échec de la validation groupée")
+
+    def _commit_loop(self):
+        """Boucle du thread d'écriture"""
+        try:
+            while True:
+                attente = None
+                if self._first_at is not None:
+                    attente = max(0.0, self._first_at + self.max_delay - time.monotonic())
+
+                try:
+                    demande = self._queue.get(timeout=attente)
+                except queue.Empty:
+                    self._commit_group()
+                    continue
+
+                if demande is None:
+                    self._commit_group()
+                    return
+
+                try:
+                    self._run(demande)
+                finally:
+                    demande['fait'].set()
+        finally:
+            # Demandes arrivées après l'arrêt: ne pas laisser l'appelant bloqué
+            while True:
+                try:
+                    demande = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if demande is not None:
+                    demande['erreur'] = pyodbc.Error("Validation groupée arrêtée")
+                    demande['fait'].set()
+            self.db.release_connection()
+
+
+# Types SQL fixes des paramètres préparés: (type ODBC, taille, décimales)
+SQL_DATETIME2 = (pyodbc.SQL_TYPE_TIMESTAMP, 27, 7)
+SQL_INT = (pyodbc.SQL_INTEGER, 0, 0)
+SQL_FLOAT = (pyodbc.SQL_FLOAT, 0, 0)
+SQL_VARBINARY_MAX = (pyodbc.SQL_VARBINARY, 0, 0)
+SQL_NVARCHAR_MAX = (pyodbc.SQL_WVARCHAR, 0, 0)
+
+
+def parse_byte_range(plage: str, taille: int) -> Tuple[int, int]:
+    """
+    Interprète une plage d'octets au format HTTP (en-tête Range)
+
+    Formats acceptés: "bytes=0-1023", "0-1023", "1024-" (jusqu'à la fin),
+    "-500" (les 500 derniers octets)
+
+    Args:
+        plage: Plage à interpréter
+        taille: Taille totale du contenu en octets
+
+    Returns:
+        (début, fin) en octets, fin incluse
+
+    Raises:
+        ValueError: Si la plage est mal formée ou hors du contenu
+    """
+    spec = plage.strip()
+    if spec.startswith("bytes="):
+        spec = spec[len("bytes="):]
+    if "," in spec or "-" not in spec:
+        raise ValueError(f"Plage invalide: '{plage}' (une seule plage 'début-fin' acceptée)")
+
+    debut_txt, fin_txt = (p.strip() for p in spec.split("-", 1))
+    if not debut_txt:
+        # Suffixe: les N derniers octets
+        n = int(fin_txt)
+        if n <= 0:
+            raise ValueError(f"Plage invalide: '{plage}'")
+        return max(0, taille - n), taille - 1
+
+    debut = int(debut_txt)
+    fin = int(fin_txt) if fin_txt else taille - 1
+    fin = min(fin, taille - 1)
+    if debut < 0 or debut > fin:
+        raise ValueError(f"Plage '{plage}' hors du contenu ({taille} octets)")
+    return debut, fin
+
+
+# Erreurs SQL Server levées par les déclencheurs (RAISERROR, transaction annulée dans le déclencheur)
+_CODES_REJET_DECLENCHEUR = ("(50000)", "(3609)")
+
+
+def erreur_permanente(erreur: Exception) -> bool:
+    """
+    Indique si une erreur SQL rejette la ligne elle-même (la rejouer échouera toujours)
+
+    Contrainte violée (clé étrangère, CHECK), donnée invalide ou trop longue, ou refus
+    d'un déclencheur. Les pertes de connexion et les délais dépassés sont passagers.
+
+    Args:
+        erreur: Exception levée par pyodbc
+
+    Returns:
+        True si l'erreur est permanente, False si un nouvel essai peut réussir
+    """
+    permanentes = tuple(getattr(pyodbc, nom) for nom in ("IntegrityError", "DataError")
+                        if hasattr(pyodbc, nom))
+    if permanentes and isinstance(erreur, permanentes):
+        return True
+    if isinstance(erreur, getattr(pyodbc, "ProgrammingError", ())):
+        return any(code in str(erreur) for code in _CODES_REJET_DECLENCHEUR)
+    return False
 
 
 class DatabaseConnection:
     """Gère la connexion à la base de données Prog3A25_bdSalleSense"""
 
+    # Taille des morceaux pour l'écriture/lecture des gros BLOB (vidéos)
+    BLOB_CHUNK_SIZE = 1024 * 1024
+
+    # Instructions chaudes: nom -> (texte fixe, types des paramètres)
+    # Les None sont liés avec le type déclaré (VARBINARY(MAX) pour photoBlob)
+    PREPARED_STATEMENTS = {
+        'donnee': (
+            "SET NOCOUNT ON; "
+            "DECLARE @ids TABLE (id INT); "
+            "INSERT INTO Donnees (dateHeure, idCapteur, mesure, photoBlob, noSalle) "
+            "OUTPUT INSERTED.idDonnee_PK INTO @ids "
+            "VALUES (?, ?, ?, ?, ?); "
+            "SELECT id FROM @ids;",
+            [SQL_DATETIME2, SQL_INT, SQL_FLOAT, SQL_VARBINARY_MAX, SQL_INT]
+        ),
+        'donnee_evenement': (
+            "SET NOCOUNT ON; "
+            "DECLARE @idsDonnee TABLE (id INT); "
+            "DECLARE @idsEvenement TABLE (id INT); "
+            "INSERT INTO Donnees (dateHeure, idCapteur, mesure, photoBlob, noSalle) "
+            "OUTPUT INSERTED.idDonnee_PK INTO @idsDonnee "
+            "VALUES (?, ?, ?, ?, ?); "
+            "INSERT INTO Evenement (type, idDonnee, description) "
+            "OUTPUT INSERTED.idEvenement_PK INTO @idsEvenement "
+            "SELECT ?, id, ? FROM @idsDonnee; "
+            "SELECT (SELECT id FROM @idsDonnee), (SELECT id FROM @idsEvenement);",
+            [SQL_DATETIME2, SQL_INT, SQL_FLOAT, SQL_VARBINARY_MAX, SQL_INT,
+             (pyodbc.SQL_WVARCHAR, 60, 0), SQL_NVARCHAR_MAX]
+        ),
+        'evenement_description': (
+            "UPDATE Evenement SET description = ? WHERE idEvenement_PK = ?",
+            [SQL_NVARCHAR_MAX, SQL_INT]
+        ),
+        'donnees_lot': (
+            BatchWriter.INSERT_DONNEES,
+            [SQL_DATETIME2, SQL_INT, SQL_FLOAT, SQL_INT]
+        ),
+        'resume': (
+            "INSERT INTO DonneesResume (dateDebut, dateFin, idCapteur, noSalle, nbMesures, "
+            "moyenne, minimum, maximum, leq, l10, l50, l90, bandes) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [SQL_DATETIME2, SQL_DATETIME2, SQL_INT, SQL_INT, SQL_INT,
+             SQL_FLOAT, SQL_FLOAT, SQL_FLOAT, SQL_FLOAT, SQL_FLOAT, SQL_FLOAT, SQL_FLOAT,
+             (pyodbc.SQL_WVARCHAR, 400, 0)]
+        ),
+    }
+
     def __init__(self, server: str, database: str = "Prog3A25_bdSalleSense",
-                 username: Optional[str] = None, password: Optional[str] = None):
+                 username: Optional[str] = None, password: Optional[str] = None,
+                 pool_min: int = 1, pool_max: int = 4, pool_idle_timeout: float = 300.0,
+                 verbose: bool = True, slow_query_ms: float = 500.0,
+                 slow_query_log: Optional[str] = None):
         """
         Initialise la connexion à la base de données
 
@@ -20,13 +749,147 @@ class DatabaseConnection:
             database: Nom de la base de données (défaut: Prog3A25_bdSalleSense)
             username: Nom d'utilisateur SQL (None pour Windows Authentication)
             password: Mot de passe SQL (None pour Windows Authentication)
+            pool_min: Connexions gardées ouvertes en permanence (défaut: 1)
+            pool_max: Connexions simultanées maximales, une par thread actif (défaut: 4)
+            pool_idle_timeout: Secondes avant fermeture d'une connexion inactive en trop (défaut: 300)
+            verbose: Afficher les requêtes réussies et les requêtes lentes (défaut: True)
+            slow_query_ms: Durée (ms) à partir de laquelle une requête est journalisée comme lente (défaut: 500)
+            slow_query_log: Fichier journal des requêtes lentes (optionnel)
         """
         self.server = server
         self.database = database
         self.username = username
         self.password = password
-        self.connection = None
-        self.cursor = None
+        self.pool_min = pool_min
+        self.pool_max = pool_max
+        self.pool_idle_timeout = pool_idle_timeout
+        self.pool = None
+        self._batch_writers = []
+        self.prepared_statements = dict(self.PREPARED_STATEMENTS)
+        self._group_commit = None
+        self.verbose = verbose
+        self.query_stats = QueryStats(seuil_lent_ms=slow_query_ms, journal_lent=slow_query_log,
+                                      verbose=verbose)
+        self._dernier_echec = threading.local()
+
+    def derniere_erreur(self) -> Optional[Exception]:
+        """
+        Dernière erreur SQL interceptée par une écriture du thread courant
+        (execute_many_prepared, insert_donnee, insert_donnee_evenement, insert_resume)
+
+        Returns:
+            Exception pyodbc, ou None si aucune écriture n'a échoué
+        """
+        return getattr(self._dernier_echec, 'erreur', None)
+
+    @property
+    def connection(self) -> Optional[pyodbc.Connection]:
+        """Connexion réservée au thread courant (empruntée au pool au premier accès)"""
+        if self.pool is None:
+            return None
+        return self.pool.checkout()[0]
+
+    @property
+    def cursor(self) -> Optional[pyodbc.Cursor]:
+        """Curseur réservé au thread courant (emprunté au pool au premier accès)"""
+        if self.pool is None:
+            return None
+        return self.pool.checkout()[1]
+
+    def release_connection(self):
+        """
+        Rend au pool la connexion du thread courant
+
+        À appeler à la fin des threads secondaires (ex: enregistrement vidéo);
+        sinon la connexion est récupérée automatiquement à la fin du thread.
+        """
+        if self.pool is not None:
+            self.pool.release()
+
+    def stats(self) -> dict:
+        """
+        Instantané de l'instrumentation: latences par requête normalisée,
+        lignes et octets transférés, requêtes lentes et état du pool
+
+        Returns:
+            Dictionnaire {'requetes': ..., 'pool': ...} (voir QueryStats.snapshot)
+        """
+        return {
+            'requetes': self.query_stats.snapshot(),
+            'pool': self.pool.stats() if self.pool else None,
+        }
+
+    @contextmanager
+    def _instrument(self, query: str, params=None):
+        """Mesure la durée d'un appel et l'enregistre dans query_stats"""
+        mesure = {'lignes': 0, 'octets': payload_size(params)}
+        erreur = False
+        debut = time.perf_counter()
+        try:
+            yield mesure
+        except Exception:
+            erreur = True
+            raise
+        finally:
+            self.query_stats.record(query, time.perf_counter() - debut,
+                                    mesure['lignes'], mesure['octets'], erreur)
+
+    def _write(self, action, durable: bool = True):
+        """
+        Exécute une écriture puis la valide, directement ou par le groupe en cours
+
+        Args:
+            action: Fonction sans argument qui écrit (sans commit) et retourne un résultat
+            durable: Valider avant de rendre la main même en validation groupée
+
+        Returns:
+            Résultat de action
+
+        Raises:
+            pyodbc.Error: En cas d'erreur (l'écriture est annulée)
+        """
+        if self._group_commit is not None:
+            return self._group_commit.submit(action, durable)
+
+        try:
+            resultat = action()
+            self.connection.commit()
+            return resultat
+        except pyodbc.Error:
+            self._rollback()
+            raise
+
+    def _rollback(self):
+        """Annule la transaction en cours du thread courant, s'il a une connexion"""
+        courant = self.pool.current() if self.pool else None
+        if courant is None:
+            return
+        try:
+            courant[0].rollback()
+        except pyodbc.Error:
+            pass
+
+    def _connection_string(self) -> str:
+        """Construit la chaîne de connexion ODBC"""
+        if self.username and self.password:
+            # Authentification SQL Server
+            return (
+                f"DRIVER={{ODBC Driver 18 for SQL Server}};"
+                f"SERVER={self.server};"
+                f"DATABASE={self.database};"
+                f"UID={self.username};"
+                f"PWD={self.password};"
+                f"TrustServerCertificate=yes;"
+            )
+
+        # Authentification Windows
+        return (
+            f"DRIVER={{ODBC Driver 18 for SQL Server}};"
+            f"SERVER={self.server};"
+            f"DATABASE={self.database};"
+            f"Trusted_Connection=yes;"
+            f"TrustServerCertificate=yes;"
+        )
 
     def connect(self) -> bool:
         """
@@ -36,41 +899,87 @@ class DatabaseConnection:
             True si la connexion réussit, False sinon
         """
         try:
-            if self.username and self.password:
-                # Authentification SQL Server
-                connection_string = (
-                    f"DRIVER={{ODBC Driver 18 for SQL Server}};"
-                    f"SERVER={self.server};"
-                    f"DATABASE={self.database};"
-                    f"UID={self.username};"
-                    f"PWD={self.password};"
-                    f"TrustServerCertificate=yes;"
-                )
-            else:
-                # Authentification Windows
-                connection_string = (
-                    f"DRIVER={{ODBC Driver 18 for SQL Server}};"
-                    f"SERVER={self.server};"
-                    f"DATABASE={self.database};"
-                    f"Trusted_Connection=yes;"
-                    f"TrustServerCertificate=yes;"
-                )
-
-            self.connection = pyodbc.connect(connection_string)
-            self.cursor = self.connection.cursor()
+            self.pool = ConnectionPool(
+                self._connection_string(),
+                min_size=self.pool_min,
+                max_size=self.pool_max,
+                idle_timeout=self.pool_idle_timeout
+            )
+            self.pool.open()
+            # Valide la connexion pour le thread principal
+            self.pool.checkout()
             print(f"✓ Connexion établie à la base de données '{self.database}'")
             return True
 
         except pyodbc.Error as e:
             print(f"✗ Erreur de connexion: {e}")
+            if self.pool is not None:
+                self.pool.close()
+                self.pool = None
             return False
 
+    def batch_writer(self, max_rows: int = 50, max_delay: float = 5.0) -> BatchWriter:
+        """
+        Crée un tampon d'insertions groupées dans Donnees
+
+        Args:
+            max_rows: Nombre de lignes déclenchant l'écriture du lot (défaut: 50)
+            max_delay: Attente maximale en secondes d'une ligne dans le tampon (défaut: 5)
+
+        Returns:
+            BatchWriter rattaché à cette connexion (vidé par flush_batches() et disconnect())
+        """
+        writer = BatchWriter(self, max_rows=max_rows, max_delay=max_delay)
+        self._batch_writers.append(writer)
+        return writer
+
+    def enable_group_commit(self, max_statements: int = 50, max_delay_ms: float = 1000.0) -> GroupCommitter:
+        """
+        Active la validation groupée pour execute_non_query et insert_donnee:
+        les écritures non durables sont validées ensemble toutes les
+        max_statements écritures ou max_delay_ms millisecondes
+
+        Args:
+            max_statements: Écritures déclenchant la validation (défaut: 50)
+            max_delay_ms: Attente maximale en ms d'une écriture non validée (défaut: 1000)
+
+        Returns:
+            Le GroupCommitter actif (compteurs statements, commits, lost)
+        """
+        self.disable_group_commit()
+        self._group_commit = GroupCommitter(self, max_statements, max_delay_ms / 1000.0)
+        return self._group_commit
+
+    def disable_group_commit(self):
+        """Valide les écritures en attente et revient à un commit par écriture"""
+        if self._group_commit is not None:
+            self._group_commit.close()
+            self._group_commit = None
+
+    def flush_batches(self) -> int:
+        """
+        Vide tous les tampons d'insertion et valide le groupe en cours
+        (à appeler dans cleanup())
+
+        Returns:
+            Nombre total de lignes écrites par les tampons
+        """
+        total = sum(writer.flush() for writer in self._batch_writers)
+        if self._group_commit is not None:
+            self._group_commit.commit()
+        return total
+
     def disconnect(self):
         """Ferme la connexion à la base de données"""
-        if self.cursor:
-            self.cursor.close()
-        if self.connection:
-            self.connection.close()
+        self.disable_group_commit()
+
+        for writer in self._batch_writers:
+            writer.close()
+        self._batch_writers = []
+
+        if self.pool:
+            self.pool.close()
+            self.pool = None
             print("✓ Connexion fermée")
 
     def execute_query(self, query: str, params: Optional[tuple] = None) -> list:
@@ -85,44 +994,584 @@ class DatabaseConnection:
             Liste des résultats
         """
         try:
-            if params:
-                self.cursor.execute(query, params)
-            else:
-                self.cursor.execute(query)
+            with self._instrument(query, params) as mesure:
+                if params:
+                    self.cursor.execute(query, params)
+                else:
+                    self.cursor.execute(query)
+
+                results = self.cursor.fetchall()
+                mesure['lignes'] = len(results)
+                mesure['octets'] += sum(payload_size(row) for row in results)
 
-            results = self.cursor.fetchall()
             return results
 
         except pyodbc.Error as e:
             print(f"✗ Erreur lors de l'exécution de la requête: {e}")
             return []
 
-    def execute_non_query(self, query: str, params: Optional[tuple] = None) -> bool:
+    def iter_query(self, query: str, params: Optional[tuple] = None,
+                   arraysize: int = 50) -> Iterator[pyodbc.Row]:
+        """
+        Exécute une requête SELECT et retourne ses lignes au fil de l'eau
+        (fetchmany par paquets de arraysize) au lieu de tout charger avec fetchall()
+
+        Le curseur est dédié à l'itération: d'autres requêtes peuvent être
+        exécutées pendant le parcours. Utiliser un petit arraysize pour les
+        lignes contenant des BLOB.
+
+        Args:
+            query: Requête SQL à exécuter
+            params: Paramètres de la requête (optionnel)
+            arraysize: Nombre de lignes rapatriées par aller-retour (défaut: 50)
+
+        Yields:
+            Lignes du résultat, une à la fois
+        """
+        # Seuls execute et les fetchmany sont chronométrés, pas le traitement des
+        # lignes par l'appelant entre deux paquets; la mesure est enregistrée à la fin
+        mesure = {'lignes': 0, 'octets': payload_size(params)}
+        duree = 0.0
+        erreur = False
+        cursor = None
+        debut = time.perf_counter()
+        try:
+            cursor = self.connection.cursor()
+            cursor.arraysize = arraysize
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+
+            while True:
+                rows = cursor.fetchmany(arraysize)
+                duree += time.perf_counter() - debut
+                debut = None
+                if not rows:
+                    break
+                mesure['lignes'] += len(rows)
+                mesure['octets'] += sum(payload_size(row) for row in rows)
+                yield from rows
+                debut = time.perf_counter()
+
+        except pyodbc.Error as e:
+            erreur = True
+            print(f"✗ Erreur lors de l'exécution de la requête: {e}")
+
+        finally:
+            if debut is not None:
+                duree += time.perf_counter() - debut
+            if cursor is not None:
+                cursor.close()
+            self.query_stats.record(query, duree, mesure['lignes'], mesure['octets'], erreur)
+
+    def execute_non_query(self, query: str, params: Optional[tuple] = None,
+                          durable: bool = False) -> bool:
         """
         Exécute une requête INSERT, UPDATE ou DELETE
 
         Args:
             query: Requête SQL à exécuter
             params: Paramètres de la requête (optionnel)
+            durable: Valider immédiatement même en validation groupée (défaut: False)
 
         Returns:
             True si succès, False sinon
         """
-        try:
+        def executer():
+            cursor = self.cursor
             if params:
-                self.cursor.execute(query, params)
+                cursor.execute(query, params)
             else:
-                self.cursor.execute(query)
+                cursor.execute(query)
+            return max(cursor.rowcount, 0)
 
-            self.connection.commit()
-            print(f"✓ Requête exécutée avec succès ({self.cursor.rowcount} ligne(s) affectée(s))")
+        try:
+            with self._instrument(query, params) as mesure:
+                mesure['lignes'] = self._write(executer, durable)
+
+            invalidate_for_statement(self, query)
+            if self.verbose:
+                print(f"✓ Requête exécutée avec succès ({mesure['lignes']} ligne(s) affectée(s))")
             return True
 
         except pyodbc.Error as e:
             print(f"✗ Erreur lors de l'exécution de la requête: {e}")
-            self.connection.rollback()
             return False
 
+    @staticmethod
+    def _insert_output_sql(table: str, valeurs: dict, id_colonne: str, table_ids: str) -> Tuple[str, list]:
+        """
+        Construit un INSERT dont l'ID généré est capturé par OUTPUT ... INTO
+
+        OUTPUT sans INTO est refusé par SQL Server sur une table munie d'un
+        trigger (c'est le cas de Donnees): l'ID passe donc par une variable table.
+        Les valeurs None sont écrites en NULL littéral, car pyodbc lie None en
+        VARCHAR, type non convertible implicitement en VARBINARY.
+
+        Returns:
+            (fragment SQL, paramètres)
+        """
+        colonnes = ", ".join(valeurs)
+        marqueurs = ", ".join("NULL" if v is None else "?" for v in valeurs.values())
+        params = [v for v in valeurs.values() if v is not None]
+        sql = (f"INSERT INTO {table} ({colonnes}) "
+               f"OUTPUT INSERTED.{id_colonne} INTO {table_ids} "
+               f"VALUES ({marqueurs});")
+        return sql, params
+
+    def insert_returning_id(self, table: str, valeurs: dict,
+                            id_colonne: str = "idDonnee_PK") -> Optional[int]:
+        """
+        Insère une ligne et retourne son ID en un seul aller-retour
+        (OUTPUT INSERTED, sans SELECT @@IDENTITY séparé)
+
+        Args:
+            table: Table cible (ex: 'Donnees')
+            valeurs: Dictionnaire {colonne: valeur}
+            id_colonne: Colonne IDENTITY à retourner (défaut: idDonnee_PK)
+
+        Returns:
+            ID de la ligne insérée, ou None si erreur
+        """
+        insert_sql, params = self._insert_output_sql(table, valeurs, id_colonne, "@ids")
+        try:
+            with self._instrument(insert_sql, params) as mesure:
+                id_insere = self.cursor.execute(
+                    "SET NOCOUNT ON; "
+                    "DECLARE @ids TABLE (id INT); "
+                    + insert_sql +
+                    " SELECT id FROM @ids;",
+                    params
+                ).fetchval()
+
+                self.connection.commit()
+                mesure['lignes'] = 1
+
+            invalidate_for_statement(self, insert_sql)
+            return int(id_insere)
+
+        except pyodbc.Error as e:
+            print(f"✗ Erreur lors de l'insertion dans {table}: {e}")
+            self._rollback()
+            return None
+
+    def prepare_statement(self, nom: str, sql: str, input_sizes: list):
+        """
+        Ajoute une instruction au registre des instructions préparées
+        (à faire avant sa première exécution)
+
+        Args:
+            nom: Nom de l'instruction
+            sql: Texte fixe de l'instruction
+            input_sizes: Types des paramètres, [(type ODBC, taille, décimales), ...]
+        """
+        self.prepared_statements[nom] = (sql, list(input_sizes))
+
+    def execute_prepared(self, nom: str, params) -> pyodbc.Cursor:
+        """
+        Exécute une instruction du registre sur son curseur dédié (sans commit)
+
+        Le curseur garde le même texte et les mêmes types d'un appel à l'autre:
+        pyodbc réutilise alors l'instruction préparée au lieu de la recompiler,
+        et ne déduit plus le type SQL de chaque paramètre.
+
+        Args:
+            nom: Nom de l'instruction (voir PREPARED_STATEMENTS)
+            params: Paramètres dans l'ordre des '?'
+
+        Returns:
+            Curseur dédié, positionné sur le résultat éventuel
+
+        Raises:
+            pyodbc.Error: En cas d'erreur SQL
+        """
+        sql, cursor = self._prepared_cursor(nom)
+        return cursor.execute(sql, params)
+
+    def execute_many_prepared(self, nom: str, rows: list) -> bool:
+        """
+        Exécute une instruction du registre pour plusieurs lignes
+        (fast_executemany, une seule transaction)
+
+        Args:
+            nom: Nom de l'instruction (voir PREPARED_STATEMENTS)
+            rows: Liste de tuples de paramètres
+
+        Returns:
+            True si succès, False sinon (rien n'est écrit)
+        """
+        if not rows:
+            return True
+
+        try:
+            with self._instrument(self.prepared_statements[nom][0]) as mesure:
+                sql, cursor = self._prepared_cursor(nom)
+                cursor.executemany(sql, rows)
+                self.connection.commit()
+                mesure['lignes'] = len(rows)
+                mesure['octets'] = sum(payload_size(row) for row in rows)
+
+            return True
+
+        except pyodbc.Error as e:
+            print(f"✗ Erreur lors de l'écriture du lot ({len(rows)} ligne(s)): {e}")
+            self._dernier_echec.erreur = e
+            self._rollback()
+            return False
+
+    def _prepared_cursor(self, nom: str) -> Tuple[str, pyodbc.Cursor]:
+        """Texte et curseur dédié (thread courant) d'une instruction du registre"""
+        sql, input_sizes = self.prepared_statements[nom]
+
+        def preparer(connection):
+            cursor = connection.cursor()
+            cursor.fast_executemany = True
+            cursor.setinputsizes(input_sizes)
+            return cursor
+
+        return sql, self.pool.statement_cursor(nom, preparer)
+
+    def insert_donnee(self, id_capteur: int, id_salle: int, mesure: Optional[float] = None,
+                      photo_blob: Optional[bytes] = None,
+                      date_heure: Optional[datetime] = None, durable: bool = False) -> Optional[int]:
+        """
+        Insère une Donnee par l'instruction préparée 'donnee'
+
+        Args:
+            id_capteur: ID du capteur
+            id_salle: ID de la salle
+            mesure: Valeur mesurée (optionnel)
+            photo_blob: Photo ou vidéo (optionnel)
+            date_heure: Horodatage (défaut: maintenant)
+            durable: Valider immédiatement même en validation groupée (défaut: False)
+
+        Returns:
+            ID de la donnée insérée, ou None si erreur
+        """
+        params = (date_heure or datetime.now(), id_capteur, mesure, photo_blob, id_salle)
+        try:
+            with self._instrument(self.prepared_statements['donnee'][0], params) as resultat:
+                id_donnee = self._write(
+                    lambda: int(self.execute_prepared('donnee', params).fetchval()), durable
+                )
+                resultat['lignes'] = 1
+
+            return id_donnee
+
+        except pyodbc.Error as e:
+            print(f"✗ Erreur lors de l'insertion dans Donnees: {e}")
+            self._dernier_echec.erreur = e
+            return None
+
+    def insert_donnee_evenement(self, id_capteur: int, id_salle: int,
+                                type_evenement: str, description: str,
+                                mesure: Optional[float] = None,
+                                photo_blob: Optional[bytes] = None,
+                                date_heure: Optional[datetime] = None) -> Optional[Tuple[int, int]]:
+        """
+        Insère une Donnee et l'Evenement qui la référence en un seul lot,
+        dans une seule transaction
+
+        Args:
+            id_capteur: ID du capteur
+            id_salle: ID de la salle
+            type_evenement: Type d'événement (BRUIT_FORT, CAPTURE, etc.)
+            description: Description de l'événement
+            mesure: Valeur mesurée (optionnel)
+            photo_blob: Photo ou vidéo (optionnel)
+            date_heure: Horodatage (défaut: maintenant)
+
+        Returns:
+            (idDonnee, idEvenement), ou None si erreur (rien n'est inséré)
+        """
+        params = (date_heure or datetime.now(), id_capteur, mesure, photo_blob, id_salle,
+                  type_evenement, description)
+        try:
+            with self._instrument(self.prepared_statements['donnee_evenement'][0], params) as resultat:
+                ids = self.execute_prepared('donnee_evenement', params).fetchone()
+                self.connection.commit()
+                resultat['lignes'] = 2
+
+            return int(ids[0]), int(ids[1])
+
+        except pyodbc.Error as e:
+            print(f"✗ Erreur lors de l'insertion donnée + événement: {e}")
+            self._dernier_echec.erreur = e
+            self._rollback()
+            return None
+
+    def update_evenement(self, id_evenement: int, description: str, durable: bool = False) -> bool:
+        """
+        Met à jour la description d'un Evenement (épisode de bruit fort en cours)
+
+        Args:
+            id_evenement: ID de l'événement
+            description: Nouvelle description
+            durable: Valider immédiatement même en validation groupée (défaut: False)
+
+        Returns:
+            True si succès, False sinon
+        """
+        params = (description, id_evenement)
+        try:
+            with self._instrument(self.prepared_statements['evenement_description'][0], params) as resultat:
+                resultat['lignes'] = self._write(
+                    lambda: self.execute_prepared('evenement_description', params).rowcount, durable
+                )
+
+            return True
+
+        except pyodbc.Error as e:
+            print(f"✗ Erreur lors de la mise à jour de l'événement: {e}")
+            return False
+
+    def insert_resume(self, resume: dict, durable: bool = False) -> bool:
+        """
+        Insère le résumé d'une fenêtre de mesures dans DonneesResume
+
+        Args:
+            resume: Dictionnaire produit par AgregateurFenetres (id_capteur, id_salle,
+                    date_debut, date_fin, nb_mesures, moyenne, minimum, maximum,
+                    leq, l10, l50, l90, bandes optionnel)
+            durable: Valider immédiatement même en validation groupée (défaut: False)
+
+        Returns:
+            True si succès, False sinon
+        """
+        params = (resume['date_debut'], resume['date_fin'], resume['id_capteur'], resume['id_salle'],
+                  resume['nb_mesures'], resume['moyenne'], resume['minimum'], resume['maximum'],
+                  resume.get('leq'), resume.get('l10'), resume.get('l50'), resume.get('l90'),
+                  resume.get('bandes'))
+        try:
+            with self._instrument(self.prepared_statements['resume'][0], params) as resultat:
+                self._write(lambda: self.execute_prepared('resume', params), durable)
+                resultat['lignes'] = 1
+
+            return True
+
+        except pyodbc.Error as e:
+            print(f"✗ Erreur lors de l'insertion dans DonneesResume: {e}")
+            self._dernier_echec.erreur = e
+            return False
+
+    def execute_many(self, query: str, rows: list) -> bool:
+        """
+        Exécute une même requête pour plusieurs lignes en un seul envoi
+        (fast_executemany) et une seule transaction
+
+        Args:
+            query: Requête SQL paramétrée
+            rows: Liste de tuples de paramètres
+
+        Returns:
+            True si succès, False sinon (rien n'est écrit)
+        """
+        if not rows:
+            return True
+
+        cursor = None
+        try:
+            with self._instrument(query) as mesure:
+                connection = self.connection
+                cursor = connection.cursor()
+                cursor.fast_executemany = True
+                cursor.executemany(query, rows)
+                connection.commit()
+                mesure['lignes'] = len(rows)
+                mesure['octets'] = sum(payload_size(row) for row in rows)
+
+            return True
+
+        except pyodbc.Error as e:
+            print(f"✗ Erreur lors de l'écriture du lot ({len(rows)} ligne(s)): {e}")
+            self._rollback()
+            return False
+
+        finally:
+            if cursor is not None:
+                cursor.close()
+
+    def insert_blob_chunked(self, id_capteur: int, id_salle: int, source: BinaryIO,
+                            type_evenement: Optional[str] = None,
+                            description: Optional[str] = None,
+                            date_heure: Optional[datetime] = None,
+                            chunk_size: Optional[int] = None) -> Optional[Tuple[int, Optional[int]]]:
+        """
+        Insère une Donnee dont le BLOB est envoyé par morceaux (photoBlob.WRITE)
+        au lieu d'un seul paramètre: la mémoire utilisée reste celle d'un morceau
+
+        La ligne est créée avec un BLOB vide (0x, non NULL pour le trigger des
+        capteurs CAMERA), complétée morceau par morceau, puis l'événement éventuel
+        est ajouté; le tout dans une seule transaction.
+
+        Args:
+            id_capteur: ID du capteur
+            id_salle: ID de la salle
+            source: Fichier ouvert en binaire (ou tout objet avec read(n))
+            type_evenement: Type de l'événement à créer (optionnel)
+            description: Description de l'événement (optionnel)
+            date_heure: Horodatage (défaut: maintenant)
+            chunk_size: Taille des morceaux en octets (défaut: BLOB_CHUNK_SIZE)
+
+        Returns:
+            (idDonnee, idEvenement ou None), ou None si erreur (rien n'est inséré)
+        """
+        chunk_size = chunk_size or self.BLOB_CHUNK_SIZE
+        try:
+            with self._instrument("INSERT INTO Donnees photoBlob.WRITE (morceaux)") as mesure:
+                cursor = self.cursor
+                id_donnee = int(cursor.execute(
+                    "SET NOCOUNT ON; "
+                    "DECLARE @ids TABLE (id INT); "
+                    "INSERT INTO Donnees (dateHeure, idCapteur, mesure, photoBlob, noSalle) "
+                    "OUTPUT INSERTED.idDonnee_PK INTO @ids "
+                    "VALUES (?, ?, NULL, 0x, ?); "
+                    "SELECT id FROM @ids;",
+                    (date_heure or datetime.now(), id_capteur, id_salle)
+                ).fetchval())
+
+                mesure['octets'] = self._append_blob_chunks(cursor, id_donnee, source, chunk_size)
+                mesure['lignes'] = 1
+
+                id_evenement = None
+                if type_evenement:
+                    id_evenement = int(cursor.execute(
+                        "SET NOCOUNT ON; "
+                        "DECLARE @ids TABLE (id INT); "
+                        "INSERT INTO Evenement (type, idDonnee, description) "
+                        "OUTPUT INSERTED.idEvenement_PK INTO @ids "
+                        "VALUES (?, ?, ?); "
+                        "SELECT id FROM @ids;",
+                        (type_evenement, id_donnee, description)
+                    ).fetchval())
+                    mesure['lignes'] = 2
+
+                self.connection.commit()
+
+            return id_donnee, id_evenement
+
+        except pyodbc.Error as e:
+            print(f"✗ Erreur lors de l'envoi du BLOB par morceaux: {e}")
+            self._rollback()
+            return None
+
+    def append_blob(self, id_donnee: int, source: BinaryIO,
+                    chunk_size: Optional[int] = None) -> int:
+        """
+        Ajoute le contenu de source à la fin du BLOB d'une Donnee existante
+
+        Args:
+            id_donnee: ID de la donnée
+            source: Fichier ouvert en binaire (ou tout objet avec read(n))
+            chunk_size: Taille des morceaux en octets (défaut: BLOB_CHUNK_SIZE)
+
+        Returns:
+            Nombre d'octets ajoutés, ou -1 si erreur (rien n'est ajouté)
+        """
+        try:
+            with self._instrument("UPDATE Donnees photoBlob.WRITE (morceaux)") as mesure:
+                cursor = self.cursor
+                # .WRITE est refusé sur un BLOB NULL: partir d'un BLOB vide
+                cursor.execute(
+                    "UPDATE Donnees SET photoBlob = 0x WHERE idDonnee_PK = ? AND photoBlob IS NULL",
+                    (id_donnee,)
+                )
+                total = self._append_blob_chunks(cursor, id_donnee, source,
+                                                 chunk_size or self.BLOB_CHUNK_SIZE)
+                self.connection.commit()
+                mesure['lignes'] = 1
+                mesure['octets'] = total
+
+            return total
+
+        except pyodbc.Error as e:
+            print(f"✗ Erreur lors de l'ajout au BLOB {id_donnee}: {e}")
+            self._rollback()
+            return -1
+
+    @staticmethod
+    def _append_blob_chunks(cursor, id_donnee: int, source: BinaryIO, chunk_size: int) -> int:
+        """Envoie source morceau par morceau à la fin du BLOB (sans commit)"""
+        total = 0
+        while True:
+            morceau = source.read(chunk_size)
+            if not morceau:
+                return total
+            # Décalage NULL: ajout à la fin de la valeur existante
+            cursor.execute(
+                "UPDATE Donnees SET photoBlob.WRITE(?, NULL, NULL) WHERE idDonnee_PK = ?",
+                (morceau, id_donnee)
+            )
+            total += len(morceau)
+
+    def blob_length(self, id_donnee: int) -> Optional[int]:
+        """
+        Retourne la taille du BLOB d'une Donnee
+
+        Args:
+            id_donnee: ID de la donnée
+
+        Returns:
+            Taille en octets, ou None si la donnée n'existe pas ou n'a pas de BLOB
+        """
+        result = self.execute_query(
+            "SELECT DATALENGTH(photoBlob) FROM Donnees WHERE idDonnee_PK = ?",
+            (id_donnee,)
+        )
+        if not result or result[0][0] is None:
+            return None
+        return int(result[0][0])
+
+    def read_blob_range(self, id_donnee: int, debut: int, longueur: int) -> Optional[bytes]:
+        """
+        Lit une plage d'octets d'un BLOB (SUBSTRING côté serveur)
+
+        Args:
+            id_donnee: ID de la donnée
+            debut: Position du premier octet (à partir de 0)
+            longueur: Nombre d'octets à lire
+
+        Returns:
+            Octets lus (éventuellement moins en fin de BLOB), ou None si erreur
+        """
+        result = self.execute_query(
+            "SELECT SUBSTRING(photoBlob, ?, ?) FROM Donnees WHERE idDonnee_PK = ?",
+            (debut + 1, longueur, id_donnee)
+        )
+        if not result or result[0][0] is None:
+            return None
+        return bytes(result[0][0])
+
+    def iter_blob_chunks(self, id_donnee: int, debut: int = 0, fin: Optional[int] = None,
+                         chunk_size: Optional[int] = None) -> Iterator[bytes]:
+        """
+        Lit un BLOB morceau par morceau, éventuellement restreint à une plage
+
+        Args:
+            id_donnee: ID de la donnée
+            debut: Premier octet à lire (défaut: 0)
+            fin: Dernier octet à lire, inclus (défaut: fin du BLOB)
+            chunk_size: Taille des morceaux en octets (défaut: BLOB_CHUNK_SIZE)
+
+        Yields:
+            Morceaux successifs du BLOB
+        """
+        chunk_size = chunk_size or self.BLOB_CHUNK_SIZE
+        if fin is None:
+            taille = self.blob_length(id_donnee)
+            if taille is None:
+                return
+            fin = taille - 1
+
+        position = debut
+        while position <= fin:
+            morceau = self.read_blob_range(id_donnee, position, min(chunk_size, fin - position + 1))
+            if not morceau:
+                return
+            yield morceau
+            position += len(morceau)
+
     def create_user(self, pseudo: str, courriel: str, mot_de_passe: str) -> int:
         """
         Crée un nouvel utilisateur via la procédure stockée
@@ -155,7 +1604,7 @@ class DatabaseConnection:
 
         except pyodbc.Error as e:
             print(f"✗ Erreur lors de la création de l'utilisateur: {e}")
-            self.connection.rollback()
+            self._rollback()
             return -1
 
     def login_user(self, courriel: str, mot_de_passe: str) -> int:
@@ -257,6 +1706,10 @@ if __name__ == "__main__":
         for salle in salles:
             print(f"ID: {salle[0]}, Numéro: {salle[1]}, Capacité: {salle[2]}")
 
+        # Statistiques des requêtes exécutées
+        print("\n--- Statistiques des requêtes ---")
+        print(db.query_stats.report())
+
     print("\n=== Test des fonctions d'authentification ===")
     # Option 2: Connexion manuelle
     db = DatabaseConnection(SERVER, DATABASE, USERNAME, PASSWORD)
@@ -0,0 +1,779 @@
+"""
+Base SalleSense hors ligne sur SQLite
+Même interface que DatabaseConnection (pool par thread, lots, BLOB par morceaux,
+statistiques), sans le serveur SQL Server de l'école: les tables sont créées
+à partir de Script_bd/creationTables.sql et les constructions T-SQL utilisées
+par le projet sont émulées (TOP, GETDATE(), @@IDENTITY, @@TRANCOUNT, OUTPUT ... INTO,
+variables DECLARE, DATALENGTH, SUBSTRING, DATEDIFF(second, ...), .WRITE, 0x...,
+N'...', procédures
+usp_Utilisateur_Create / usp_Utilisateur_Login).
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Optional, Tuple
+
+import pyodbc
+
+from db_connection import DatabaseConnection
+
+# Script de création des tables (le même que pour SQL Server)
+SCHEMA_SQL = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "..", "Script_bd", "creationTables.sql")
+
+# Équivalent SQLite de trg_check_donnees_capteur (Script_bd/Trigger.sql)
+_VERIFICATIONS_DONNEES = """
+    SELECT RAISE(ABORT, 'Un capteur MOUVEMENT ne peut pas avoir de mesure ou de photo')
+    WHERE (SELECT type FROM Capteur WHERE idCapteur_PK = NEW.idCapteur) = 'MOUVEMENT'
+      AND (NEW.mesure IS NOT NULL OR NEW.photoBlob IS NOT NULL);
+    SELECT RAISE(ABORT, 'Un capteur BRUIT doit avoir une mesure et pas de photo')
+    WHERE (SELECT type FROM Capteur WHERE idCapteur_PK = NEW.idCapteur) = 'BRUIT'
+      AND (NEW.mesure IS NULL OR NEW.photoBlob IS NOT NULL);
+    SELECT RAISE(ABORT, 'Un capteur CAMERA doit avoir une photo (BLOB) et pas de mesure')
+    WHERE (SELECT type FROM Capteur WHERE idCapteur_PK = NEW.idCapteur) = 'CAMERA'
+      AND (NEW.photoBlob IS NULL OR NEW.mesure IS NOT NULL);
+    SELECT RAISE(ABORT, 'La mesure de bruit doit être entre 0 et 120 dB')
+    WHERE (SELECT type FROM Capteur WHERE idCapteur_PK = NEW.idCapteur) = 'BRUIT'
+      AND (NEW.mesure < 0 OR NEW.mesure > 120);
+"""
+
+_RE_LITTERAL = re.compile(r"'(?:[^']|'')*'")
+_RE_MASQUE = re.compile(r"\x00(\d+)\x00")
+_RE_DATE_HEURE = re.compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(\.\d{1,6})?$")
+_RE_TOP = re.compile(r"\bSELECT\s+(DISTINCT\s+)?TOP\s*(?:\(\s*(\d+)\s*\)|(\d+))\s+", re.IGNORECASE)
+_RE_VARIABLE = re.compile(r"(?<![@\w])@(\w+)")
+_RE_OUTPUT = re.compile(
+    r"\bOUTPUT\s+(INSERTED\.\w+(?:\s*,\s*INSERTED\.\w+)*)(?:\s+INTO\s+@(\w+))?\s*",
+    re.IGNORECASE
+)
+_RE_INSERT = re.compile(r"^\s*INSERT\s+(?:INTO\s+)?([\w\[\].]+)", re.IGNORECASE)
+_RE_DECLARE_TABLE = re.compile(r"^\s*DECLARE\s+@(\w+)\s+TABLE\s*(\(.*\))\s*$", re.IGNORECASE | re.DOTALL)
+_RE_DECLARE = re.compile(r"^\s*DECLARE\s+@(\w+)\s+[\w()\s,]+?(?:=\s*(.+))?$", re.IGNORECASE | re.DOTALL)
+_RE_SET_VARIABLE = re.compile(r"^\s*SET\s+@(\w+)\s*=\s*(.+)$", re.IGNORECASE | re.DOTALL)
+_RE_EXEC = re.compile(r"^\s*EXEC(?:UTE)?\s+(?:dbo\.)?(\w+)\s*(.*)$", re.IGNORECASE | re.DOTALL)
+_RE_ARGUMENT = re.compile(r"^\s*@(\w+)\s*=\s*(.+?)(\s+OUT(?:PUT)?)?\s*$", re.IGNORECASE | re.DOTALL)
+
+_REMPLACEMENTS = [
+    (re.compile(r"\bdbo\.", re.IGNORECASE), ""),
+    (re.compile(r"@@IDENTITY|\bSCOPE_IDENTITY\s*\(\s*\)", re.IGNORECASE), "LAST_IDENTITY()"),
+    (re.compile(r"@@TRANCOUNT", re.IGNORECASE), "TRANCOUNT()"),
+    (re.compile(r"\bISNULL\s*\(", re.IGNORECASE), "IFNULL("),
+    (re.compile(r"\bLEN\s*\(", re.IGNORECASE), "LENGTH("),
+    (re.compile(r"\bDATEDIFF\s*\(\s*SECOND\s*,", re.IGNORECASE), "DATEDIFF_SECONDES("),
+    (re.compile(r"\bAS\s+N?VARCHAR\b(?:\s*\(\s*(?:\d+|MAX)\s*\))?", re.IGNORECASE), "AS TEXT"),
+    (re.compile(r"\bN(\x00\d+\x00)"), r"\1"),
+    (re.compile(r"(?<![\w.])0x([0-9A-Fa-f]*)\b"), r"X'\1'"),
+    (re.compile(r"(\w+)\.WRITE\s*\(([^()]*)\)", re.IGNORECASE), r"\1 = BLOB_WRITE(\1, \2)"),
+    (re.compile(r"\+\s*(?=\x00)"), "|| "),
+    (re.compile(r"(\x00\d+\x00)\s*\+"), r"\1 ||"),
+]
+
+
+def _masquer(sql: str) -> Tuple[str, list]:
+    """Remplace les chaînes littérales par des marqueurs pour ne pas les réécrire"""
+    litteraux = []
+
+    def remplacer(m):
+        litteraux.append(m.group(0))
+        return f"\x00{len(litteraux) - 1}\x00"
+
+    return _RE_LITTERAL.sub(remplacer, sql), litteraux
+
+
+def _demasquer(sql: str, litteraux: list) -> str:
+    """Remet en place les chaînes littérales"""
+    return _RE_MASQUE.sub(lambda m: litteraux[int(m.group(1))], sql)
+
+
+def _traduire_top(sql: str) -> str:
+    """SELECT TOP n ... devient SELECT ... LIMIT n (y compris dans une sous-requête)"""
+    while True:
+        m = _RE_TOP.search(sql)
+        if m is None:
+            return sql
+
+        limite = m.group(2) or m.group(3)
+        profondeur = sql.count("(", 0, m.start()) - sql.count(")", 0, m.start())
+        fin = len(sql.rstrip().rstrip(";"))
+        niveau = 0
+        for i in range(m.end(), fin):
+            if sql[i] == "(":
+                niveau += 1
+            elif sql[i] == ")":
+                if niveau == 0 and profondeur > 0:
+                    fin = i
+                    break
+                niveau -= 1
+
+        sql = (sql[:m.start()] + "SELECT " + (m.group(1) or "") + sql[m.end():fin].rstrip()
+               + f" LIMIT {limite}" + sql[fin:])
+
+
+def _traduire_masque(sql: str) -> str:
+    """Traduit une requête dont les littéraux sont déjà masqués"""
+    for motif, remplacement in _REMPLACEMENTS:
+        sql = motif.sub(remplacement, sql)
+    return _traduire_top(sql)
+
+
+def translate_tsql(sql: str) -> str:
+    """
+    Traduit une instruction T-SQL simple en SQL SQLite
+
+    Les fonctions GETDATE(), DATALENGTH(), SUBSTRING(), DATEDIFF_SECONDES(),
+    LAST_IDENTITY(), TRANCOUNT() et BLOB_WRITE() sont fournies par les connexions SQLiteConnection.
+
+    Args:
+        sql: Instruction T-SQL (sans variables ni OUTPUT)
+
+    Returns:
+        Instruction équivalente pour SQLite
+    """
+    masque, litteraux = _masquer(sql)
+    return _demasquer(_traduire_masque(masque), litteraux)
+
+
+def _decouper_lot(sql: str) -> list:
+    """Découpe un lot T-SQL masqué en instructions (séparateur ';' hors parenthèses)"""
+    instructions = []
+    niveau = 0
+    debut = 0
+    for i, c in enumerate(sql):
+        if c == "(":
+            niveau += 1
+        elif c == ")":
+            niveau -= 1
+        elif c == ";" and niveau == 0:
+            instructions.append(sql[debut:i])
+            debut = i + 1
+    instructions.append(sql[debut:])
+    return [s for s in instructions if s.strip()]
+
+
+def _litteral_sql(valeur) -> str:
+    """Valeur Python sous forme de littéral SQL (pour substituer une variable @x)"""
+    if valeur is None:
+        return "NULL"
+    if isinstance(valeur, (bytes, bytearray, memoryview)):
+        return f"X'{bytes(valeur).hex()}'"
+    if isinstance(valeur, (int, float)):
+        return repr(valeur)
+    return "'" + str(valeur).replace("'", "''") + "'"
+
+
+def _adapter_parametre(valeur):
+    """Convertit un paramètre pyodbc en valeur acceptée par sqlite3"""
+    if isinstance(valeur, datetime):
+        return valeur.isoformat(" ")
+    if isinstance(valeur, date):
+        return valeur.isoformat()
+    if isinstance(valeur, (bytearray, memoryview)):
+        return bytes(valeur)
+    if isinstance(valeur, Decimal):
+        return float(valeur)
+    return valeur
+
+
+def _erreur_pyodbc(erreur: sqlite3.Error) -> Exception:
+    """Erreur pyodbc de la même catégorie (contrainte, donnée) que l'erreur sqlite3"""
+    for origine, nom in ((sqlite3.IntegrityError, "IntegrityError"), (sqlite3.DataError, "DataError")):
+        if isinstance(erreur, origine) and hasattr(pyodbc, nom):
+            return getattr(pyodbc, nom)(str(erreur))
+    return pyodbc.Error(str(erreur))
+
+
+def _convertir_ligne(ligne: tuple) -> tuple:
+    """Les dates SQLite (texte ISO) redeviennent des datetime, comme avec pyodbc"""
+    return tuple(
+        datetime.fromisoformat(v) if isinstance(v, str) and _RE_DATE_HEURE.match(v) else v
+        for v in ligne
+    )
+
+
+def _blob_write(valeur, morceau, decalage, longueur):
+    """Émulation de colonne.WRITE(morceau, decalage, longueur) de SQL Server"""
+    if valeur is None:
+        return None
+    valeur = bytes(valeur)
+    morceau = b"" if morceau is None else bytes(morceau)
+    if decalage is None:
+        return valeur + morceau
+    fin = len(valeur) if longueur is None else decalage + longueur
+    return valeur[:decalage] + morceau + valeur[fin:]
+
+
+def _datalength(valeur):
+    """DATALENGTH: octets d'un BLOB, 2 octets par caractère pour un NVARCHAR"""
+    if valeur is None:
+        return None
+    if isinstance(valeur, str):
+        return len(valeur.encode("utf-16-le"))
+    if isinstance(valeur, bytes):
+        return len(valeur)
+    return len(str(valeur))
+
+
+def _substring(valeur, debut, longueur):
+    """SUBSTRING(valeur, debut, longueur), positions à partir de 1"""
+    if valeur is None or debut is None or longueur is None:
+        return None
+    debut = int(debut)
+    return valeur[max(debut - 1, 0):max(debut - 1 + int(longueur), 0)]
+
+
+def _datediff_secondes(debut, fin):
+    """DATEDIFF(second, debut, fin): secondes entières franchies, comme SQL Server"""
+    if debut is None or fin is None:
+        return None
+    debut = datetime.fromisoformat(debut).replace(microsecond=0)
+    fin = datetime.fromisoformat(fin).replace(microsecond=0)
+    return int((fin - debut).total_seconds())
+
+
+def _hash_mot_de_passe(sel: bytes, mot_de_passe: str) -> bytes:
+    """HASHBYTES('SHA2_256', @salt + CONVERT(VARBINARY(4000), @MotDePasse))"""
+    return hashlib.sha256(sel + mot_de_passe.encode("utf-16-le")).digest()
+
+
+def _usp_utilisateur_create(connexion: sqlite3.Connection, Pseudo: str, Courriel: str,
+                            MotDePasse: str, **_) -> dict:
+    """Équivalent de dbo.usp_Utilisateur_Create"""
+    if connexion.execute("SELECT 1 FROM Utilisateur WHERE courriel = ?", (Courriel,)).fetchone():
+        return {'UserId': -1}
+
+    sel = os.urandom(16)
+    empreinte = _hash_mot_de_passe(sel, MotDePasse)
+    curseur = connexion.execute(
+        "INSERT INTO Utilisateur (pseudo, courriel, motDePasse, mdp_hash, mdp_salt) VALUES (?, ?, ?, ?, ?)",
+        (Pseudo, Courriel, empreinte.hex(), empreinte, sel)
+    )
+    return {'UserId': curseur.lastrowid}
+
+
+def _usp_utilisateur_login(connexion: sqlite3.Connection, Courriel: str, MotDePasse: str, **_) -> dict:
+    """Équivalent de dbo.usp_Utilisateur_Login"""
+    ligne = connexion.execute(
+        "SELECT idUtilisateur_PK, mdp_salt, mdp_hash FROM Utilisateur WHERE courriel = ?", (Courriel,)
+    ).fetchone()
+    if ligne is None or ligne[1] is None:
+        return {'UserId': -1}
+    if _hash_mot_de_passe(ligne[1], MotDePasse) != ligne[2]:
+        return {'UserId': -1}
+    return {'UserId': ligne[0]}
+
+
+# Procédures stockées émulées: nom (minuscules) -> fonction(connexion, **paramètres) -> sorties
+PROCEDURES = {
+    'usp_utilisateur_create': _usp_utilisateur_create,
+    'usp_utilisateur_login': _usp_utilisateur_login,
+}
+
+
+class SQLiteCursor:
+    """Curseur au comportement pyodbc: lots T-SQL, fetchval, erreurs pyodbc.Error"""
+
+    def __init__(self, connexion: 'SQLiteConnection'):
+        self.connexion = connexion
+        self.arraysize = 1
+        self.fast_executemany = False
+        self.rowcount = -1
+        self.description = None
+        self._curseur = None
+        self._lignes = None
+
+    def execute(self, sql: str, *params):
+        """
+        Exécute une instruction ou un lot T-SQL
+
+        Args:
+            sql: Requête T-SQL (plusieurs instructions séparées par ';' acceptées)
+            params: Paramètres, en une séquence ou en arguments séparés (comme pyodbc)
+
+        Returns:
+            Le curseur lui-même (pour chaîner fetchone/fetchval)
+        """
+        if len(params) == 1 and isinstance(params[0], (list, tuple)):
+            params = params[0]
+        params = [_adapter_parametre(p) for p in params]
+
+        self._curseur = None
+        self._lignes = None
+        self.description = None
+        self.rowcount = -1
+
+        try:
+            masque, litteraux = _masquer(sql)
+            variables = {}
+            for instruction in _decouper_lot(masque):
+                nb = instruction.count("?")
+                self._executer(instruction, litteraux, params[:nb], variables)
+                params = params[nb:]
+        except sqlite3.Error as e:
+            raise _erreur_pyodbc(e) from e
+        return self
+
+    def executemany(self, sql: str, rows):
+        """Exécute une instruction pour chaque ligne de paramètres"""
+        try:
+            curseur = self.connexion.sqlite.executemany(
+                translate_tsql(sql), [[_adapter_parametre(p) for p in row] for row in rows]
+            )
+        except sqlite3.Error as e:
+            raise _erreur_pyodbc(e) from e
+        self.rowcount = curseur.rowcount
+        self.connexion.noter_insertion(sql, curseur.lastrowid)
+
+    def setinputsizes(self, tailles):
+        """Sans effet: SQLite ne type pas les paramètres"""
+
+    def fetchone(self) -> Optional[tuple]:
+        """Ligne suivante, ou None"""
+        if self._lignes is not None:
+            return self._lignes.pop(0) if self._lignes else None
+        if self._curseur is None:
+            raise pyodbc.Error("Aucun résultat: la dernière instruction ne retourne pas de lignes")
+        ligne = self._curseur.fetchone()
+        return None if ligne is None else _convertir_ligne(ligne)
+
+    def fetchval(self):
+        """Première colonne de la ligne suivante, ou None"""
+        ligne = self.fetchone()
+        return None if ligne is None else ligne[0]
+
+    def fetchmany(self, taille: Optional[int] = None) -> list:
+        """Jusqu'à taille lignes (défaut: arraysize)"""
+        taille = taille or self.arraysize
+        if self._lignes is not None:
+            lignes, self._lignes = self._lignes[:taille], self._lignes[taille:]
+            return lignes
+        if self._curseur is None:
+            raise pyodbc.Error("Aucun résultat: la dernière instruction ne retourne pas de lignes")
+        return [_convertir_ligne(l) for l in self._curseur.fetchmany(taille)]
+
+    def fetchall(self) -> list:
+        """Toutes les lignes restantes"""
+        if self._lignes is not None:
+            lignes, self._lignes = self._lignes, []
+            return lignes
+        if self._curseur is None:
+            raise pyodbc.Error("Aucun résultat: la dernière instruction ne retourne pas de lignes")
+        return [_convertir_ligne(l) for l in self._curseur.fetchall()]
+
+    def nextset(self) -> bool:
+        """Un seul jeu de résultats par lot (celui de la dernière instruction SELECT)"""
+        return False
+
+    def close(self):
+        """Ferme le curseur"""
+        if self._curseur is not None:
+            self._curseur.close()
+        self._curseur = None
+        self._lignes = None
+
+    def _executer(self, instruction: str, litteraux: list, params: list, variables: dict):
+        """Exécute une instruction masquée d'un lot, en tenant à jour les variables @x"""
+        sqlite = self.connexion.sqlite
+
+        if re.match(r"^\s*SET\s+NOCOUNT\s+(ON|OFF)\s*$", instruction, re.IGNORECASE):
+            return
+
+        m = _RE_DECLARE_TABLE.match(instruction)
+        if m:
+            table = f"_var_{m.group(1)}"
+            colonnes = _demasquer(m.group(2), litteraux)
+            sqlite.execute(f"CREATE TEMP TABLE IF NOT EXISTS {table} {colonnes}")
+            sqlite.execute(f"DELETE FROM temp.{table}")
+            variables[m.group(1).lower()] = ('table', f"temp.{table}")
+            return
+
+        m = _RE_DECLARE.match(instruction)
+        if m:
+            valeur = self._evaluer(m.group(2), litteraux, params, variables) if m.group(2) else None
+            variables[m.group(1).lower()] = ('valeur', valeur)
+            return
+
+        m = _RE_SET_VARIABLE.match(instruction)
+        if m:
+            variables[m.group(1).lower()] = ('valeur', self._evaluer(m.group(2), litteraux, params, variables))
+            return
+
+        m = _RE_EXEC.match(instruction)
+        if m:
+            self._executer_procedure(m.group(1), m.group(2), litteraux, params, variables)
+            return
+
+        # OUTPUT INSERTED.x [INTO @t]: retiré de l'INSERT puis relu par rowid
+        sortie = _RE_OUTPUT.search(instruction)
+        if sortie:
+            instruction = instruction[:sortie.start()] + instruction[sortie.end():]
+
+        requete = _demasquer(_traduire_masque(self._substituer(instruction, variables)), litteraux)
+        curseur = sqlite.execute(requete, params)
+        table = _RE_INSERT.match(instruction)
+
+        if table:
+            self.connexion.noter_insertion(instruction, curseur.lastrowid)
+        if sortie and table:
+            self._output(table.group(1), sortie, curseur, variables)
+            return
+
+        self.rowcount = curseur.rowcount
+        if curseur.description is not None:
+            self._curseur = curseur
+            self._lignes = None
+            self.description = curseur.description
+
+    def _output(self, table: str, sortie, curseur: sqlite3.Cursor, variables: dict):
+        """Relit les colonnes OUTPUT INSERTED.* des lignes que l'INSERT vient d'ajouter"""
+        colonnes = ", ".join(c.strip()[len("INSERTED."):] for c in sortie.group(1).split(","))
+        table = table.replace("dbo.", "")
+        derniere, nb = curseur.lastrowid, curseur.rowcount
+        select = f"SELECT {colonnes} FROM {table} WHERE rowid > ? AND rowid <= ? ORDER BY rowid"
+        self.rowcount = nb
+
+        if sortie.group(2):
+            genre, cible = variables[sortie.group(2).lower()]
+            self.connexion.sqlite.execute(f"INSERT INTO {cible} {select}", (derniere - nb, derniere))
+        else:
+            resultat = self.connexion.sqlite.execute(select, (derniere - nb, derniere))
+            self.description = resultat.description
+            self._lignes = [_convertir_ligne(l) for l in resultat.fetchall()]
+
+    def _executer_procedure(self, nom: str, arguments: str, litteraux: list, params: list,
+                            variables: dict):
+        """EXEC dbo.usp_... @A=?, @B=@x OUTPUT: appel de l'équivalent Python"""
+        procedure = PROCEDURES.get(nom.lower())
+        if procedure is None:
+            raise sqlite3.OperationalError(f"Procédure stockée non émulée: {nom}")
+
+        valeurs = {}
+        sorties = {}
+        for argument in _decouper_arguments(arguments):
+            m = _RE_ARGUMENT.match(argument)
+            if m is None:
+                raise sqlite3.OperationalError(f"Argument non supporté: {argument}")
+            expression = m.group(2).strip()
+            if m.group(3):
+                sorties[m.group(1)] = expression.lstrip("@").lower()
+                continue
+            nb = expression.count("?")
+            valeurs[m.group(1)] = self._evaluer(expression, litteraux, params[:nb], variables)
+            params = params[nb:]
+
+        resultats = procedure(self.connexion.sqlite, **valeurs)
+        for parametre, variable in sorties.items():
+            variables[variable] = ('valeur', resultats.get(parametre))
+
+    def _evaluer(self, expression: str, litteraux: list, params: list, variables: dict):
+        """Valeur d'une expression T-SQL (SELECT expression)"""
+        if expression.strip() == "?":
+            return params[0]
+        requete = _demasquer(_traduire_masque("SELECT " + self._substituer(expression, variables)),
+                             litteraux)
+        return self.connexion.sqlite.execute(requete, params).fetchone()[0]
+
+    @staticmethod
+    def _substituer(instruction: str, variables: dict) -> str:
+        """Remplace @t (table) par sa table temporaire et @x (valeur) par un littéral"""
+        def remplacer(m):
+            variable = variables.get(m.group(1).lower())
+            if variable is None:
+                return m.group(0)
+            genre, valeur = variable
+            return valeur if genre == 'table' else _litteral_sql(valeur)
+
+        return _RE_VARIABLE.sub(remplacer, instruction)
+
+
+def _decouper_arguments(arguments: str) -> list:
+    """Sépare les arguments d'un EXEC (virgules hors parenthèses)"""
+    morceaux = []
+    niveau = 0
+    courant = ""
+    for c in arguments:
+        if c == "(":
+            niveau += 1
+        elif c == ")":
+            niveau -= 1
+        if c == "," and niveau == 0:
+            morceaux.append(courant)
+            courant = ""
+        else:
+            courant += c
+    if courant.strip():
+        morceaux.append(courant)
+    return morceaux
+
+
+class SQLiteConnection:
+    """Connexion au comportement pyodbc (commit/rollback explicites) sur un fichier SQLite"""
+
+    def __init__(self, chemin: str):
+        """
+        Ouvre la connexion et enregistre les fonctions T-SQL émulées
+
+        Args:
+            chemin: Fichier SQLite ou URI (file:...?mode=memory&cache=shared)
+        """
+        self.sqlite = sqlite3.connect(chemin, timeout=30.0, check_same_thread=False,
+                                      uri=chemin.startswith("file:"))
+        self.autocommit = False
+        self.derniere_identite = None
+        self.statements = {}
+
+        self.sqlite.execute("PRAGMA foreign_keys=OFF")
+        self.sqlite.create_function("GETDATE", 0, lambda: datetime.now().isoformat(" "))
+        self.sqlite.create_function("SYSDATETIME", 0, lambda: datetime.now().isoformat(" "))
+        self.sqlite.create_function("DATALENGTH", 1, _datalength, deterministic=True)
+        self.sqlite.create_function("SUBSTRING", 3, _substring, deterministic=True)
+        self.sqlite.create_function("DATEDIFF_SECONDES", 2, _datediff_secondes, deterministic=True)
+        self.sqlite.create_function("BLOB_WRITE", 4, _blob_write, deterministic=True)
+        self.sqlite.create_function("LAST_IDENTITY", 0, lambda: self.derniere_identite)
+        self.sqlite.create_function("TRANCOUNT", 0, lambda: int(self.sqlite.in_transaction))
+
+    def cursor(self) -> SQLiteCursor:
+        """Nouveau curseur"""
+        return SQLiteCursor(self)
+
+    def commit(self):
+        """Valide la transaction en cours"""
+        self.sqlite.commit()
+
+    def rollback(self):
+        """Annule la transaction en cours"""
+        self.sqlite.rollback()
+
+    def close(self):
+        """Ferme la connexion"""
+        self.sqlite.close()
+
+    def noter_insertion(self, instruction: str, rowid: Optional[int]):
+        """Mémorise l'ID généré par un INSERT (pour @@IDENTITY / SCOPE_IDENTITY())"""
+        if rowid and "temp." not in instruction and "_var_" not in instruction:
+            self.derniere_identite = rowid
+
+
+class SQLitePool:
+    """Une connexion SQLite par thread, avec la même interface que ConnectionPool"""
+
+    def __init__(self, chemin: str, max_size: int = 4):
+        """
+        Initialise le pool
+
+        Args:
+            chemin: Fichier SQLite (':memory:' pour une base partagée en mémoire)
+            max_size: Indicatif, SQLite n'impose pas de limite (défaut: 4)
+        """
+        if chemin == ":memory:":
+            chemin = f"file:sallesense_{id(self)}?mode=memory&cache=shared"
+        self.chemin = chemin
+        self.min_size = 1
+        self.max_size = max_size
+
+        self._lock = threading.Lock()
+        self._checked_out = {}
+        self._principale = None
+        self._closed = False
+
+    def open(self):
+        """Ouvre la connexion principale (qui garde aussi en vie une base en mémoire)"""
+        self._principale = SQLiteConnection(self.chemin)
+        if not self.chemin.startswith("file:"):
+            self._principale.sqlite.execute("PRAGMA journal_mode=WAL")
+            self._principale.sqlite.execute("PRAGMA synchronous=NORMAL")
+
+    def checkout(self) -> Tuple[SQLiteConnection, SQLiteCursor]:
+        """Connexion et curseur du thread courant (ouverts au premier accès)"""
+        thread = threading.current_thread()
+        ident = threading.get_ident()
+
+        with self._lock:
+            if self._closed:
+                raise pyodbc.Error("Pool de connexions fermé")
+            entry = self._checked_out.get(ident)
+            if entry is not None and entry[0] is thread:
+                return entry[1], entry[2]
+            if entry is not None:
+                self._fermer_locked(ident)
+
+            # Nettoyer les connexions des threads terminés
+            for autre in [i for i, e in self._checked_out.items() if not e[0].is_alive()]:
+                self._fermer_locked(autre)
+
+        connexion = SQLiteConnection(self.chemin)
+        curseur = connexion.cursor()
+        with self._lock:
+            self._checked_out[ident] = (thread, connexion, curseur)
+        return connexion, curseur
+
+    def statement_cursor(self, nom: str, preparer) -> SQLiteCursor:
+        """Curseur dédié à une instruction préparée sur la connexion du thread courant"""
+        connexion, _ = self.checkout()
+        curseur = connexion.statements.get(nom)
+        if curseur is None:
+            curseur = connexion.statements[nom] = preparer(connexion)
+        return curseur
+
+    def current(self) -> Optional[Tuple[SQLiteConnection, SQLiteCursor]]:
+        """(connexion, curseur) du thread courant s'il en a ouvert une, sinon None"""
+        with self._lock:
+            entry = self._checked_out.get(threading.get_ident())
+            if entry is None or entry[0] is not threading.current_thread():
+                return None
+            return entry[1], entry[2]
+
+    def release(self):
+        """Ferme la connexion du thread courant"""
+        with self._lock:
+            self._fermer_locked(threading.get_ident())
+
+    def reap(self):
+        """Ferme les connexions des threads terminés"""
+        with self._lock:
+            for ident in [i for i, e in self._checked_out.items() if not e[0].is_alive()]:
+                self._fermer_locked(ident)
+
+    def close(self):
+        """Ferme toutes les connexions"""
+        with self._lock:
+            self._closed = True
+            for ident in list(self._checked_out):
+                self._fermer_locked(ident)
+            if self._principale is not None:
+                self._principale.close()
+                self._principale = None
+
+    def stats(self) -> dict:
+        """État du pool (même format que ConnectionPool.stats)"""
+        with self._lock:
+            return {
+                'taille': len(self._checked_out),
+                'inactives': 0,
+                'empruntees': len(self._checked_out),
+                'min': self.min_size,
+                'max': self.max_size,
+            }
+
+    def _fermer_locked(self, ident: int):
+        """Ferme la connexion d'un thread (verrou déjà pris)"""
+        entry = self._checked_out.pop(ident, None)
+        if entry is None:
+            return
+        try:
+            entry[1].rollback()
+            entry[1].close()
+        except sqlite3.Error:
+            pass
+
+
+class SQLiteDatabaseConnection(DatabaseConnection):
+    """DatabaseConnection sur une base SQLite locale (tests et mesures hors ligne)"""
+
+    def __init__(self, chemin: str = "sallesense_hors_ligne.db", schema: str = SCHEMA_SQL,
+                 pool_max: int = 4, verbose: bool = True, slow_query_ms: float = 500.0,
+                 slow_query_log: Optional[str] = None):
+        """
+        Initialise la base hors ligne
+
+        Args:
+            chemin: Fichier SQLite, ou ':memory:' pour une base temporaire
+            schema: Script T-SQL de création des tables (défaut: Script_bd/creationTables.sql)
+            pool_max: Connexions simultanées indicatives (défaut: 4)
+            verbose: Afficher les requêtes réussies et les requêtes lentes (défaut: True)
+            slow_query_ms: Durée (ms) à partir de laquelle une requête est journalisée comme lente (défaut: 500)
+            slow_query_log: Fichier journal des requêtes lentes (optionnel)
+        """
+        super().__init__("sqlite", chemin, pool_max=pool_max, verbose=verbose,
+                         slow_query_ms=slow_query_ms, slow_query_log=slow_query_log)
+        self.chemin = chemin
+        self.schema = schema
+
+    def connect(self) -> bool:
+        """
+        Ouvre la base SQLite et crée les tables manquantes
+
+        Returns:
+            True si la connexion est réussie, False sinon
+        """
+        try:
+            self.pool = SQLitePool(self.chemin, max_size=self.pool_max)
+            self.pool.open()
+            self.creer_schema()
+            self.pool.checkout()
+            print(f"✓ Base hors ligne SQLite ouverte: '{self.chemin}'")
+            return True
+
+        except (pyodbc.Error, sqlite3.Error, OSError) as e:
+            print(f"✗ Erreur d'ouverture de la base hors ligne: {e}")
+            if self.pool is not None:
+                self.pool.close()
+            self.pool = None
+            return False
+
+    def creer_schema(self):
+        """
+        Crée les tables de creationTables.sql (si absentes), les colonnes de
+        mot de passe de ProcedureStocke.sql et le trigger des capteurs
+        """
+        with open(self.schema, encoding="utf-8-sig") as f:
+            script = f.read()
+
+        sqlite = self.pool._principale.sqlite
+        for bloc in re.split(r"^\s*GO\s*$", script, flags=re.MULTILINE | re.IGNORECASE):
+            m = re.search(r"CREATE\s+TABLE\s+(\w+)\s*\((.*)\)", bloc, re.IGNORECASE | re.DOTALL)
+            if m is None:
+                continue
+            colonnes = re.sub(r"\bINT\s+IDENTITY\s*\(\s*1\s*,\s*1\s*\)\s+PRIMARY\s+KEY",
+                              "INTEGER PRIMARY KEY AUTOINCREMENT", m.group(2), flags=re.IGNORECASE)
+            colonnes = re.sub(r"\(\s*MAX\s*\)", "", colonnes, flags=re.IGNORECASE)
+            sqlite.execute(f"CREATE TABLE IF NOT EXISTS {m.group(1)} ({colonnes.strip().rstrip(',')})")
+
+        existantes = {ligne[1] for ligne in sqlite.execute("PRAGMA table_info(Utilisateur)")}
+        for colonne in ("mdp_salt", "mdp_hash"):
+            if colonne not in existantes:
+                sqlite.execute(f"ALTER TABLE Utilisateur ADD COLUMN {colonne} BLOB NULL")
+
+        for operation in ("INSERT", "UPDATE"):
+            sqlite.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_check_donnees_capteur_{operation.lower()}
+                AFTER {operation} ON Donnees
+                BEGIN {_VERIFICATIONS_DONNEES} END
+            """)
+        sqlite.commit()
+
+
+# Exemple d'utilisation
+if __name__ == "__main__":
+    import io
+
+    with SQLiteDatabaseConnection(":memory:", verbose=False) as db:
+        id_salle = db.insert_returning_id('Salle', {'numero': 'A-101', 'capaciteMaximale': 30},
+                                          'idSalle_PK')
+        id_bruit = db.insert_returning_id('Capteur', {'nom': 'Micro A-101', 'type': 'BRUIT'},
+                                          'idCapteur_PK')
+        id_camera = db.insert_returning_id('Capteur', {'nom': 'Caméra A-101', 'type': 'CAMERA'},
+                                           'idCapteur_PK')
+
+        writer = db.batch_writer(max_rows=100)
+        for i in range(1000):
+            writer.add(datetime.now(), id_bruit, 40 + i % 30, id_salle)
+        db.flush_batches()
+
+        print(db.insert_donnee_evenement(id_bruit, id_salle, 'BRUIT_FORT', 'Bruit fort: 95 dB', mesure=95.0))
+        print(db.insert_blob_chunked(id_camera, id_salle, io.BytesIO(b"\xff\xd8" + b"\x00" * 5000),
+                                     'CAPTURE', 'Vidéo', chunk_size=1024))
+        print(db.execute_query("""
+            SELECT TOP 3 d.idDonnee_PK, d.dateHeure, c.type, DATALENGTH(d.photoBlob)
+            FROM Donnees d JOIN Capteur c ON d.idCapteur = c.idCapteur_PK
+            WHERE c.type = N'CAMERA' OR d.mesure > 60
+            ORDER BY d.idDonnee_PK DESC
+        """))
+
+        db.create_user("test", "test@example.com", "motdepasse123")
+        db.login_user("test@example.com", "motdepasse123")
+        print(db.query_stats.report())
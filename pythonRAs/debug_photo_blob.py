@@ -49,8 +49,31 @@ def get_connection():
     return None
 
 
-def analyser_photos_bd(conn):
-    """Analyse toutes les photos dans la BD"""
+def iterer_lignes(cursor, arraysize: int):
+    """Parcourt le résultat d'un curseur par paquets de arraysize lignes (fetchmany)"""
+    cursor.arraysize = arraysize
+    while True:
+        rows = cursor.fetchmany(arraysize)
+        if not rows:
+            return
+        yield from rows
+
+
+def analyser_photos_bd(conn, limite: int = 10, arraysize: int = 5):
+    """
+    Analyse les photos de la BD et sauvegarde les photos décodables
+
+    Les photos sont lues par paquets de arraysize et écrites sur disque au fil
+    de l'eau: un seul paquet de BLOB est en mémoire à la fois.
+
+    Args:
+        conn: Connexion pyodbc
+        limite: Nombre de photos à analyser, les plus récentes (None = toutes)
+        arraysize: Nombre de photos rapatriées par aller-retour
+
+    Returns:
+        Liste des résultats d'analyse (sans les BLOB)
+    """
     print("=" * 80)
     print("  ANALYSE DES PHOTOS BLOB DANS LA BASE DE DONNÉES")
     print("=" * 80 + "\n")
@@ -80,9 +103,17 @@ def analyser_photos_bd(conn):
         print(f"   Taille max: {stats[5]/1024:.2f} KB")
     print()
 
-    # Récupérer les 10 dernières photos
-    cursor.execute("""
-        SELECT TOP 10
+    nb_photos = stats[1] if limite is None else min(stats[1], limite)
+
+    if not nb_photos:
+        print("❌ Aucune photo trouvée dans la BD")
+        cursor.close()
+        return []
+
+    # Récupérer les dernières photos
+    top = f"TOP {int(limite)}" if limite is not None else ""
+    cursor.execute(f"""
+        SELECT {top}
             idDonnee_PK,
             dateHeure,
             idCapteur,
@@ -94,18 +125,12 @@ def analyser_photos_bd(conn):
         ORDER BY idDonnee_PK DESC
     """)
 
-    photos = cursor.fetchall()
-
-    if not photos:
-        print("❌ Aucune photo trouvée dans la BD")
-        return []
-
-    print(f"📷 {len(photos)} PHOTOS TROUVÉES:\n")
+    print(f"📷 {nb_photos} PHOTOS TROUVÉES:\n")
     print("-" * 80)
 
     resultats = []
 
-    for i, row in enumerate(photos, 1):
+    for i, row in enumerate(iterer_lignes(cursor, arraysize), 1):
         id_donnee = row[0]
         date_heure = row[1]
         id_capteur = row[2]
@@ -153,7 +178,7 @@ def analyser_photos_bd(conn):
                     'taille': taille_blob,
                     'format': format_detect,
                     'decodable': True,
-                    'blob': photo_blob
+                    'sauvegardee': sauvegarder_photo(id_donnee, img, taille_blob)
                 })
 
             except Exception as e:
@@ -163,7 +188,7 @@ def analyser_photos_bd(conn):
                     'taille': taille_blob,
                     'format': format_detect,
                     'decodable': False,
-                    'blob': photo_blob
+                    'sauvegardee': False
                 })
         else:
             print(f"  ⚠ BLOB trop petit ou vide")
@@ -172,7 +197,7 @@ def analyser_photos_bd(conn):
                 'taille': taille_blob,
                 'format': 'VIDE',
                 'decodable': False,
-                'blob': photo_blob
+                'sauvegardee': False
             })
 
     cursor.close()
@@ -180,47 +205,42 @@ def analyser_photos_bd(conn):
     return resultats
 
 
-def sauvegarder_photos(resultats):
-    """Sauvegarde les photos décodables sur disque"""
-    if not resultats:
-        return
+def sauvegarder_photo(id_donnee: int, img: Image.Image, taille: int) -> bool:
+    """
+    Sauvegarde une photo décodée sur disque
+
+    Args:
+        id_donnee: ID de la donnée
+        img: Image PIL déjà ouverte
+        taille: Taille du BLOB en bytes
 
+    Returns:
+        True si la photo a été sauvegardée
+    """
     # Créer le dossier de sortie
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
-        print(f"\n✓ Dossier créé: {OUTPUT_DIR}")
-
-    print(f"\n📁 SAUVEGARDE DES PHOTOS DANS {OUTPUT_DIR}/\n")
+        print(f"  ✓ Dossier créé: {OUTPUT_DIR}")
 
-    nb_sauvegardes = 0
-
-    for photo in resultats:
-        if not photo['decodable']:
-            continue
-
-        try:
-            # Essayer de sauvegarder
-            img = Image.open(BytesIO(photo['blob']))
-
-            # Déterminer l'extension
-            if img.format == 'JPEG':
-                ext = 'jpg'
-            elif img.format == 'PNG':
-                ext = 'png'
-            else:
-                ext = img.format.lower()
-
-            filename = f"photo_{photo['id']}.{ext}"
-            filepath = os.path.join(OUTPUT_DIR, filename)
+    try:
+        # Déterminer l'extension
+        if img.format == 'JPEG':
+            ext = 'jpg'
+        elif img.format == 'PNG':
+            ext = 'png'
+        else:
+            ext = img.format.lower()
 
-            img.save(filepath)
-            print(f"  ✓ {filename} ({photo['taille']/1024:.2f} KB)")
-            nb_sauvegardes += 1
+        filename = f"photo_{id_donnee}.{ext}"
+        filepath = os.path.join(OUTPUT_DIR, filename)
 
-        except Exception as e:
-            print(f"  ✗ Échec sauvegarde photo {photo['id']}: {e}")
+        img.save(filepath)
+        print(f"  ✓ Sauvegardée: {OUTPUT_DIR}/{filename} ({taille/1024:.2f} KB)")
+        return True
 
-    print(f"\n✓ {nb_sauvegardes} photo(s) sauvegardée(s)")
+    except Exception as e:
+        print(f"  ✗ Échec sauvegarde photo {id_donnee}: {e}")
+        return False
 
 
 def tester_insertion_recuperation(conn):
@@ -349,13 +369,9 @@ def main():
         return
 
     try:
-        # Analyse des photos existantes
+        # Analyse des photos existantes (les photos décodables sont sauvegardées au passage)
         resultats = analyser_photos_bd(conn)
 
-        # Sauvegarder les photos décodables
-        if resultats:
-            sauvegarder_photos(resultats)
-
         # Test cycle complet
         success = tester_insertion_recuperation(conn)
 
@@ -365,6 +381,7 @@ def main():
         print("=" * 80)
         print(f"  Photos analysées: {len(resultats)}")
         print(f"  Photos décodables: {sum(1 for r in resultats if r['decodable'])}")
+        print(f"  Photos sauvegardées: {sum(1 for r in resultats if r['sauvegardee'])}")
         print(f"  Test cycle complet: {'✅ RÉUSSI' if success else '❌ ÉCHOUÉ'}")
         print("=" * 80 + "\n")
 
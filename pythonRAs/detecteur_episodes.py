@@ -0,0 +1,225 @@
+"""
+Détection des épisodes de bruit fort avec hystérésis
+Au lieu d'un événement BRUIT_FORT par seconde bruyante, chaque épisode produit
+un seul événement, créé quand l'épisode est confirmé et mis à jour tant qu'il dure.
+
+    - Début: niveau >= seuil d'entrée (classes de bruit ignorées exclues)
+    - Confirmation: le niveau reste >= seuil de sortie pendant la durée minimale
+    - Pause: niveau < seuil de sortie; l'épisode continue s'il redépasse le seuil
+      d'entrée avant la fin de l'écart de fusion, sinon il se termine
+"""
+
+import math
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Optional
+
+# Transitions retournées par DetecteurEpisodes.ajouter
+DEBUT = "DEBUT"                # Épisode confirmé: créer son événement
+MISE_A_JOUR = "MISE_A_JOUR"    # Épisode en cours: mettre à jour l'événement
+FIN = "FIN"                    # Épisode terminé: description définitive
+
+_TOLERANCE = timedelta(seconds=0.1)  # Gigue des durées de mesure (n / fréquence)
+
+
+class Episode:
+    """Un épisode de bruit fort d'un capteur"""
+
+    def __init__(self, id_capteur: int, debut: datetime):
+        self.id_capteur = id_capteur
+        self.debut = debut
+        self.fin = debut              # Fin de la dernière mesure forte
+        self.pic = 0.0                # Lmax de l'épisode en dB
+        self.confirme = False
+        self.termine = False
+        self.id_evenement = None      # Rempli par l'appelant après l'insertion
+        self.ligne_spool = None       # Ligne du spool local portant l'événement (rempli par l'appelant)
+        self.derniere_maj = None      # Horodatage de la dernière mise à jour signalée
+        self._energie = 0.0           # Somme des 10^(L/10) x durée
+        self._duree = 0.0             # Somme des durées de mesure
+        self._pause = []              # Mesures sous le seuil de sortie, pas encore dans l'épisode
+        self._classes = Counter()
+
+    @property
+    def duree(self) -> float:
+        """Durée de l'épisode en secondes"""
+        return (self.fin - self.debut).total_seconds()
+
+    @property
+    def leq(self) -> float:
+        """Niveau équivalent de l'épisode en dB"""
+        if self._duree <= 0:
+            return self.pic
+        return 10.0 * math.log10(self._energie / self._duree)
+
+    @property
+    def en_pause(self) -> bool:
+        """Le niveau est repassé sous le seuil de sortie depuis la dernière mesure forte"""
+        return bool(self._pause)
+
+    @property
+    def classe(self) -> Optional[str]:
+        """Classe de bruit la plus fréquente de l'épisode"""
+        return self._classes.most_common(1)[0][0] if self._classes else None
+
+    def description(self) -> str:
+        """Description de l'événement BRUIT_FORT de l'épisode"""
+        etat = "" if self.termine else ", en cours"
+        return (f"Niveau sonore élevé: pic {self.pic:.1f} dB, Leq {self.leq:.1f} dB, "
+                f"{self.debut.strftime('%H:%M:%S')} → {self.fin.strftime('%H:%M:%S')} "
+                f"({self.duree:.0f}s{etat}), classe: {self.classe or '?'}")
+
+    def _ajouter(self, date_heure: datetime, mesure: dict, duree: float):
+        """Intègre une mesure (et les mesures de la pause qui la précède)"""
+        for mesure_pause, duree_pause in self._pause:
+            self._integrer(mesure_pause, duree_pause)
+        self._pause.clear()
+        self._integrer(mesure, duree)
+        self.fin = max(self.fin, date_heure)
+
+    def _integrer(self, mesure: dict, duree: float):
+        niveau = mesure['niveau_db']
+        self._energie += 10.0 ** (niveau / 10.0) * duree
+        self._duree += duree
+        self.pic = max(self.pic, mesure.get('lmax', niveau))
+        if mesure.get('classe'):
+            self._classes[mesure['classe']] += 1
+
+
+class DetecteurEpisodes:
+    """Machine à états par capteur: calme, candidat, épisode actif, pause"""
+
+    def __init__(self, seuil_entree: float, seuil_sortie: Optional[float] = None,
+                 duree_min: float = 2.0, ecart_fusion: float = 10.0,
+                 intervalle_maj: float = 10.0, classes_ignorees: tuple = ()):
+        """
+        Initialise le détecteur
+
+        Args:
+            seuil_entree: Niveau en dB qui ouvre un épisode
+            seuil_sortie: Niveau en dB sous lequel l'épisode est en pause
+                          (défaut: seuil_entree - 5)
+            duree_min: Secondes au-dessus du seuil de sortie avant de confirmer
+                       l'épisode (défaut: 2, 0 = confirmation immédiate)
+            ecart_fusion: Secondes de pause au-delà desquelles l'épisode se termine;
+                          un nouveau bruit plus tôt prolonge le même épisode (défaut: 10)
+            intervalle_maj: Secondes minimum entre deux mises à jour signalées (défaut: 10)
+            classes_ignorees: Classes de bruit qui n'ouvrent pas d'épisode (défaut: aucune)
+        """
+        if seuil_sortie is None:
+            seuil_sortie = seuil_entree - 5.0
+        if seuil_sortie > seuil_entree:
+            raise ValueError("Le seuil de sortie doit être inférieur ou égal au seuil d'entrée")
+
+        self.seuil_entree = seuil_entree
+        self.seuil_sortie = seuil_sortie
+        self.hysteresis = seuil_entree - seuil_sortie
+        self.duree_min = timedelta(seconds=duree_min)
+        self.ecart_fusion = timedelta(seconds=ecart_fusion)
+        self.intervalle_maj = timedelta(seconds=intervalle_maj)
+        self.classes_ignorees = tuple(classes_ignorees)
+
+        self._episodes = {}  # id_capteur -> Episode candidat ou actif
+
+        # Statistiques
+        self.compteur_episodes = 0
+        self.compteur_candidats_rejetes = 0
+        self.compteur_mesures_fortes = 0
+
+    def ajouter(self, id_capteur: int, date_heure: datetime, mesure: dict,
+                seuil_entree: Optional[float] = None) -> list:
+        """
+        Fait avancer la machine à états d'un capteur avec une mesure
+
+        Args:
+            id_capteur: ID du capteur
+            date_heure: Horodatage (fin) de la mesure
+            mesure: Dictionnaire de mesure (niveau_db; lmax, classe et duree optionnels)
+            seuil_entree: Seuil d'entrée de ce capteur, pour un seuil qui suit le bruit
+                          de fond; le seuil de sortie garde le même écart (défaut: seuil fixe)
+
+        Returns:
+            Liste de transitions (DEBUT, MISE_A_JOUR ou FIN, Episode), souvent vide
+        """
+        if seuil_entree is None:
+            seuil_entree = self.seuil_entree
+        seuil_sortie = seuil_entree - self.hysteresis
+
+        niveau = mesure['niveau_db']
+        duree = mesure.get('duree', 1.0)
+        ouvre = niveau >= seuil_entree and mesure.get('classe') not in self.classes_ignorees
+        transitions = []
+
+        episode = self._episodes.get(id_capteur)
+
+        # Pause trop longue: l'épisode se termine à sa dernière mesure forte
+        if episode is not None and date_heure - episode.fin > self.ecart_fusion + _TOLERANCE:
+            transitions.extend(self._terminer(id_capteur))
+            episode = None
+
+        if episode is None:
+            if ouvre:
+                episode = self._episodes[id_capteur] = Episode(
+                    id_capteur, date_heure - timedelta(seconds=duree))
+                self._fort(episode, date_heure, mesure, duree, transitions)
+            return transitions
+
+        if not episode.confirme:
+            # Candidat: doit rester au-dessus du seuil de sortie jusqu'à la durée minimale
+            if niveau >= seuil_sortie:
+                self._fort(episode, date_heure, mesure, duree, transitions)
+            else:
+                del self._episodes[id_capteur]
+                self.compteur_candidats_rejetes += 1
+            return transitions
+
+        # Épisode actif: reste actif au-dessus du seuil de sortie; en pause, il faut
+        # redépasser le seuil d'entrée pour le prolonger
+        if (ouvre if episode.en_pause else niveau >= seuil_sortie):
+            self._fort(episode, date_heure, mesure, duree, transitions)
+        else:
+            episode._pause.append((mesure, duree))
+
+        return transitions
+
+    def terminer(self) -> list:
+        """Termine tous les épisodes en cours (à l'arrêt); retourne les transitions FIN"""
+        transitions = []
+        for id_capteur in list(self._episodes):
+            transitions.extend(self._terminer(id_capteur))
+        return transitions
+
+    def actif(self, id_capteur: int) -> bool:
+        """Un épisode confirmé est en cours pour ce capteur"""
+        episode = self._episodes.get(id_capteur)
+        return episode is not None and episode.confirme
+
+    def en_cours(self, id_capteur: int) -> bool:
+        """Un épisode, candidat ou confirmé, est en cours pour ce capteur"""
+        return id_capteur in self._episodes
+
+    def _fort(self, episode: Episode, date_heure: datetime, mesure: dict, duree: float,
+              transitions: list):
+        """Ajoute une mesure forte et signale confirmation ou mise à jour"""
+        self.compteur_mesures_fortes += 1
+        episode._ajouter(date_heure, mesure, duree)
+
+        if not episode.confirme:
+            if episode.fin - episode.debut + _TOLERANCE >= self.duree_min:
+                episode.confirme = True
+                episode.derniere_maj = date_heure
+                self.compteur_episodes += 1
+                transitions.append((DEBUT, episode))
+        elif date_heure - episode.derniere_maj >= self.intervalle_maj:
+            episode.derniere_maj = date_heure
+            transitions.append((MISE_A_JOUR, episode))
+
+    def _terminer(self, id_capteur: int) -> list:
+        """Retire l'épisode du capteur; FIN seulement s'il avait été confirmé"""
+        episode = self._episodes.pop(id_capteur)
+        episode._pause.clear()
+        episode.termine = True
+        if not episode.confirme:
+            self.compteur_candidats_rejetes += 1
+            return []
+        return [(FIN, episode)]
@@ -0,0 +1,110 @@
+"""
+Détection de changement entre deux photos
+Chaque image est réduite en niveaux de gris (moyenne par blocs, ~160 pixels de
+large) puis comparée à la dernière image gardée: seuls les pixels qui ont changé
+de plus de seuil_pixel niveaux comptent. Une salle vide produit des images
+presque identiques, qui ne sont plus envoyées; une image de maintien part quand
+même toutes les N minutes pour montrer que la caméra fonctionne.
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from config import PHOTO_SEUIL_CHANGEMENT, PHOTO_SEUIL_PIXEL, PHOTO_MAINTIEN
+
+_POIDS_GRIS = np.array([0.299, 0.587, 0.114], dtype=np.float32)  # Luminance (RGB)
+
+
+class DetecteurChangement:
+    """Compare chaque image à la dernière image gardée"""
+
+    def __init__(self, seuil: float = PHOTO_SEUIL_CHANGEMENT, seuil_pixel: float = PHOTO_SEUIL_PIXEL,
+                 maintien: float = PHOTO_MAINTIEN, largeur: int = 160):
+        """
+        Initialise la détection
+
+        Args:
+            seuil: Pourcentage minimum de pixels changés pour garder l'image (défaut: config)
+            seuil_pixel: Écart de niveau de gris (0-255) à partir duquel un pixel a changé,
+                         au-dessus du bruit du capteur (défaut: config)
+            maintien: Minutes maximum sans image gardée (défaut: config, 0 = jamais)
+            largeur: Largeur approximative de l'image réduite en pixels (défaut: 160)
+        """
+        self.seuil = seuil
+        self.seuil_pixel = seuil_pixel
+        self.maintien = timedelta(minutes=maintien) if maintien else None
+        self.largeur = largeur
+
+        self._reference = None       # Dernière image gardée, réduite
+        self._date_reference = None
+
+        # Statistiques
+        self.compteur_gardees = 0
+        self.compteur_ignorees = 0
+        self.compteur_maintien = 0
+        self.ignorees_depuis = 0     # Images ignorées depuis la dernière gardée
+
+    def reduire(self, image: np.ndarray) -> np.ndarray:
+        """
+        Image réduite en niveaux de gris (moyenne par blocs de facteur x facteur pixels)
+
+        Args:
+            image: Tableau hauteur x largeur x 3 (RGB) ou hauteur x largeur (gris)
+
+        Returns:
+            Tableau float32 réduit
+        """
+        facteur = max(1, image.shape[1] // self.largeur)
+        hauteur = image.shape[0] // facteur
+        largeur = image.shape[1] // facteur
+        image = image[:hauteur * facteur, :largeur * facteur]
+
+        if image.ndim == 3:
+            blocs = image.reshape(hauteur, facteur, largeur, facteur, image.shape[2])
+            return blocs.mean(axis=(1, 3), dtype=np.float32)[..., :3] @ _POIDS_GRIS
+        return image.reshape(hauteur, facteur, largeur, facteur).mean(axis=(1, 3), dtype=np.float32)
+
+    def evaluer(self, date_heure: datetime, image: np.ndarray) -> tuple:
+        """
+        Décide si l'image doit être gardée (et en fait la nouvelle référence si oui)
+
+        Args:
+            date_heure: Heure de la capture
+            image: Image capturée (RGB ou gris)
+
+        Returns:
+            (garder, note) où note décrit la raison, ex. "changement 4.2 %, 12 image(s)
+            identique(s) ignorée(s)"; note est None pour une image ignorée
+        """
+        petite = self.reduire(image)
+
+        if self._reference is None or self._reference.shape != petite.shape:
+            raison = "première image"
+        else:
+            change = np.abs(petite - self._reference) > self.seuil_pixel
+            pourcentage = float(change.mean()) * 100
+
+            if pourcentage >= self.seuil:
+                raison = f"changement {pourcentage:.1f} %"
+            elif self.maintien is not None and date_heure - self._date_reference >= self.maintien:
+                raison = "image de maintien"
+                self.compteur_maintien += 1
+            else:
+                self.compteur_ignorees += 1
+                self.ignorees_depuis += 1
+                return False, None
+
+        if self.ignorees_depuis:
+            raison += f", {self.ignorees_depuis} image(s) identique(s) ignorée(s)"
+
+        self._reference = petite
+        self._date_reference = date_heure
+        self.compteur_gardees += 1
+        self.ignorees_depuis = 0
+        return True, raison
+
+    def reduction(self) -> float:
+        """Part des images ignorées (0 à 1)"""
+        total = self.compteur_gardees + self.compteur_ignorees
+        return self.compteur_ignorees / total if total else 0.0
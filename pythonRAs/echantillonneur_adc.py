@@ -0,0 +1,423 @@
+"""
+Échantillonnage continu du MCP3008 à fréquence fixe
+Un thread dédié lit l'ADC par blocs à cadence régulière (plusieurs kHz) et
+dépose les valeurs brutes dans un tampon circulaire NumPy préalloué.
+Les consommateurs (mesure du niveau sonore, calibration, ...) lisent le
+tampon sans jamais bloquer l'échantillonnage.
+
+Plusieurs canaux peuvent être balayés: à chaque tick, tous les canaux de la
+liste sont convertis l'un après l'autre et chacun alimente son propre tampon.
+
+Une trace enregistrée (source_trace.SourceTrace) peut remplacer le MCP3008:
+elle est rejouée bloc par bloc, en temps réel ou accélérée.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+
+from config import ADC_CHANNEL, SPI_BUS, SPI_DEVICE, ADC_FREQUENCE, ADC_TAILLE_BLOC, ADC_DUREE_TAMPON
+
+try:
+    import spidev
+    SPI_AVAILABLE = True
+except ImportError:
+    SPI_AVAILABLE = False
+
+
+class TamponCirculaire:
+    """
+    Tampon circulaire NumPy de taille fixe: un seul écrivain, lecteurs sans verrou
+
+    Chaque échantillon a une position absolue (0, 1, 2, ... depuis la création).
+    L'écrivain annonce la fin de son écriture (ecriture), copie les données puis
+    avance total: un lecteur ne voit donc jamais de position annoncée mais pas
+    encore écrite. Une lecture rattrapée par l'écrivain pendant la copie est
+    tronquée à sa partie intacte.
+    """
+
+    def __init__(self, capacite: int, dtype=np.uint16):
+        """
+        Initialise le tampon (toute la mémoire est allouée ici)
+
+        Args:
+            capacite: Nombre d'échantillons conservés
+            dtype: Type NumPy des échantillons (défaut: uint16)
+        """
+        self.capacite = int(capacite)
+        self.donnees = np.zeros(self.capacite, dtype=dtype)
+        self.total = 0           # Échantillons écrits depuis la création
+        self.ecriture = 0        # Fin de l'écriture en cours (= total au repos)
+
+    def ecrire(self, bloc: np.ndarray):
+        """
+        Ajoute un bloc d'échantillons (réservé au thread d'échantillonnage)
+
+        Args:
+            bloc: Échantillons à ajouter, les plus anciens en premier
+        """
+        n = len(bloc)
+        if n == 0:
+            return
+
+        debut = self.total
+        self.ecriture = debut + n
+        if n > self.capacite:
+            # Seule la fin du bloc tient dans le tampon
+            debut += n - self.capacite
+            bloc = bloc[-self.capacite:]
+
+        i = debut % self.capacite
+        fin = i + len(bloc)
+        if fin <= self.capacite:
+            self.donnees[i:fin] = bloc
+        else:
+            k = self.capacite - i
+            self.donnees[i:] = bloc[:k]
+            self.donnees[:fin - self.capacite] = bloc[k:]
+
+        self.total = self.ecriture
+
+    def lire(self, debut: int, fin: int) -> tuple:
+        """
+        Copie les échantillons des positions [debut, fin)
+
+        Les positions déjà écrasées sont ignorées.
+
+        Args:
+            debut: Première position voulue
+            fin: Position suivant la dernière voulue (au plus total)
+
+        Returns:
+            (copie des échantillons, position du premier échantillon rendu)
+        """
+        fin = min(fin, self.total)
+        debut = max(debut, fin - self.capacite, 0)
+        if debut >= fin:
+            return np.empty(0, dtype=self.donnees.dtype), fin
+
+        i = debut % self.capacite
+        j = i + (fin - debut)
+        if j <= self.capacite:
+            copie = self.donnees[i:j].copy()
+        else:
+            copie = np.concatenate((self.donnees[i:], self.donnees[:j - self.capacite]))
+
+        # L'écrivain a pu écraser le début pendant la copie (il écrit avant d'avancer total)
+        intact = self.ecriture - self.capacite
+        if intact > debut:
+            copie = copie[intact - debut:]
+            debut = intact
+
+        return copie, debut
+
+    def derniers(self, n: int) -> np.ndarray:
+        """
+        Copie des n échantillons les plus récents (moins s'il n'y en a pas assez)
+
+        Args:
+            n: Nombre d'échantillons voulus
+
+        Returns:
+            Tableau NumPy, les plus anciens en premier
+        """
+        total = self.total
+        copie, _ = self.lire(total - n, total)
+        return copie
+
+    def depuis(self, position: int) -> tuple:
+        """
+        Échantillons écrits depuis une position (lecture en flux)
+
+        Args:
+            position: Position retournée par l'appel précédent (0 au départ)
+
+        Returns:
+            (échantillons, nouvelle position, nombre d'échantillons perdus car écrasés)
+        """
+        total = self.total
+        copie, debut = self.lire(position, total)
+        return copie, debut + len(copie), max(0, debut - position)
+
+
+class EchantillonneurMCP3008:
+    """Thread d'échantillonnage d'un ou plusieurs canaux du MCP3008 à fréquence fixe"""
+
+    def __init__(self, canal: int = ADC_CHANNEL, frequence: float = ADC_FREQUENCE,
+                 spi_bus: int = SPI_BUS, spi_device: int = SPI_DEVICE,
+                 vitesse_spi: int = 1350000, taille_bloc: int = ADC_TAILLE_BLOC,
+                 duree_tampon: float = ADC_DUREE_TAMPON, canaux: Optional[list] = None,
+                 source=None):
+        """
+        Initialise l'échantillonneur (le SPI n'est ouvert qu'au démarrage)
+
+        Args:
+            canal: Canal du MCP3008 (0-7), ignoré si canaux est fourni
+            frequence: Fréquence d'échantillonnage par canal en Hz (défaut: config)
+            spi_bus: Bus SPI (défaut: config)
+            spi_device: Périphérique SPI / chip select (défaut: config)
+            vitesse_spi: Horloge SPI en Hz (défaut: 1.35 MHz, maximum du MCP3008 à 3.3 V)
+            taille_bloc: Échantillons lus par réveil du thread (défaut: config)
+            duree_tampon: Secondes conservées dans chaque tampon circulaire (défaut: config)
+            canaux: Canaux à balayer à chaque tick, ex: [0, 1, 4] (défaut: [canal])
+            source: Trace rejouée au lieu du MCP3008 (SourceTrace); sa fréquence remplace
+                    frequence et ses colonnes alimentent les canaux dans l'ordre (défaut: None)
+        """
+        canaux = list(canaux) if canaux else [canal]
+        for c in canaux:
+            if c < 0 or c > 7:
+                raise ValueError(f"Canal MCP3008 invalide: {c}")
+        if len(set(canaux)) != len(canaux):
+            raise ValueError(f"Canal MCP3008 en double: {canaux}")
+
+        self.source = source
+        self.vitesse = source.vitesse if source is not None else 1.0
+        self.canaux = canaux
+        self.canal = canaux[0]
+        self.frequence = float(source.frequence if source is not None else frequence)
+        self.spi_bus = spi_bus
+        self.spi_device = spi_device
+        self.vitesse_spi = vitesse_spi
+        self.taille_bloc = int(taille_bloc)
+        self.tampons = {c: TamponCirculaire(int(self.frequence * duree_tampon)) for c in canaux}
+        self.tampon = self.tampons[self.canal]
+
+        self.spi = None
+        self.simulation = source is None and not SPI_AVAILABLE
+        self.termine = False         # La trace rejouée est finie
+        self._horloge = None         # Date de départ du rejeu (horodatage en temps de trace)
+        self._commandes = [[1, (8 + c) << 4, 0] for c in canaux]
+        self._espacement_us = 0      # delay_usecs passé à xfer2 entre deux conversions
+        self._rng = np.random.default_rng()
+
+        self._thread = None
+        self._arret = threading.Event()
+
+        # Statistiques
+        self.debut = None
+        self.blocs = 0
+        self.blocs_en_retard = 0
+        self.ruptures = 0            # Recalages après un retard de plus d'un bloc
+        self.erreurs = 0
+
+    def demarrer(self) -> bool:
+        """
+        Ouvre le SPI et lance le thread d'échantillonnage
+
+        Returns:
+            True si succès, False sinon
+        """
+        if self._thread is not None:
+            return True
+
+        if self.source is not None:
+            if self.source.nb_canaux < len(self.canaux):
+                print(f"✗ La trace {self.source.chemin} a {self.source.nb_canaux} canal(aux), "
+                      f"{len(self.canaux)} demandé(s)")
+                return False
+            self.termine = False
+            self._horloge = datetime.now()
+        elif not self.simulation:
+            try:
+                self.spi = spidev.SpiDev()
+                self.spi.open(self.spi_bus, self.spi_device)
+                self.spi.max_speed_hz = self.vitesse_spi
+                self._regler_espacement()
+            except Exception as e:
+                print(f"✗ Erreur ouverture SPI {self.spi_bus}.{self.spi_device}: {e}")
+                self.spi = None
+                return False
+
+        self._arret.clear()
+        self._thread = threading.Thread(target=self._boucle, name="adc-mcp3008", daemon=True)
+        self._thread.start()
+        return True
+
+    def arreter(self):
+        """Arrête le thread et ferme le SPI"""
+        self._arret.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+        if self.spi is not None:
+            try:
+                self.spi.close()
+            except Exception:
+                pass
+            self.spi = None
+
+    def attendre(self, nb_echantillons: int, timeout: float = 5.0) -> bool:
+        """
+        Attend que les tampons contiennent au moins nb_echantillons
+
+        Args:
+            nb_echantillons: Nombre d'échantillons voulus depuis le démarrage
+            timeout: Attente maximale en secondes (défaut: 5)
+
+        Returns:
+            True si atteint, False sinon
+        """
+        limite = time.monotonic() + timeout
+        while self.tampon.total < nb_echantillons:
+            if time.monotonic() >= limite or self._thread is None or self.termine:
+                return False
+            time.sleep(self.taille_bloc / (self.frequence * self.vitesse))
+        return True
+
+    def derniers(self, secondes: float, canal: Optional[int] = None) -> np.ndarray:
+        """Copie des échantillons des dernières secondes d'un canal (défaut: le premier)"""
+        return self.tampons[self.canal if canal is None else canal].derniers(int(secondes * self.frequence))
+
+    def maintenant(self) -> datetime:
+        """
+        Horodatage des mesures: l'heure réelle, ou l'heure dans la trace rejouée
+        (départ du rejeu + échantillons rejoués / fréquence) pour qu'un rejeu accéléré
+        garde les vraies durées entre les mesures
+        """
+        if self._horloge is None:
+            return datetime.now()
+        return self._horloge + timedelta(seconds=self.tampon.total / self.frequence)
+
+    def derniere_valeur(self, canal: Optional[int] = None) -> int:
+        """Échantillon le plus récent d'un canal, ou -1 si rien n'a encore été lu"""
+        tampon = self.tampons.get(self.canal if canal is None else canal)
+        if tampon is None:
+            return -1
+        valeur = tampon.derniers(1)
+        return int(valeur[0]) if len(valeur) else -1
+
+    def stats(self) -> dict:
+        """
+        Statistiques d'échantillonnage
+
+        Returns:
+            Dictionnaire: source (spi, simulation ou chemin de la trace), vitesse, canaux,
+            frequence (par canal), frequence_mesuree (en temps réel), echantillons (par canal),
+            blocs, blocs_en_retard, ruptures, erreurs, espacement_us
+        """
+        duree = time.monotonic() - self.debut if self.debut else 0.0
+        if self.source is not None:
+            source = self.source.chemin
+        else:
+            source = "simulation" if self.simulation else "spi"
+        return {
+            'source': source,
+            'vitesse': self.vitesse,
+            'canaux': self.canaux,
+            'frequence': self.frequence,
+            'frequence_mesuree': self.tampon.total / duree if duree > 0 else 0.0,
+            'echantillons': self.tampon.total,
+            'blocs': self.blocs,
+            'blocs_en_retard': self.blocs_en_retard,
+            'ruptures': self.ruptures,
+            'erreurs': self.erreurs,
+            'espacement_us': self._espacement_us
+        }
+
+    def _regler_espacement(self):
+        """
+        Mesure le coût d'une conversion et en déduit l'attente entre conversions
+
+        L'attente est faite par le noyau (delay_usecs de xfer2) pour que les
+        conversions d'un bloc soient espacées de 1/(frequence x nombre de canaux)
+        au lieu d'être lues en rafale.
+        """
+        essais = 200
+        t0 = time.perf_counter()
+        for _ in range(essais):
+            self.spi.xfer2(self._commandes[0], self.vitesse_spi, 0)
+        cout = (time.perf_counter() - t0) / essais
+
+        periode = 1.0 / (self.frequence * len(self.canaux))
+        if cout > periode:
+            print(f"⚠ MCP3008: une conversion prend {cout * 1e6:.0f} µs, "
+                  f"{self.frequence:.0f} Hz x {len(self.canaux)} canal(aux) inatteignable "
+                  f"(max ≈ {1.0 / (cout * len(self.canaux)):.0f} Hz par canal)")
+        self._espacement_us = max(0, int((periode - cout) * 1e6))
+
+    def _lire_bloc(self, n: int) -> np.ndarray:
+        """
+        Lit n ticks (tous les canaux à chaque tick) et les décode en un seul passage NumPy
+
+        Returns:
+            Tableau (n, nombre de canaux)
+        """
+        # Le MCP3008 exige un front de CS entre deux conversions: un xfer2 par conversion
+        xfer2 = self.spi.xfer2
+        commandes = self._commandes
+        vitesse = self.vitesse_spi
+        espacement = self._espacement_us
+        reponses = np.array([xfer2(commande, vitesse, espacement)
+                             for _ in range(n) for commande in commandes], dtype=np.uint16)
+        reponses = reponses.reshape(n, len(commandes), 3)
+        return ((reponses[:, :, 1] & 3) << 8) | reponses[:, :, 2]
+
+    def _simuler_bloc(self, n: int) -> np.ndarray:
+        """Bloc de valeurs aléatoires autour du point de repos (sans MCP3008)"""
+        return self._rng.integers(480, 551, (n, len(self.canaux)), dtype=np.uint16)
+
+    def _boucle(self):
+        """Lit un bloc par période, calée sur l'horloge monotone"""
+        periode_bloc = self.taille_bloc / (self.frequence * self.vitesse)
+        prochain = self.debut = time.monotonic()
+
+        while not self._arret.is_set():
+            debut_bloc = time.monotonic()
+            try:
+                if self.source is not None:
+                    bloc = self.source.lire(self.taille_bloc)[:, :len(self.canaux)]
+                    if len(bloc) == 0:
+                        self.termine = True
+                        print(f"✓ Fin de la trace {self.source.chemin}")
+                        break
+                elif self.simulation:
+                    bloc = self._simuler_bloc(self.taille_bloc)
+                else:
+                    bloc = self._lire_bloc(self.taille_bloc)
+            except Exception as e:
+                self.erreurs += 1
+                print(f"✗ Erreur lecture ADC: {e}")
+                if self._arret.wait(periode_bloc):
+                    break
+                prochain = time.monotonic()
+                continue
+
+            for j, canal in enumerate(self.canaux):
+                self.tampons[canal].ecrire(bloc[:, j])
+            self.blocs += 1
+
+            # Corrige l'espacement si le bloc a pris plus ou moins que sa période
+            if self.spi is not None:
+                conversions = self.taille_bloc * len(self.canaux)
+                ecart_us = (time.monotonic() - debut_bloc - periode_bloc) * 1e6 / conversions
+                self._espacement_us = max(0, int(self._espacement_us - ecart_us / 2))
+
+            prochain += periode_bloc
+            attente = prochain - time.monotonic()
+            if attente > 0:
+                self._arret.wait(attente)
+            else:
+                self.blocs_en_retard += 1
+                if attente < -periode_bloc:
+                    # Trop de retard: repartir de maintenant plutôt que lire en rafale
+                    self.ruptures += 1
+                    prochain = time.monotonic()
+
+
+if __name__ == "__main__":
+    # Exemple: échantillonne 3 secondes et affiche les statistiques
+    echantillonneur = EchantillonneurMCP3008()
+    if echantillonneur.demarrer():
+        mode = "simulation" if echantillonneur.simulation else f"SPI {echantillonneur.spi_bus}.{echantillonneur.spi_device}"
+        print(f"✓ Échantillonnage canal(aux) {echantillonneur.canaux} à {echantillonneur.frequence:.0f} Hz ({mode})")
+        time.sleep(3)
+        valeurs = echantillonneur.derniers(1.0)
+        echantillonneur.arreter()
+        print(f"  Dernière seconde: {len(valeurs)} échantillons, "
+              f"moyenne {valeurs.mean():.1f}, min {valeurs.min()}, max {valeurs.max()}")
+        for cle, valeur in echantillonneur.stats().items():
+            print(f"  {cle}: {valeur}")
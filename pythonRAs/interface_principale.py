@@ -21,6 +21,9 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
 
+from reference_cache import shared_cache
+from config import BANDE_MORTE_BATTEMENT
+
 
 class InterfacePrincipaleModerne:
     """Interface principale moderne pour visualiser les données en temps réel"""
@@ -49,6 +52,8 @@ class InterfacePrincipaleModerne:
 
         self.db = db_connection
         self.user_info = user_info or {}
+        # Capteurs en cache: les requêtes filtrent sur idCapteur IN (...) sans joindre Capteur
+        self.references = shared_cache(self.db, ttl=60.0)
 
         # Variables de contrôle
         self.en_cours = True
@@ -644,11 +649,10 @@ class InterfacePrincipaleModerne:
         """Charge et affiche la dernière photo en temps réel"""
         try:
             # Récupérer la dernière photo
-            photo_data = self.db.execute_query("""
+            photo_data = self.db.execute_query(f"""
                 SELECT TOP 1 d.idDonnee_PK, d.photoBlob, d.dateHeure
                 FROM Donnees d
-                JOIN Capteur c ON d.idCapteur = c.idCapteur_PK
-                WHERE c.type = N'CAMERA' AND d.photoBlob IS NOT NULL
+                WHERE d.idCapteur IN {self.references.ids_sql('CAMERA')} AND d.photoBlob IS NOT NULL
                 ORDER BY d.dateHeure DESC
             """)
 
@@ -899,20 +903,34 @@ class InterfacePrincipaleModerne:
 
             date_debut = datetime.now() - timedelta(hours=hours)
 
-            donnees = self.db.execute_query("""
+            # Mesures brutes (changements et battements) + moyenne de chaque fenêtre agrégée,
+            # placée au début de sa fenêtre: l'escalier la trace sur [dateDebut, fenêtre suivante)
+            donnees = self.db.execute_query(f"""
                 SELECT d.dateHeure, d.mesure
                 FROM Donnees d
-                JOIN Capteur c ON d.idCapteur = c.idCapteur_PK
-                WHERE c.type = N'BRUIT'
+                WHERE d.idCapteur IN {self.references.ids_sql('BRUIT')}
                   AND d.dateHeure >= ?
-                ORDER BY d.dateHeure ASC
-            """, (date_debut,))
+                UNION ALL
+                SELECT r.dateDebut, r.moyenne
+                FROM DonneesResume r
+                WHERE r.idCapteur IN {self.references.ids_sql('BRUIT')}
+                  AND r.dateDebut >= ?
+                ORDER BY 1 ASC
+            """, (date_debut, date_debut))
 
             if donnees:
                 dates = [row[0] for row in donnees]
                 mesures = [row[1] for row in donnees]
 
-                self.ax.plot(dates, mesures, color=self.colors['primary'], linewidth=2, marker='o', markersize=4)
+                # Bande morte: une valeur reste valable jusqu'à la ligne suivante (escalier),
+                # la dernière jusqu'à maintenant si le battement n'est pas dépassé
+                maintenant = datetime.now()
+                if timedelta(0) < maintenant - dates[-1] <= timedelta(seconds=BANDE_MORTE_BATTEMENT):
+                    self.ax.plot([dates[-1], maintenant], [mesures[-1], mesures[-1]],
+                                 color=self.colors['primary'], linewidth=2, linestyle=':')
+
+                self.ax.plot(dates, mesures, color=self.colors['primary'], linewidth=2,
+                             drawstyle='steps-post', marker='o', markersize=4)
                 self.ax.axhspan(0, 50, facecolor=self.colors['success'], alpha=0.1)
                 self.ax.axhspan(50, 70, facecolor=self.colors['warning'], alpha=0.1)
                 self.ax.axhspan(70, 100, facecolor=self.colors['danger'], alpha=0.1)
@@ -940,11 +958,10 @@ class InterfacePrincipaleModerne:
             for widget in self.gallery_frame.winfo_children():
                 widget.destroy()
 
-            photos = self.db.execute_query("""
+            photos = self.db.execute_query(f"""
                 SELECT TOP 12 d.idDonnee_PK, d.photoBlob, d.dateHeure
                 FROM Donnees d
-                JOIN Capteur c ON d.idCapteur = c.idCapteur_PK
-                WHERE c.type = N'CAMERA' AND d.photoBlob IS NOT NULL
+                WHERE d.idCapteur IN {self.references.ids_sql('CAMERA')} AND d.photoBlob IS NOT NULL
                 ORDER BY d.dateHeure DESC
             """)
 
@@ -1057,12 +1074,19 @@ class InterfacePrincipaleModerne:
         if self.auto_refresh.get():
             try:
                 # Dernière mesure de son
-                son = self.db.execute_query("""
-                    SELECT TOP 1 d.mesure, d.dateHeure
-                    FROM Donnees d
-                    JOIN Capteur c ON d.idCapteur = c.idCapteur_PK
-                    WHERE c.type = N'BRUIT'
-                    ORDER BY d.dateHeure DESC
+                # Dernière mesure brute ou dernier résumé, selon le plus récent
+                son = self.db.execute_query(f"""
+                    SELECT TOP 1 s.mesure, s.dateHeure
+                    FROM (
+                        SELECT d.mesure, d.dateHeure
+                        FROM Donnees d
+                        WHERE d.idCapteur IN {self.references.ids_sql('BRUIT')}
+                        UNION ALL
+                        SELECT r.moyenne, r.dateFin
+                        FROM DonneesResume r
+                        WHERE r.idCapteur IN {self.references.ids_sql('BRUIT')}
+                    ) s
+                    ORDER BY s.dateHeure DESC
                 """)
 
                 if son:
@@ -1081,22 +1105,20 @@ class InterfacePrincipaleModerne:
                         self.son_value_label.config(fg=self.colors['success'])
 
                 # Compter les médias
-                media_count = self.db.execute_query("""
+                media_count = self.db.execute_query(f"""
                     SELECT COUNT(*)
                     FROM Donnees d
-                    JOIN Capteur c ON d.idCapteur = c.idCapteur_PK
-                    WHERE c.type = N'CAMERA' AND d.photoBlob IS NOT NULL
+                    WHERE d.idCapteur IN {self.references.ids_sql('CAMERA')} AND d.photoBlob IS NOT NULL
                 """)
 
                 if media_count:
                     self.media_count_label.config(text=str(media_count[0][0]))
 
                 # Dernière capture
-                last_media = self.db.execute_query("""
+                last_media = self.db.execute_query(f"""
                     SELECT TOP 1 d.dateHeure
                     FROM Donnees d
-                    JOIN Capteur c ON d.idCapteur = c.idCapteur_PK
-                    WHERE c.type = N'CAMERA' AND d.photoBlob IS NOT NULL
+                    WHERE d.idCapteur IN {self.references.ids_sql('CAMERA')} AND d.photoBlob IS NOT NULL
                     ORDER BY d.dateHeure DESC
                 """)
 
@@ -1216,17 +1238,21 @@ class InterfacePrincipaleModerne:
             stats.append(f"📊 Nombre total de mesures: {count[0][0]:,}")
             stats.append("")
 
-            by_type = self.db.execute_query("""
-                SELECT c.type, COUNT(*) AS nb
+            by_sensor = self.db.execute_query("""
+                SELECT d.idCapteur, COUNT(*) AS nb
                 FROM Donnees d
-                JOIN Capteur c ON d.idCapteur = c.idCapteur_PK
-                GROUP BY c.type
+                GROUP BY d.idCapteur
             """)
 
+            by_type = {}
+            for id_capteur, nb in by_sensor:
+                type_capteur = self.references.sensor_type(id_capteur) or 'INCONNU'
+                by_type[type_capteur] = by_type.get(type_capteur, 0) + nb
+
             stats.append("📌 Répartition par type de capteur:")
             stats.append("-" * 40)
-            for row in by_type:
-                stats.append(f"  • {row[0]:15} : {row[1]:,} mesures")
+            for type_capteur, nb in sorted(by_type.items()):
+                stats.append(f"  • {type_capteur:15} : {nb:,} mesures")
             stats.append("")
 
             events_count = self.db.execute_query("""
@@ -1242,14 +1268,46 @@ class InterfacePrincipaleModerne:
                 stats.append(f"  • {row[0]:15} : {row[1]:,} événements")
             stats.append("")
 
-            son_stats = self.db.execute_query("""
+            # Les résumés couvrent toutes les mesures de leur fenêtre: les mesures brutes
+            # gardées autour des événements ne sont comptées que hors des fenêtres résumées.
+            # Bande morte: une mesure brute vaut jusqu'à la suivante, elle compte pour autant
+            # de secondes, comme nbMesures pour un résumé. L'écart est plafonné au battement
+            # plus une période de mesure (1 s): un battement arrive 60 à 61 s après la ligne
+            # précédente, au-delà c'est une interruption de la capture.
+            poids_max = int(BANDE_MORTE_BATTEMENT) + 1
+            son_stats = self.db.execute_query(f"""
                 SELECT
-                    AVG(d.mesure) AS moyenne,
-                    MAX(d.mesure) AS maximum,
-                    MIN(d.mesure) AS minimum
-                FROM Donnees d
-                JOIN Capteur c ON d.idCapteur = c.idCapteur_PK
-                WHERE c.type = N'BRUIT'
+                    SUM(s.total) / NULLIF(SUM(s.nb), 0) AS moyenne,
+                    MAX(s.maximum) AS maximum,
+                    MIN(s.minimum) AS minimum
+                FROM (
+                    SELECT SUM(d.mesure * d.poids) AS total, SUM(d.poids) AS nb,
+                           MAX(d.mesure) AS maximum, MIN(d.mesure) AS minimum
+                    FROM (
+                        SELECT b.idCapteur, b.dateHeure, b.mesure,
+                               CASE WHEN b.suivante IS NULL OR DATEDIFF(second, b.dateHeure, b.suivante) < 1
+                                    THEN 1
+                                    WHEN DATEDIFF(second, b.dateHeure, b.suivante) > {poids_max}
+                                    THEN {poids_max}
+                                    ELSE DATEDIFF(second, b.dateHeure, b.suivante) END AS poids
+                        FROM (
+                            SELECT idCapteur, dateHeure, mesure,
+                                   LEAD(dateHeure) OVER (PARTITION BY idCapteur ORDER BY dateHeure) AS suivante
+                            FROM Donnees
+                            WHERE idCapteur IN {self.references.ids_sql('BRUIT')}
+                        ) b
+                    ) d
+                    WHERE NOT EXISTS (
+                          SELECT 1 FROM DonneesResume r
+                          WHERE r.idCapteur = d.idCapteur
+                            AND d.dateHeure >= r.dateDebut AND d.dateHeure < r.dateFin
+                      )
+                    UNION ALL
+                    SELECT SUM(r.moyenne * r.nbMesures), SUM(r.nbMesures),
+                           MAX(r.maximum), MIN(r.minimum)
+                    FROM DonneesResume r
+                    WHERE r.idCapteur IN {self.references.ids_sql('BRUIT')}
+                ) s
             """)
 
             if son_stats and son_stats[0][0]:
@@ -0,0 +1,183 @@
+"""
+Ligne de base adaptative des micros
+Au lieu d'une calibration unique au démarrage, la valeur ADC au repos et le bruit
+de fond de chaque micro sont suivis en continu (moyenne mobile exponentielle):
+
+    - valeur au repos: moyenne (composante continue) de chaque fenêtre de mesure
+    - bruit de fond: L90 des fenêtres calmes (hors épisode de bruit fort)
+
+Le seuil de bruit fort suit le bruit de fond (fond + marge, jamais sous le seuil
+fixe). La dernière ligne de base est sauvegardée sur disque: au redémarrage, elle
+remplace les 2 secondes de calibration.
+"""
+
+import json
+import os
+import time
+from typing import Optional
+
+from config import LIGNE_BASE_CONSTANTE, LIGNE_BASE_MARGE_DB, LIGNE_BASE_AGE_MAX
+
+
+class LignesDeBase:
+    """Valeur au repos et bruit de fond suivis en continu, par canal du MCP3008"""
+
+    def __init__(self, chemin: Optional[str] = None,
+                 constante_temps: float = LIGNE_BASE_CONSTANTE,
+                 marge_db: float = LIGNE_BASE_MARGE_DB,
+                 age_max: float = LIGNE_BASE_AGE_MAX,
+                 intervalle_sauvegarde: float = 300.0):
+        """
+        Initialise le suivi
+
+        Args:
+            chemin: Fichier JSON de sauvegarde (défaut: None, pas de sauvegarde)
+            constante_temps: Constante de temps du suivi en secondes (défaut: config)
+            marge_db: Marge du seuil de bruit fort au-dessus du bruit de fond (défaut: config)
+            age_max: Âge maximum en secondes d'une sauvegarde utilisable (défaut: config)
+            intervalle_sauvegarde: Secondes minimum entre deux sauvegardes (défaut: 300)
+        """
+        self.chemin = chemin
+        self.constante_temps = constante_temps
+        self.marge_db = marge_db
+        self.age_max = age_max
+        self.intervalle_sauvegarde = intervalle_sauvegarde
+
+        self._canaux = {}  # Canal -> {'repos', 'fond', 'nb_repos', 'nb_fond'}
+        self._derniere_sauvegarde = time.monotonic()
+
+    def charger(self, canaux) -> bool:
+        """
+        Restaure la dernière ligne de base sauvegardée
+
+        Args:
+            canaux: Canaux nécessaires
+
+        Returns:
+            True si une sauvegarde récente couvre tous les canaux (calibration inutile)
+        """
+        if not self.chemin or not os.path.exists(self.chemin):
+            return False
+
+        try:
+            with open(self.chemin, encoding="utf-8") as f:
+                sauvegarde = json.load(f)
+
+            age = time.time() - sauvegarde['date']
+            if age > self.age_max:
+                print(f"⚠ Ligne de base sauvegardée trop ancienne ({age / 3600:.0f} h) - ignorée")
+                return False
+
+            etats = {int(canal): etat for canal, etat in sauvegarde['canaux'].items()}
+            if any(canal not in etats for canal in canaux):
+                return False
+
+            self._canaux.update(etats)
+            return True
+
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"⚠ Ligne de base illisible ({self.chemin}): {e}")
+            return False
+
+    def sauvegarder(self, forcer: bool = False) -> bool:
+        """
+        Écrit la ligne de base sur disque (remplacement atomique du fichier)
+
+        Args:
+            forcer: Ignorer l'intervalle minimum entre deux sauvegardes (défaut: False)
+
+        Returns:
+            True si le fichier a été écrit
+        """
+        if not self.chemin or not self._canaux:
+            return False
+        if not forcer and time.monotonic() - self._derniere_sauvegarde < self.intervalle_sauvegarde:
+            return False
+
+        try:
+            dossier = os.path.dirname(self.chemin)
+            if dossier:
+                os.makedirs(dossier, exist_ok=True)
+
+            temporaire = self.chemin + ".tmp"
+            with open(temporaire, "w", encoding="utf-8") as f:
+                json.dump({'date': time.time(),
+                           'canaux': {str(canal): etat for canal, etat in self._canaux.items()}}, f)
+            os.replace(temporaire, self.chemin)
+
+            self._derniere_sauvegarde = time.monotonic()
+            return True
+
+        except OSError as e:
+            print(f"⚠ Sauvegarde de la ligne de base impossible: {e}")
+            return False
+
+    def initialiser(self, canal: int, valeur_repos: float, niveau_fond: Optional[float] = None):
+        """
+        Fixe la ligne de base d'un canal (calibration ou valeur par défaut)
+
+        Args:
+            canal: Canal du MCP3008
+            valeur_repos: Valeur ADC au repos
+            niveau_fond: Bruit de fond en dB (défaut: None, appris des premières mesures)
+        """
+        self._canaux[canal] = {'repos': float(valeur_repos), 'fond': niveau_fond,
+                               'nb_repos': 1, 'nb_fond': 1 if niveau_fond is not None else 0}
+
+    def mettre_a_jour(self, canal: int, mesure: dict, calme: bool):
+        """
+        Fait suivre la ligne de base d'un canal avec une mesure
+
+        Les premières mesures comptent autant que la moyenne (moyenne cumulée),
+        puis le poids de chaque mesure devient durée / constante de temps.
+
+        Args:
+            canal: Canal du MCP3008
+            mesure: Dictionnaire de mesure (moyenne, l90, duree)
+            calme: La mesure peut compter pour le bruit de fond (hors épisode de bruit fort)
+        """
+        etat = self._canaux.setdefault(canal, {'repos': None, 'fond': None,
+                                               'nb_repos': 0, 'nb_fond': 0})
+        poids_temps = mesure.get('duree', 1.0) / self.constante_temps
+
+        etat['nb_repos'] += 1
+        etat['repos'] = self._suivre(etat['repos'], mesure['moyenne'],
+                                     max(poids_temps, 1.0 / etat['nb_repos']))
+
+        if calme:
+            etat['nb_fond'] += 1
+            etat['fond'] = self._suivre(etat['fond'], mesure['l90'],
+                                        max(poids_temps, 1.0 / etat['nb_fond']))
+
+        self.sauvegarder()
+
+    def valeur_repos(self, canal: int) -> Optional[float]:
+        """Valeur ADC au repos du canal (None si inconnue)"""
+        return self._canaux.get(canal, {}).get('repos')
+
+    def niveau_fond(self, canal: int) -> Optional[float]:
+        """Bruit de fond du canal en dB (None si inconnu)"""
+        return self._canaux.get(canal, {}).get('fond')
+
+    def seuil(self, canal: int, seuil_min: float) -> float:
+        """
+        Seuil de bruit fort du canal
+
+        Args:
+            canal: Canal du MCP3008
+            seuil_min: Seuil fixe, utilisé tant que le bruit de fond est inconnu
+
+        Returns:
+            max(seuil_min, bruit de fond + marge) en dB
+        """
+        fond = self.niveau_fond(canal)
+        if fond is None:
+            return seuil_min
+        return max(seuil_min, fond + self.marge_db)
+
+    @staticmethod
+    def _suivre(actuelle: Optional[float], valeur: float, poids: float) -> float:
+        """Moyenne mobile exponentielle"""
+        if actuelle is None:
+            return float(valeur)
+        return actuelle + poids * (float(valeur) - actuelle)
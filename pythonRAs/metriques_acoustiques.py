@@ -0,0 +1,127 @@
+"""
+Métriques acoustiques vectorisées (NumPy) sur une fenêtre d'échantillons du micro
+Toutes les mesures de son passent par ce module: même formule de dB partout.
+
+Le niveau est calculé sur le signal centré (composante continue du micro retirée):
+    dB SPL = 20 * log10(RMS en unités ADC) + MICRO_DB_DECALAGE
+MICRO_DB_DECALAGE se règle une fois avec un sonomètre (voir config.py).
+
+La fenêtre est découpée en sous-fenêtres de 125 ms (pondération « fast ») pour
+Lmax et les niveaux statistiques L10/L50/L90 (niveau dépassé 10/50/90 % du temps).
+"""
+
+from typing import Optional
+
+import numpy as np
+
+from config import MICRO_DB_DECALAGE
+
+DUREE_SOUS_FENETRE = 0.125   # Secondes (constante de temps « fast »)
+NIVEAU_MIN_DB = 0.0          # Bornes acceptées par Donnees.mesure pour un capteur BRUIT
+NIVEAU_MAX_DB = 120.0
+
+_PLANCHER_CARRE = 1e-12      # Évite log10(0) sur un signal parfaitement constant
+
+
+def niveau_db(carre_moyen, decalage_db: float = MICRO_DB_DECALAGE):
+    """
+    Niveau calibré en dB SPL à partir d'une moyenne quadratique (unités ADC²)
+
+    Args:
+        carre_moyen: Moyenne des carrés du signal centré (scalaire ou tableau)
+        decalage_db: dB SPL d'un signal de RMS 1 unité ADC (défaut: config)
+
+    Returns:
+        Niveau en dB, borné à [0, 120] (même forme que carre_moyen)
+    """
+    niveaux = 10.0 * np.log10(np.maximum(carre_moyen, _PLANCHER_CARRE)) + decalage_db
+    return np.clip(niveaux, NIVEAU_MIN_DB, NIVEAU_MAX_DB)
+
+
+def moyenne_energetique(niveaux) -> Optional[float]:
+    """
+    Leq de plusieurs niveaux de même durée (moyenne des énergies, pas des dB)
+
+    Args:
+        niveaux: Niveaux en dB
+
+    Returns:
+        Niveau équivalent en dB, None si la liste est vide
+    """
+    niveaux = np.asarray(niveaux, dtype=np.float64)
+    if niveaux.size == 0:
+        return None
+    return float(10.0 * np.log10(np.mean(10.0 ** (niveaux / 10.0))))
+
+
+def calculer_metriques(valeurs: np.ndarray, frequence: float,
+                       decalage_db: float = MICRO_DB_DECALAGE,
+                       duree_sous_fenetre: float = DUREE_SOUS_FENETRE) -> Optional[dict]:
+    """
+    Calcule toutes les métriques d'une fenêtre d'échantillons bruts
+
+    Args:
+        valeurs: Échantillons ADC (0-1023) de la fenêtre, dans l'ordre
+        frequence: Fréquence d'échantillonnage en Hz
+        decalage_db: Calibration, dB SPL d'un RMS de 1 unité ADC (défaut: config)
+        duree_sous_fenetre: Durée des sous-fenêtres pour Lmax et Lxx (défaut: 0.125 s)
+
+    Returns:
+        Dictionnaire avec moyenne (composante continue), amplitude (crête à crête),
+        rms, crete (écart max au repos, unités ADC), niveau_db (= leq), leq, lmax,
+        lcrete (crête en dB), l10, l50, l90, duree et niveaux_rapides (tableau des
+        niveaux par sous-fenêtre, pour agréger plusieurs fenêtres); None si la fenêtre est vide
+    """
+    valeurs = np.asarray(valeurs)
+    n = len(valeurs)
+    if n == 0:
+        return None
+
+    signal = valeurs.astype(np.float32)
+    moyenne = float(signal.mean())
+    signal -= moyenne
+
+    carres = signal * signal
+    carre_moyen = float(carres.mean())
+
+    # Niveaux « fast »: une valeur par sous-fenêtre complète (toute la fenêtre si elle est plus courte)
+    taille = max(1, int(round(duree_sous_fenetre * frequence)))
+    nb_sous = n // taille
+    if nb_sous > 0:
+        carres_sous = carres[:nb_sous * taille].reshape(nb_sous, taille).mean(axis=1)
+    else:
+        carres_sous = np.array([carre_moyen], dtype=np.float32)
+    niveaux = niveau_db(carres_sous, decalage_db)
+    l90, l50, l10 = np.percentile(niveaux, [10, 50, 90])
+
+    crete = float(np.abs(signal).max())
+    leq = float(niveau_db(carre_moyen, decalage_db))
+
+    return {
+        'moyenne': moyenne,
+        'amplitude': int(valeurs.max()) - int(valeurs.min()),
+        'rms': carre_moyen ** 0.5,
+        'crete': crete,
+        'niveau_db': leq,
+        'leq': leq,
+        'lmax': float(niveaux.max()),
+        'lcrete': float(niveau_db(crete * crete, decalage_db)),
+        'l10': float(l10),
+        'l50': float(l50),
+        'l90': float(l90),
+        'duree': n / frequence,
+        'niveaux_rapides': niveaux
+    }
+
+
+if __name__ == "__main__":
+    # Exemple: sinusoïde de 1 kHz (amplitude 100) puis silence, à 8 kHz
+    frequence = 8000
+    t = np.arange(frequence) / frequence
+    valeurs = np.concatenate((512 + 100 * np.sin(2 * np.pi * 1000 * t),
+                              np.full(frequence, 512.0))).astype(np.uint16)
+
+    metriques = calculer_metriques(valeurs, frequence)
+    for cle, valeur in metriques.items():
+        if cle != 'niveaux_rapides':
+            print(f"  {cle}: {valeur:.2f}")
@@ -0,0 +1,204 @@
+"""
+Pipeline à étages avec files bornées
+Chaque étage a son thread et sa file d'entrée de taille fixe. Quand la file est
+pleine, la politique de l'étage décide: attendre une place (BLOQUER), jeter
+l'élément le plus ancien (SUPPRIMER_ANCIEN) ou le nouveau (SUPPRIMER_NOUVEAU).
+Un étage lent (envoi vers la BD) ne ralentit ainsi plus le producteur (capture).
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+# Politiques quand la file d'un étage est pleine
+BLOQUER = "bloquer"
+SUPPRIMER_ANCIEN = "supprimer_ancien"
+SUPPRIMER_NOUVEAU = "supprimer_nouveau"
+
+
+class Etage:
+    """Étage de pipeline: file bornée + thread de traitement"""
+
+    def __init__(self, nom: str, traiter: Callable, taille_file: int = 2,
+                 politique: str = BLOQUER, suivant: Optional["Etage"] = None,
+                 terminer: Optional[Callable] = None):
+        """
+        Initialise l'étage (le thread démarre avec demarrer())
+
+        Args:
+            nom: Nom de l'étage (thread, statistiques)
+            traiter: Fonction appelée pour chaque élément; son résultat, s'il n'est pas
+                     None, est déposé dans l'étage suivant
+            taille_file: Nombre maximum d'éléments en attente (défaut: 2)
+            politique: BLOQUER, SUPPRIMER_ANCIEN ou SUPPRIMER_NOUVEAU (défaut: BLOQUER)
+            suivant: Étage qui reçoit les résultats (défaut: None)
+            terminer: Fonction appelée par le thread de l'étage avant de s'arrêter,
+                      ex. db.release_connection (défaut: None)
+        """
+        if politique not in (BLOQUER, SUPPRIMER_ANCIEN, SUPPRIMER_NOUVEAU):
+            raise ValueError(f"Politique inconnue: {politique}")
+
+        self.nom = nom
+        self.traiter = traiter
+        self.taille_file = max(1, taille_file)
+        self.politique = politique
+        self.suivant = suivant
+        self.terminer = terminer
+
+        self._file = deque()
+        self._condition = threading.Condition()
+        self._arret = False
+        self._en_cours = 0
+        self._thread = None
+
+        # Statistiques
+        self.compteur_recus = 0
+        self.compteur_traites = 0
+        self.compteur_supprimes = 0
+        self.compteur_erreurs = 0
+        self.profondeur_max = 0
+        self.temps_traitement = 0.0
+        self.temps_blocage = 0.0  # Temps passé par les producteurs à attendre une place
+        self.debut = None
+
+    def demarrer(self):
+        """Démarre le thread de l'étage"""
+        self.debut = time.monotonic()
+        self._thread = threading.Thread(target=self._boucle, name=f"etage-{self.nom}", daemon=True)
+        self._thread.start()
+
+    def deposer(self, element) -> bool:
+        """
+        Ajoute un élément à la file selon la politique de l'étage
+
+        Args:
+            element: Élément à traiter
+
+        Returns:
+            False si l'élément a été jeté (SUPPRIMER_NOUVEAU avec la file pleine, ou arrêt)
+        """
+        with self._condition:
+            if self._arret:
+                return False
+            self.compteur_recus += 1
+
+            if len(self._file) >= self.taille_file:
+                if self.politique == SUPPRIMER_NOUVEAU:
+                    self.compteur_supprimes += 1
+                    return False
+                if self.politique == SUPPRIMER_ANCIEN:
+                    self._file.popleft()
+                    self.compteur_supprimes += 1
+                else:
+                    debut = time.monotonic()
+                    while len(self._file) >= self.taille_file and not self._arret:
+                        self._condition.wait()
+                    self.temps_blocage += time.monotonic() - debut
+                    if self._arret:
+                        return False
+
+            self._file.append(element)
+            self.profondeur_max = max(self.profondeur_max, len(self._file))
+            self._condition.notify_all()
+            return True
+
+    def profondeur(self) -> int:
+        """Éléments en attente dans la file"""
+        with self._condition:
+            return len(self._file)
+
+    def vide(self) -> bool:
+        """File vide et aucun élément en cours de traitement"""
+        with self._condition:
+            return not self._file and not self._en_cours
+
+    def arreter(self, timeout: float = 10.0):
+        """
+        Arrête le thread de l'étage (la file restante est traitée jusqu'au timeout)
+
+        Args:
+            timeout: Attente maximale en secondes (défaut: 10)
+        """
+        limite = time.monotonic() + timeout
+        with self._condition:
+            while (self._file or self._en_cours) and time.monotonic() < limite:
+                self._condition.wait(limite - time.monotonic())
+            restants = len(self._file)
+            self._file.clear()
+            self._arret = True
+            self._condition.notify_all()
+
+        if restants:
+            self.compteur_supprimes += restants
+            print(f"⚠ Étage {self.nom}: {restants} élément(s) abandonné(s) à l'arrêt")
+
+        if self._thread is not None:
+            self._thread.join(timeout=max(0.0, limite - time.monotonic()) + 1.0)
+
+    def stats(self) -> dict:
+        """
+        Statistiques de l'étage
+
+        Returns:
+            Dictionnaire: nom, politique, recus, traites, supprimes, erreurs, profondeur,
+            profondeur_max, taille_file, debit (éléments traités par seconde),
+            duree_moyenne_ms (traitement d'un élément), blocage_s (attente des producteurs)
+        """
+        duree = time.monotonic() - self.debut if self.debut else 0.0
+        return {
+            'nom': self.nom,
+            'politique': self.politique,
+            'recus': self.compteur_recus,
+            'traites': self.compteur_traites,
+            'supprimes': self.compteur_supprimes,
+            'erreurs': self.compteur_erreurs,
+            'profondeur': self.profondeur(),
+            'profondeur_max': self.profondeur_max,
+            'taille_file': self.taille_file,
+            'debit': self.compteur_traites / duree if duree > 0 else 0.0,
+            'duree_moyenne_ms': (self.temps_traitement / self.compteur_traites * 1000
+                                 if self.compteur_traites else 0.0),
+            'blocage_s': self.temps_blocage
+        }
+
+    def resume(self) -> str:
+        """Ligne de bilan de l'étage"""
+        s = self.stats()
+        return (f"{s['nom']:8} | {s['traites']:5d} traité(s) ({s['debit']:.2f}/s, "
+                f"{s['duree_moyenne_ms']:.0f} ms) | {s['supprimes']} supprimé(s) | "
+                f"{s['erreurs']} erreur(s) | file {s['profondeur']}/{s['taille_file']} "
+                f"(max {s['profondeur_max']})")
+
+    def _boucle(self):
+        """Boucle du thread: traite les éléments de la file un par un"""
+        try:
+            while True:
+                with self._condition:
+                    while not self._file and not self._arret:
+                        self._condition.wait()
+                    if self._arret:
+                        return
+                    element = self._file.popleft()
+                    self._en_cours = 1
+                    self._condition.notify_all()
+
+                debut = time.monotonic()
+                try:
+                    resultat = self.traiter(element)
+                except Exception as e:
+                    resultat = None
+                    self.compteur_erreurs += 1
+                    print(f"✗ Étage {self.nom}: {e}")
+                self.temps_traitement += time.monotonic() - debut
+                self.compteur_traites += 1
+
+                if resultat is not None and self.suivant is not None:
+                    self.suivant.deposer(resultat)
+
+                with self._condition:
+                    self._en_cours = 0
+                    self._condition.notify_all()
+        finally:
+            if self.terminer is not None:
+                self.terminer()
@@ -0,0 +1,141 @@
+"""
+Cadence des boucles de capture sur l'horloge monotone
+Les échéances sont absolues (départ + n x période): le temps de mesure et
+la latence de la BD ne s'ajoutent plus à la période, la cadence ne dérive pas.
+Une échéance dépassée de plus d'une période est comptée comme manquée et
+sautée (pas de rafale pour rattraper le retard).
+"""
+
+import math
+import time
+from threading import Event
+from typing import Optional
+
+
+class Planificateur:
+    """Échéances périodiques absolues, avec retard, gigue et échéances manquées"""
+
+    def __init__(self, periode: float, nom: str = "", arret: Optional[Event] = None):
+        """
+        Initialise la cadence (la première échéance est une période après la création)
+
+        Args:
+            periode: Période en secondes
+            nom: Nom affiché dans les messages (défaut: "")
+            arret: Événement qui interrompt l'attente (défaut: None)
+        """
+        if periode <= 0:
+            raise ValueError("La période doit être positive")
+
+        self.periode = float(periode)
+        self.nom = nom
+        self.arret = arret
+        self.debut = time.monotonic()
+        self.echeance = self.debut + self.periode
+
+        # Statistiques (retard = réveil - échéance)
+        self.ticks = 0
+        self.echeances_manquees = 0
+        self.ticks_en_retard = 0
+        self.retard_max = 0.0
+        self._retard_moyen = 0.0
+        self._retard_m2 = 0.0  # Somme des carrés des écarts (Welford) pour la gigue
+
+    def attendre(self) -> bool:
+        """
+        Attend la prochaine échéance
+
+        Returns:
+            False si l'arrêt a été demandé pendant l'attente, True sinon
+        """
+        maintenant = time.monotonic()
+
+        # Plus d'une période de retard: sauter les échéances passées
+        if maintenant - self.echeance > self.periode:
+            sautees = int((maintenant - self.echeance) // self.periode)
+            self.echeance += sautees * self.periode
+            self.echeances_manquees += sautees
+            prefixe = f"{self.nom}: " if self.nom else ""
+            print(f"⚠ {prefixe}{sautees} échéance(s) manquée(s) "
+                  f"(travail plus long que la période de {self.periode:g}s)")
+
+        attente = self.echeance - maintenant
+        if attente > 0:
+            if self.arret is not None:
+                if self.arret.wait(attente):
+                    return False
+            else:
+                time.sleep(attente)
+        else:
+            self.ticks_en_retard += 1
+
+        self._noter(time.monotonic() - self.echeance)
+        self.echeance += self.periode
+        return self.arret is None or not self.arret.is_set()
+
+    def echu(self, tolerance: Optional[float] = None) -> bool:
+        """
+        Échéance atteinte, sans attendre (cadence secondaire dans une autre boucle)
+
+        Interrogée par une autre boucle, l'échéance est presque toujours dépassée de
+        quelques instants: le tick n'est compté en retard que si des échéances ont été
+        sautées ou si le retard dépasse la tolérance.
+
+        Args:
+            tolerance: Retard accepté en secondes, typiquement la période de la boucle
+                       qui interroge (défaut: None = seules les échéances sautées comptent)
+
+        Returns:
+            True si l'échéance est passée (la suivante est alors programmée)
+        """
+        maintenant = time.monotonic()
+        if maintenant < self.echeance:
+            return False
+
+        sautees = int((maintenant - self.echeance) // self.periode)
+        self.echeances_manquees += sautees
+        self.echeance += sautees * self.periode
+        if sautees or (tolerance is not None and maintenant - self.echeance > tolerance):
+            self.ticks_en_retard += 1
+        self._noter(maintenant - self.echeance)
+        self.echeance += self.periode
+        return True
+
+    def _noter(self, retard: float):
+        """Ajoute un retard aux statistiques"""
+        retard = max(retard, 0.0)
+        self.ticks += 1
+        self.retard_max = max(self.retard_max, retard)
+        ecart = retard - self._retard_moyen
+        self._retard_moyen += ecart / self.ticks
+        self._retard_m2 += ecart * (retard - self._retard_moyen)
+
+    def stats(self) -> dict:
+        """
+        Statistiques de cadence
+
+        Returns:
+            Dictionnaire: periode, ticks, echeances_manquees, ticks_en_retard,
+            retard_moyen_ms, retard_max_ms, gigue_ms (écart-type du retard),
+            periode_mesuree (durée écoulée / ticks, en secondes)
+        """
+        duree = time.monotonic() - self.debut
+        return {
+            'periode': self.periode,
+            'ticks': self.ticks,
+            'echeances_manquees': self.echeances_manquees,
+            'ticks_en_retard': self.ticks_en_retard,
+            'retard_moyen_ms': self._retard_moyen * 1000,
+            'retard_max_ms': self.retard_max * 1000,
+            'gigue_ms': math.sqrt(self._retard_m2 / self.ticks) * 1000 if self.ticks else 0.0,
+            'periode_mesuree': duree / self.ticks if self.ticks else 0.0
+        }
+
+    def resume(self) -> str:
+        """Ligne de bilan pour l'affichage à l'arrêt"""
+        s = self.stats()
+        prefixe = f"{self.nom}: " if self.nom else ""
+        return (f"⏱ {prefixe}{s['ticks']} tick(s) de {s['periode']:g}s, "
+                f"{s['echeances_manquees']} échéance(s) manquée(s), "
+                f"retard moyen {s['retard_moyen_ms']:.1f} ms (max {s['retard_max_ms']:.1f} ms), "
+                f"gigue {s['gigue_ms']:.1f} ms")
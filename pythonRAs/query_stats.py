@@ -0,0 +1,209 @@
+"""
+Instrumentation des requêtes SQL de DatabaseConnection
+Latence par requête normalisée (histogramme), lignes et octets transférés,
+journal des requêtes lentes
+"""
+
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Optional
+
+# Bornes supérieures (ms) des classes de l'histogramme de latence
+BORNES_HISTOGRAMME_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+_RE_CHAINE = re.compile(r"N?'(?:[^']|'')*'")
+_RE_HEXA = re.compile(r"\b0x[0-9a-fA-F]*\b")
+_RE_NOMBRE = re.compile(r"(?<![\w@.])-?\d+(?:\.\d+)?\b")
+_RE_LISTE_IN = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_RE_ESPACES = re.compile(r"\s+")
+
+
+def normalize_statement(sql: str, longueur_max: int = 200) -> str:
+    """
+    Ramène une requête à sa forme générique pour regrouper les statistiques
+
+    Les littéraux (chaînes, nombres, binaires) deviennent '?', les listes IN (...)
+    deviennent IN (?...) et les espaces sont compactés.
+
+    Args:
+        sql: Texte de la requête
+        longueur_max: Longueur maximale de la clé retournée
+
+    Returns:
+        Requête normalisée
+    """
+    texte = _RE_CHAINE.sub("?", sql)
+    texte = _RE_HEXA.sub("?", texte)
+    texte = _RE_NOMBRE.sub("?", texte)
+    texte = _RE_LISTE_IN.sub("IN (?...)", texte)
+    texte = _RE_ESPACES.sub(" ", texte).strip()
+    return texte[:longueur_max]
+
+
+def payload_size(valeurs) -> int:
+    """Octets approximatifs d'une suite de valeurs (BLOB et textes)"""
+    if not valeurs:
+        return 0
+    total = 0
+    for v in valeurs:
+        if isinstance(v, (bytes, bytearray, memoryview, str)):
+            total += len(v)
+    return total
+
+
+class QueryStats:
+    """Statistiques cumulées des requêtes, partagées entre les threads"""
+
+    def __init__(self, seuil_lent_ms: float = 500.0, journal_lent: Optional[str] = None,
+                 max_lentes: int = 100, verbose: bool = False):
+        """
+        Initialise les compteurs
+
+        Args:
+            seuil_lent_ms: Durée (ms) au-delà de laquelle une requête est journalisée comme lente
+            journal_lent: Fichier où ajouter les requêtes lentes (optionnel)
+            max_lentes: Nombre de requêtes lentes conservées en mémoire
+            verbose: Afficher aussi les requêtes lentes dans la console
+        """
+        self.seuil_lent_ms = seuil_lent_ms
+        self.journal_lent = journal_lent
+        self.verbose = verbose
+
+        self._lock = threading.Lock()
+        self._par_requete = {}
+        self._lentes = deque(maxlen=max_lentes)
+        self._debut = time.time()
+
+    def record(self, sql: str, duree_s: float, lignes: int = 0, octets: int = 0,
+               erreur: bool = False):
+        """
+        Enregistre l'exécution d'une requête
+
+        Args:
+            sql: Texte de la requête
+            duree_s: Durée en secondes
+            lignes: Lignes lues ou écrites
+            octets: Octets transférés (paramètres et résultats)
+            erreur: True si la requête a échoué
+        """
+        cle = normalize_statement(sql)
+        duree_ms = duree_s * 1000
+
+        with self._lock:
+            stats = self._par_requete.get(cle)
+            if stats is None:
+                stats = {
+                    'appels': 0,
+                    'erreurs': 0,
+                    'total_ms': 0.0,
+                    'min_ms': None,
+                    'max_ms': 0.0,
+                    'lignes': 0,
+                    'octets': 0,
+                    'histogramme': [0] * (len(BORNES_HISTOGRAMME_MS) + 1),
+                }
+                self._par_requete[cle] = stats
+
+            stats['appels'] += 1
+            stats['erreurs'] += int(erreur)
+            stats['total_ms'] += duree_ms
+            stats['min_ms'] = duree_ms if stats['min_ms'] is None else min(stats['min_ms'], duree_ms)
+            stats['max_ms'] = max(stats['max_ms'], duree_ms)
+            stats['lignes'] += lignes
+            stats['octets'] += octets
+            stats['histogramme'][self._classe(duree_ms)] += 1
+
+            lente = duree_ms >= self.seuil_lent_ms
+            if lente:
+                entree = {
+                    'date': datetime.now(),
+                    'requete': cle,
+                    'duree_ms': duree_ms,
+                    'lignes': lignes,
+                    'octets': octets,
+                }
+                self._lentes.append(entree)
+
+        if lente:
+            self._journaliser(entree)
+
+    def snapshot(self) -> dict:
+        """
+        Retourne un instantané des statistiques
+
+        Returns:
+            Dictionnaire {'depuis_s', 'seuil_lent_ms', 'bornes_ms', 'requetes', 'lentes'};
+            'requetes' associe chaque requête normalisée à ses compteurs et à sa moyenne
+        """
+        with self._lock:
+            requetes = {}
+            for cle, stats in self._par_requete.items():
+                copie = dict(stats)
+                copie['histogramme'] = list(stats['histogramme'])
+                copie['moyenne_ms'] = stats['total_ms'] / stats['appels']
+                requetes[cle] = copie
+
+            return {
+                'depuis_s': time.time() - self._debut,
+                'seuil_lent_ms': self.seuil_lent_ms,
+                'bornes_ms': BORNES_HISTOGRAMME_MS,
+                'requetes': requetes,
+                'lentes': list(self._lentes),
+            }
+
+    def reset(self):
+        """Remet tous les compteurs à zéro"""
+        with self._lock:
+            self._par_requete = {}
+            self._lentes.clear()
+            self._debut = time.time()
+
+    def report(self, limite: int = 10) -> str:
+        """
+        Résumé texte des requêtes les plus coûteuses (temps cumulé)
+
+        Args:
+            limite: Nombre de requêtes affichées
+
+        Returns:
+            Texte prêt à afficher
+        """
+        instantane = self.snapshot()
+        lignes = ["─" * 100,
+                  f"{'Appels':>7} | {'Moy. ms':>8} | {'Max ms':>8} | {'Total ms':>10} | {'Lignes':>8} | Requête",
+                  "─" * 100]
+
+        tri = sorted(instantane['requetes'].items(), key=lambda kv: kv[1]['total_ms'], reverse=True)
+        for cle, stats in tri[:limite]:
+            lignes.append(f"{stats['appels']:7d} | {stats['moyenne_ms']:8.1f} | {stats['max_ms']:8.1f} | "
+                          f"{stats['total_ms']:10.1f} | {stats['lignes']:8d} | {cle[:50]}")
+
+        lignes.append("─" * 100)
+        lignes.append(f"Requêtes lentes (>= {self.seuil_lent_ms:.0f} ms): {len(instantane['lentes'])}")
+        return "\n".join(lignes)
+
+    @staticmethod
+    def _classe(duree_ms: float) -> int:
+        """Indice de la classe d'histogramme d'une durée"""
+        for i, borne in enumerate(BORNES_HISTOGRAMME_MS):
+            if duree_ms <= borne:
+                return i
+        return len(BORNES_HISTOGRAMME_MS)
+
+    def _journaliser(self, entree: dict):
+        """Écrit une requête lente dans la console et/ou le fichier journal"""
+        ligne = (f"{entree['date'].strftime('%Y-%m-%d %H:%M:%S')} | {entree['duree_ms']:8.1f} ms | "
+                 f"{entree['lignes']} ligne(s) | {entree['octets']} octet(s) | {entree['requete']}")
+
+        if self.verbose:
+            print(f"⚠ Requête lente: {ligne}")
+
+        if self.journal_lent:
+            try:
+                with open(self.journal_lent, 'a', encoding='utf-8') as f:
+                    f.write(ligne + "\n")
+            except OSError as e:
+                print(f"✗ Erreur écriture journal des requêtes lentes: {e}")
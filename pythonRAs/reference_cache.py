@@ -0,0 +1,161 @@
+"""
+Cache des données de référence (Capteur, Salle) partagé par le processus
+Les tables de référence changent rarement: elles sont lues une fois puis
+gardées en mémoire pendant ttl secondes, ou jusqu'à invalidation explicite
+(automatique quand DatabaseConnection écrit dans Capteur ou Salle).
+Les requêtes de tableau de bord filtrent alors sur idCapteur IN (...) au lieu
+de joindre Capteur pour tester c.type.
+"""
+
+import re
+import threading
+import time
+from typing import Optional
+
+_RE_ECRITURE_REFERENCE = re.compile(
+    r"\b(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM|MERGE\s+INTO)\s+(?:dbo\.)?\[?(Capteur|Salle)\b",
+    re.IGNORECASE
+)
+
+_partages = {}
+_partages_lock = threading.Lock()
+
+
+class ReferenceCache:
+    """Capteurs et salles en mémoire, rechargés après ttl secondes"""
+
+    def __init__(self, db, ttl: float = 300.0):
+        """
+        Initialise le cache (rien n'est lu avant le premier accès)
+
+        Args:
+            db: Connexion à la base de données (DatabaseConnection ou équivalent)
+            ttl: Durée de validité en secondes (défaut: 300)
+        """
+        self.db = db
+        self.ttl = ttl
+        self.chargements = 0
+
+        self._lock = threading.Lock()
+        self._tables = {}   # nom table -> (instant du chargement, {id: dict})
+
+    def sensors(self) -> dict:
+        """Capteurs: {idCapteur: {'id', 'nom', 'type'}}"""
+        return self._table('Capteur')
+
+    def rooms(self) -> dict:
+        """Salles: {idSalle: {'id', 'numero', 'capacite'}}"""
+        return self._table('Salle')
+
+    def sensor_ids(self, type_capteur: str) -> tuple:
+        """
+        IDs des capteurs d'un type, triés
+
+        Args:
+            type_capteur: Type du capteur (BRUIT, CAMERA, ...)
+
+        Returns:
+            Tuple des IDs (vide si aucun)
+        """
+        type_capteur = type_capteur.upper()
+        return tuple(sorted(i for i, c in self.sensors().items() if c['type'] == type_capteur))
+
+    def sensor_id(self, type_capteur: str) -> Optional[int]:
+        """Premier capteur d'un type, ou None"""
+        ids = self.sensor_ids(type_capteur)
+        return ids[0] if ids else None
+
+    def sensor_id_by_name(self, nom: str) -> Optional[int]:
+        """ID du capteur portant ce nom, ou None"""
+        for i, c in self.sensors().items():
+            if c['nom'] == nom:
+                return i
+        return None
+
+    def sensor_type(self, id_capteur: int) -> Optional[str]:
+        """Type d'un capteur, ou None s'il est inconnu"""
+        capteur = self.sensors().get(id_capteur)
+        return capteur['type'] if capteur else None
+
+    def ids_sql(self, type_capteur: str) -> str:
+        """
+        Liste SQL des capteurs d'un type, à utiliser après IN
+
+        Les IDs sont des entiers issus de la BD, insérés tels quels dans la
+        requête (aucun risque d'injection). Sans capteur, (NULL) ne correspond
+        à aucune ligne.
+
+        Args:
+            type_capteur: Type du capteur (BRUIT, CAMERA, ...)
+
+        Returns:
+            Fragment SQL, ex: '(1, 4)'
+        """
+        ids = self.sensor_ids(type_capteur)
+        if not ids:
+            return "(NULL)"
+        return "(" + ", ".join(str(int(i)) for i in ids) + ")"
+
+    def invalidate(self, table: Optional[str] = None):
+        """
+        Oublie une table (ou tout le cache): elle sera relue au prochain accès
+
+        Args:
+            table: 'Capteur' ou 'Salle' (défaut: les deux)
+        """
+        with self._lock:
+            if table is None:
+                self._tables.clear()
+            else:
+                self._tables.pop(table.capitalize(), None)
+
+    def _table(self, table: str) -> dict:
+        """Contenu d'une table de référence, relu si absent ou expiré"""
+        with self._lock:
+            entree = self._tables.get(table)
+            if entree is not None and time.monotonic() - entree[0] < self.ttl:
+                return entree[1]
+
+            if table == 'Capteur':
+                lignes = self.db.execute_query("SELECT idCapteur_PK, nom, type FROM Capteur")
+                contenu = {l[0]: {'id': l[0], 'nom': l[1], 'type': (l[2] or '').upper()} for l in lignes}
+            else:
+                lignes = self.db.execute_query("SELECT idSalle_PK, numero, capaciteMaximale FROM Salle")
+                contenu = {l[0]: {'id': l[0], 'numero': l[1], 'capacite': l[2]} for l in lignes}
+
+            self._tables[table] = (time.monotonic(), contenu)
+            self.chargements += 1
+            return contenu
+
+
+def shared_cache(db, ttl: float = 300.0) -> ReferenceCache:
+    """
+    Cache partagé par toutes les connexions du processus vers la même base
+
+    Args:
+        db: Connexion à la base de données
+        ttl: Durée de validité en secondes, utilisée à la création (défaut: 300)
+
+    Returns:
+        Le cache de cette base
+    """
+    cle = (db.server, db.database)
+    with _partages_lock:
+        cache = _partages.get(cle)
+        if cache is None:
+            cache = _partages[cle] = ReferenceCache(db, ttl)
+        return cache
+
+
+def invalidate_shared(db, table: Optional[str] = None):
+    """Invalide le cache partagé d'une base (s'il existe)"""
+    with _partages_lock:
+        cache = _partages.get((db.server, db.database))
+    if cache is not None:
+        cache.invalidate(table)
+
+
+def invalidate_for_statement(db, sql: str):
+    """Invalide le cache partagé si la requête écrit dans Capteur ou Salle"""
+    for m in _RE_ECRITURE_REFERENCE.finditer(sql):
+        invalidate_shared(db, m.group(1))
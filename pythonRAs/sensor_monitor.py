@@ -17,18 +17,23 @@ except ImportError:
     CAMERA_AVAILABLE = False
 
 from db_connection import DatabaseConnection
+from planificateur import Planificateur
+from reference_cache import shared_cache
 
 
 class SensorMonitor:
     """Gère le monitoring des capteurs et l'envoi des données vers la BD"""
 
-    def __init__(self, db_connection: DatabaseConnection, id_salle: int):
+    def __init__(self, db_connection: DatabaseConnection, id_salle: int,
+                 prechauffage_camera: float = 2.0):
         """
         Initialise le moniteur de capteurs
 
         Args:
             db_connection: Instance de connexion à la base de données
             id_salle: ID de la salle à monitorer
+            prechauffage_camera: Secondes d'ajustement de la caméra, une seule fois
+                                 au démarrage du flux (défaut: 2.0)
         """
         self.db = db_connection
         self.id_salle = id_salle
@@ -42,8 +47,10 @@ class SensorMonitor:
         self.adc_channel = 0  # Canal ADC pour le micro
         self.sound_pin = 18   # Pin digital si vous utilisez un module avec sortie digitale
 
-        # Configuration caméra
+        # Configuration caméra (le flux reste démarré entre deux photos)
         self.camera = None
+        self.camera_active = False
+        self.prechauffage_camera = prechauffage_camera
         self.photo_dir = "photos"
 
         # IDs des capteurs (à récupérer de la BD)
@@ -64,35 +71,27 @@ class SensorMonitor:
 
         # Récupérer les IDs des capteurs depuis la BD
         try:
-            capteurs = self.db.execute_query(
-                "SELECT idCapteur_PK, nom, type FROM Capteur WHERE type IN ('BRUIT', 'CAMERA')"
-            )
+            references = shared_cache(self.db)
+            capteurs = references.sensors()
+            self.id_capteur_bruit = references.sensor_id('BRUIT')
+            self.id_capteur_camera = references.sensor_id('CAMERA')
 
-            for capteur in capteurs:
-                if capteur[2] == 'BRUIT':
-                    self.id_capteur_bruit = capteur[0]
-                    print(f"✓ Capteur BRUIT trouvé - ID: {capteur[0]}, Nom: {capteur[1]}")
-                elif capteur[2] == 'CAMERA':
-                    self.id_capteur_camera = capteur[0]
-                    print(f"✓ Capteur CAMERA trouvé - ID: {capteur[0]}, Nom: {capteur[1]}")
+            for id_capteur in (self.id_capteur_bruit, self.id_capteur_camera):
+                if id_capteur is not None:
+                    capteur = capteurs[id_capteur]
+                    print(f"✓ Capteur {capteur['type']} trouvé - ID: {id_capteur}, Nom: {capteur['nom']}")
 
             # Si les capteurs n'existent pas, les créer
             if self.id_capteur_bruit is None:
-                self.db.execute_non_query(
-                    "INSERT INTO Capteur (nom, type) VALUES (?, ?)",
-                    ('MIC-ELECTRET-1', 'BRUIT')
+                self.id_capteur_bruit = self.db.insert_returning_id(
+                    'Capteur', {'nom': 'MIC-ELECTRET-1', 'type': 'BRUIT'}, 'idCapteur_PK'
                 )
-                result = self.db.execute_query("SELECT @@IDENTITY AS id")
-                self.id_capteur_bruit = result[0][0]
                 print(f"✓ Capteur BRUIT créé - ID: {self.id_capteur_bruit}")
 
             if self.id_capteur_camera is None:
-                self.db.execute_non_query(
-                    "INSERT INTO Capteur (nom, type) VALUES (?, ?)",
-                    ('PICAM-V2-1', 'CAMERA')
+                self.id_capteur_camera = self.db.insert_returning_id(
+                    'Capteur', {'nom': 'PICAM-V2-1', 'type': 'CAMERA'}, 'idCapteur_PK'
                 )
-                result = self.db.execute_query("SELECT @@IDENTITY AS id")
-                self.id_capteur_camera = result[0][0]
                 print(f"✓ Capteur CAMERA créé - ID: {self.id_capteur_camera}")
 
         except Exception as e:
@@ -110,6 +109,8 @@ class SensorMonitor:
                 print(f"✗ Erreur d'initialisation de la caméra: {e}")
                 self.camera = None
 
+            self.demarrer_camera()
+
         print("✓ Configuration terminée\n")
         return True
 
@@ -139,10 +140,36 @@ class SensorMonitor:
 
         return sound_level
 
+    def demarrer_camera(self) -> bool:
+        """
+        Démarre le flux de la caméra et attend le préchauffage, une seule fois
+
+        Returns:
+            True si le flux tourne
+        """
+        if self.camera is None:
+            return False
+        if self.camera_active:
+            return True
+
+        try:
+            self.camera.start()
+            time.sleep(self.prechauffage_camera)  # Laisser le temps à la caméra de s'ajuster
+            self.camera_active = True
+            print(f"✓ Flux caméra démarré (préchauffage {self.prechauffage_camera:g}s)")
+            return True
+
+        except Exception as e:
+            print(f"✗ Erreur au démarrage du flux caméra: {e}")
+            return False
+
     def capture_photo(self) -> Optional[str]:
         """
         Capture une photo avec la Pi Camera
 
+        La photo est la prochaine image du flux déjà démarré: pas de préchauffage
+        ni de réinitialisation du capteur à chaque photo.
+
         Returns:
             Chemin de la photo capturée, ou None si erreur
         """
@@ -150,25 +177,37 @@ class SensorMonitor:
             print("⚠ Caméra non disponible")
             return None
 
+        if not self.demarrer_camera():
+            return None
+
         try:
             # Générer un nom de fichier unique avec timestamp
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"salle{self.id_salle}_{timestamp}.jpg"
             filepath = os.path.join(self.photo_dir, filename)
 
-            # Capturer la photo
-            self.camera.start()
-            time.sleep(2)  # Laisser le temps à la caméra de s'ajuster
+            # Capturer l'image suivante du flux
+            debut = time.monotonic()
             self.camera.capture_file(filepath)
-            self.camera.stop()
 
-            print(f"✓ Photo capturée: {filepath}")
+            print(f"✓ Photo capturée: {filepath} ({(time.monotonic() - debut) * 1000:.0f} ms)")
             return filepath
 
         except Exception as e:
             print(f"✗ Erreur lors de la capture photo: {e}")
+            # Flux peut-être interrompu: il sera redémarré à la prochaine photo
+            self.arreter_camera()
             return None
 
+    def arreter_camera(self):
+        """Arrête le flux de la caméra (sans la fermer)"""
+        if self.camera is not None and self.camera_active:
+            try:
+                self.camera.stop()
+            except Exception as e:
+                print(f"⚠ Arrêt du flux caméra: {e}")
+        self.camera_active = False
+
     def envoyer_donnee_bruit(self, niveau_sonore: float) -> Optional[int]:
         """
         Envoie une mesure de bruit vers la base de données
@@ -182,23 +221,24 @@ class SensorMonitor:
         try:
             date_heure = datetime.now()
 
-            # Insérer la donnée
-            self.db.execute_non_query(
-                """INSERT INTO Donnees (dateHeure, idCapteur, mesure, photo, noSalle)
-                   VALUES (?, ?, ?, NULL, ?)""",
-                (date_heure, self.id_capteur_bruit, niveau_sonore, self.id_salle)
-            )
+            # Bruit fort: donnée + événement en un seul lot et une seule transaction
+            if niveau_sonore > self.seuil_bruit_fort:
+                ids = self.db.insert_donnee_evenement(
+                    self.id_capteur_bruit, self.id_salle, 'BRUIT_FORT',
+                    f"Niveau sonore élevé: {niveau_sonore:.1f} dB",
+                    mesure=niveau_sonore, date_heure=date_heure
+                )
+                id_donnee = ids[0] if ids else None
+            else:
+                id_donnee = self.db.insert_donnee(self.id_capteur_bruit, self.id_salle,
+                                                  mesure=niveau_sonore, date_heure=date_heure)
 
-            # Récupérer l'ID de la donnée insérée
-            result = self.db.execute_query("SELECT @@IDENTITY AS id")
-            id_donnee = result[0][0]
+            if id_donnee is None:
+                return None
 
             print(f"📊 Bruit enregistré: {niveau_sonore:.1f} dB - ID: {id_donnee}")
-
-            # Créer un événement si bruit fort
             if niveau_sonore > self.seuil_bruit_fort:
-                self.creer_evenement('BRUIT_FORT', id_donnee,
-                                    f"Niveau sonore élevé: {niveau_sonore:.1f} dB")
+                print("⚡ Événement créé: BRUIT_FORT")
 
             return id_donnee
 
@@ -220,15 +260,14 @@ class SensorMonitor:
             date_heure = datetime.now()
 
             # Insérer la donnée
-            self.db.execute_non_query(
-                """INSERT INTO Donnees (dateHeure, idCapteur, mesure, photo, noSalle)
-                   VALUES (?, ?, NULL, ?, ?)""",
-                (date_heure, self.id_capteur_camera, chemin_photo, self.id_salle)
-            )
-
-            # Récupérer l'ID de la donnée insérée
-            result = self.db.execute_query("SELECT @@IDENTITY AS id")
-            id_donnee = result[0][0]
+            id_donnee = self.db.insert_returning_id('Donnees', {
+                'dateHeure': date_heure,
+                'idCapteur': self.id_capteur_camera,
+                'photo': chemin_photo,
+                'noSalle': self.id_salle,
+            })
+            if id_donnee is None:
+                return None
 
             print(f"📷 Photo enregistrée: {chemin_photo} - ID: {id_donnee}")
 
@@ -255,7 +294,8 @@ class SensorMonitor:
             self.db.execute_non_query(
                 """INSERT INTO Evenement (type, idDonnee, description)
                    VALUES (?, ?, ?)""",
-                (type_event, id_donnee, description)
+                (type_event, id_donnee, description),
+                durable=True
             )
             print(f"⚡ Événement créé: {type_event}")
 
@@ -275,7 +315,9 @@ class SensorMonitor:
         print(f"Intervalle capture photo: {intervalle_photo}s")
         print("Appuyez sur Ctrl+C pour arrêter\n")
 
-        dernier_temps_photo = time.time()
+        # Échéances absolues: la capture et l'envoi ne rallongent pas les périodes
+        cadence_bruit = Planificateur(intervalle_bruit, "Bruit")
+        cadence_photo = Planificateur(intervalle_photo, "Photo")
 
         try:
             while True:
@@ -283,26 +325,27 @@ class SensorMonitor:
                 niveau_sonore = self.read_sound_level()
                 self.envoyer_donnee_bruit(niveau_sonore)
 
-                # Capturer une photo si l'intervalle est écoulé
-                temps_actuel = time.time()
-                if temps_actuel - dernier_temps_photo >= intervalle_photo:
+                # Capturer une photo si son échéance est passée (vérifiée à chaque mesure de bruit)
+                if cadence_photo.echu(tolerance=intervalle_bruit):
                     chemin_photo = self.capture_photo()
                     if chemin_photo:
                         self.envoyer_donnee_photo(chemin_photo)
-                    dernier_temps_photo = temps_actuel
 
-                # Attendre avant la prochaine mesure
-                time.sleep(intervalle_bruit)
+                # Attendre l'échéance de la prochaine mesure
+                cadence_bruit.attendre()
 
         except KeyboardInterrupt:
             print("\n\n=== Arrêt du monitoring ===")
         finally:
+            print(cadence_bruit.resume())
+            print(cadence_photo.resume())
             self.cleanup()
 
     def cleanup(self):
         """Nettoie les ressources (GPIO, caméra)"""
         GPIO.cleanup()
         if self.camera:
+            self.arreter_camera()
             self.camera.close()
         print("✓ Ressources libérées")
 
@@ -310,7 +353,7 @@ class SensorMonitor:
 # Script principal
 if __name__ == "__main__":
     # Importer la configuration
-    from config import DB_SERVER, DB_NAME, DB_USERNAME, DB_PASSWORD, ID_SALLE
+    from config import DB_SERVER, DB_NAME, DB_USERNAME, DB_PASSWORD, ID_SALLE, CAMERA_PRECHAUFFAGE
 
     SERVER = DB_SERVER
     DATABASE = DB_NAME
@@ -326,8 +369,11 @@ if __name__ == "__main__":
         print("Impossible de se connecter à la base de données")
         exit(1)
 
+    # Mesures validées par groupes; les événements restent validés immédiatement
+    db.enable_group_commit(max_statements=20, max_delay_ms=2000)
+
     # Initialiser le moniteur
-    monitor = SensorMonitor(db, ID_SALLE)
+    monitor = SensorMonitor(db, ID_SALLE, prechauffage_camera=CAMERA_PRECHAUFFAGE)
 
     if not monitor.setup():
         print("Échec de la configuration des capteurs")
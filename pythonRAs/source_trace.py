@@ -0,0 +1,177 @@
+"""
+Rejeu de traces ADC enregistrées à la place du MCP3008
+Une trace est rejouée par EchantillonneurMCP3008 comme si elle venait de l'ADC,
+en temps réel ou accélérée (vitesse N x): on peut mesurer le débit réel de la
+chaîne audio et reproduire un incident du terrain sans matériel.
+
+Formats acceptés (selon l'extension):
+    .wav    PCM 8, 16 ou 32 bits, un canal WAV par canal ADC (ramené sur 0-1023)
+    .npy    Tableau NumPy (n,) ou (n, canaux) de valeurs ADC 0-1023
+    autre   Format binaire SalleSense (.adc): en-tête MAGIE, fréquence (uint32),
+            nombre de canaux (uint16), puis valeurs uint16 little-endian entrelacées
+"""
+
+import os
+import struct
+import wave
+from typing import Optional
+
+import numpy as np
+
+from config import ADC_FREQUENCE
+
+MAGIE = b"SSADC\x01"
+_ENTETE = struct.Struct("<6sIH")   # Magie, fréquence en Hz, nombre de canaux
+
+
+def charger_trace(chemin: str, frequence: Optional[float] = None) -> tuple:
+    """
+    Lit une trace ADC
+
+    Args:
+        chemin: Fichier .wav, .npy ou binaire SalleSense
+        frequence: Fréquence d'échantillonnage, seulement pour .npy (défaut: config)
+
+    Returns:
+        (valeurs uint16 de forme (n, canaux), fréquence en Hz)
+
+    Raises:
+        ValueError: Si le fichier n'est pas une trace valide
+    """
+    extension = os.path.splitext(chemin)[1].lower()
+
+    if extension == ".wav":
+        with wave.open(chemin, "rb") as f:
+            largeur = f.getsampwidth()
+            nb_canaux = f.getnchannels()
+            frequence = f.getframerate()
+            brut = f.readframes(f.getnframes())
+
+        # PCM signé (ou 8 bits non signé) ramené sur les 10 bits du MCP3008
+        if largeur == 1:
+            valeurs = np.frombuffer(brut, dtype=np.uint8).astype(np.uint16) << 2
+        elif largeur == 2:
+            valeurs = ((np.frombuffer(brut, dtype="<i2").astype(np.int32) + 32768) >> 6).astype(np.uint16)
+        elif largeur == 4:
+            valeurs = ((np.frombuffer(brut, dtype="<i4").astype(np.int64) + 2 ** 31) >> 22).astype(np.uint16)
+        else:
+            raise ValueError(f"WAV {largeur * 8} bits non supporté (8, 16 ou 32 bits)")
+        return valeurs.reshape(-1, nb_canaux), float(frequence)
+
+    if extension == ".npy":
+        valeurs = np.load(chemin)
+        if valeurs.ndim == 1:
+            valeurs = valeurs[:, None]
+        if valeurs.ndim != 2:
+            raise ValueError(f"Tableau de forme {valeurs.shape} (attendu: (n,) ou (n, canaux))")
+        return np.clip(valeurs, 0, 1023).astype(np.uint16), float(frequence or ADC_FREQUENCE)
+
+    with open(chemin, "rb") as f:
+        entete = f.read(_ENTETE.size)
+        if len(entete) < _ENTETE.size or entete[:len(MAGIE)] != MAGIE:
+            raise ValueError(f"{chemin}: pas une trace SalleSense (.wav, .npy ou .adc)")
+        _, frequence, nb_canaux = _ENTETE.unpack(entete)
+        valeurs = np.fromfile(f, dtype="<u2")
+    return valeurs[:len(valeurs) - len(valeurs) % nb_canaux].reshape(-1, nb_canaux), float(frequence)
+
+
+def enregistrer_trace(chemin: str, valeurs: np.ndarray, frequence: float):
+    """
+    Écrit une trace ADC (format choisi par l'extension, comme charger_trace)
+
+    Args:
+        chemin: Fichier .wav, .npy ou binaire SalleSense
+        valeurs: Valeurs ADC (n,) ou (n, canaux)
+        frequence: Fréquence d'échantillonnage en Hz
+    """
+    valeurs = np.asarray(valeurs, dtype=np.uint16)
+    if valeurs.ndim == 1:
+        valeurs = valeurs[:, None]
+    extension = os.path.splitext(chemin)[1].lower()
+
+    if extension == ".wav":
+        with wave.open(chemin, "wb") as f:
+            f.setnchannels(valeurs.shape[1])
+            f.setsampwidth(2)
+            f.setframerate(int(round(frequence)))
+            f.writeframes(((valeurs.astype(np.int32) << 6) - 32768).astype("<i2").tobytes())
+    elif extension == ".npy":
+        np.save(chemin, valeurs)
+    else:
+        with open(chemin, "wb") as f:
+            f.write(_ENTETE.pack(MAGIE, int(round(frequence)), valeurs.shape[1]))
+            f.write(valeurs.astype("<u2").tobytes())
+
+
+class SourceTrace:
+    """Source d'échantillons rejouant une trace, pour EchantillonneurMCP3008(source=...)"""
+
+    def __init__(self, chemin: str, vitesse: float = 1.0, boucle: bool = False,
+                 frequence: Optional[float] = None):
+        """
+        Charge la trace
+
+        Args:
+            chemin: Fichier de trace (.wav, .npy ou binaire SalleSense)
+            vitesse: Facteur d'accélération du rejeu (défaut: 1, temps réel)
+            boucle: Recommencer au début à la fin de la trace (défaut: False)
+            frequence: Fréquence d'une trace .npy (défaut: config)
+
+        Raises:
+            ValueError: Si la trace est invalide ou vide, ou la vitesse nulle
+        """
+        if vitesse <= 0:
+            raise ValueError("La vitesse de rejeu doit être positive")
+
+        self.chemin = chemin
+        self.vitesse = float(vitesse)
+        self.boucle = boucle
+        self.valeurs, self.frequence = charger_trace(chemin, frequence)
+        if len(self.valeurs) == 0:
+            raise ValueError(f"{chemin}: trace vide")
+
+        self.nb_canaux = self.valeurs.shape[1]
+        self.position = 0
+        self.tours = 0
+
+    @property
+    def duree(self) -> float:
+        """Durée de la trace en secondes (à vitesse réelle)"""
+        return len(self.valeurs) / self.frequence
+
+    def lire(self, n: int) -> np.ndarray:
+        """
+        Prochains n ticks de la trace
+
+        Args:
+            n: Nombre de ticks voulus
+
+        Returns:
+            Tableau (m, canaux) avec m <= n; vide à la fin d'une trace sans boucle
+        """
+        if self.position >= len(self.valeurs):
+            if not self.boucle:
+                return self.valeurs[:0]
+            self.position = 0
+            self.tours += 1
+
+        bloc = self.valeurs[self.position:self.position + n]
+        self.position += len(bloc)
+        return bloc
+
+
+if __name__ == "__main__":
+    # Exemple: enregistre 10 secondes du MCP3008 dans une trace rejouable
+    import time
+    from echantillonneur_adc import EchantillonneurMCP3008
+
+    chemin = "trace_micro.adc"
+    echantillonneur = EchantillonneurMCP3008(duree_tampon=12.0)
+    if echantillonneur.demarrer():
+        print(f"⏳ Enregistrement de 10 s ({'simulation' if echantillonneur.simulation else 'MCP3008'})...")
+        time.sleep(10)
+        valeurs = echantillonneur.derniers(10.0)
+        echantillonneur.arreter()
+        enregistrer_trace(chemin, valeurs, echantillonneur.frequence)
+        print(f"✓ Trace écrite: {chemin} ({len(valeurs)} échantillons à {echantillonneur.frequence:.0f} Hz)")
+        print("   Pour la rejouer: ADC_TRACE = \"trace_micro.adc\" dans config.py")
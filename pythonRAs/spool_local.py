@@ -0,0 +1,426 @@
+"""
+Spool local (store-and-forward) entre les scripts de capture et la BD
+Les mesures sont d'abord écrites dans un fichier SQLite (mode WAL) puis
+rejouées par lots vers SQL Server par un thread de vidage.
+La cadence de capture ne dépend plus de la latence ni de la disponibilité de la BD.
+Une ligne que la BD refuse définitivement (contrainte, déclencheur, donnée invalide)
+est déplacée dans la table spool_rejet au lieu de bloquer le vidage.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Optional
+
+from db_connection import DatabaseConnection, erreur_permanente
+
+
+class SpoolLocal:
+    """File d'attente durable sur disque, vidée en arrière-plan vers la BD"""
+
+    def __init__(self, db_connection: DatabaseConnection, chemin: str = "spool_sallesense.db",
+                 taille_lot: int = 200, quota_mo: float = 200.0, intervalle: float = 5.0,
+                 attente_max: float = 30.0):
+        """
+        Ouvre (ou crée) le spool et démarre le thread de vidage
+
+        Args:
+            db_connection: Connexion à la base de données
+            chemin: Fichier SQLite du spool
+            taille_lot: Lignes rejouées au maximum par lot (défaut: 200)
+            quota_mo: Taille maximale du spool en Mo; au-delà les plus anciennes
+                      lignes sont abandonnées (défaut: 200)
+            intervalle: Secondes entre deux vidages quand il reste moins d'un lot (défaut: 5)
+            attente_max: Attente maximale en secondes entre deux essais si la BD est en erreur (défaut: 30)
+        """
+        self.db = db_connection
+        self.chemin = chemin
+        self.taille_lot = taille_lot
+        self.quota_octets = int(quota_mo * 1024 * 1024)
+        self.intervalle = intervalle
+        self.attente_max = attente_max
+
+        # Statistiques
+        self.compteur_envoyes = 0
+        self.compteur_abandonnes = 0
+        self.compteur_echecs = 0
+        self.compteur_rejetes = 0
+
+        dossier = os.path.dirname(chemin)
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+
+        self._evenements = {}  # Ligne d'événement rejouée -> idEvenement, pour les mises à jour
+        self._lock = threading.Lock()
+        self._sqlite = sqlite3.connect(chemin, check_same_thread=False)
+        self._sqlite.execute("PRAGMA journal_mode=WAL")
+        self._sqlite.execute("PRAGMA synchronous=NORMAL")
+        self._sqlite.execute("""
+            CREATE TABLE IF NOT EXISTS spool (
+                id              INTEGER PRIMARY KEY AUTOINCREMENT,
+                date_heure      TEXT    NOT NULL,
+                id_capteur      INTEGER NOT NULL,
+                mesure          REAL    NULL,
+                photo           BLOB    NULL,
+                id_salle        INTEGER NOT NULL,
+                type_evenement  TEXT    NULL,
+                description     TEXT    NULL,
+                resume          TEXT    NULL
+            )
+        """)
+        colonnes = {ligne[1] for ligne in self._sqlite.execute("PRAGMA table_info(spool)")}
+        if 'resume' not in colonnes:
+            # Spool créé avant l'agrégation par fenêtres
+            self._sqlite.execute("ALTER TABLE spool ADD COLUMN resume TEXT NULL")
+        self._sqlite.execute("""
+            CREATE TABLE IF NOT EXISTS spool_rejet (
+                id              INTEGER PRIMARY KEY,
+                date_heure      TEXT    NOT NULL,
+                id_capteur      INTEGER NOT NULL,
+                mesure          REAL    NULL,
+                photo           BLOB    NULL,
+                id_salle        INTEGER NOT NULL,
+                type_evenement  TEXT    NULL,
+                description     TEXT    NULL,
+                resume          TEXT    NULL,
+                erreur          TEXT    NOT NULL,
+                date_rejet      TEXT    NOT NULL
+            )
+        """)
+        self._sqlite.commit()
+        self._page_size = self._sqlite.execute("PRAGMA page_size").fetchone()[0]
+
+        self._arret = threading.Event()
+        self._thread = threading.Thread(target=self._boucle_vidage, name="spool-vidage", daemon=True)
+        self._thread.start()
+
+        en_attente = self.en_attente()
+        if en_attente:
+            print(f"✓ Spool '{chemin}' ouvert - {en_attente} ligne(s) à rejouer")
+
+    def ajouter_mesure(self, date_heure: datetime, id_capteur: int, mesure: Optional[float],
+                       id_salle: int, photo_blob: Optional[bytes] = None):
+        """
+        Ajoute une donnée au spool (retour immédiat, sans accès à la BD)
+
+        Args:
+            date_heure: Horodatage de la mesure
+            id_capteur: ID du capteur
+            mesure: Valeur mesurée (optionnel)
+            id_salle: ID de la salle
+            photo_blob: Photo ou vidéo (optionnel)
+        """
+        self._ajouter((date_heure.isoformat(), id_capteur, mesure, photo_blob, id_salle, None, None, None))
+
+    def ajouter_donnee_evenement(self, date_heure: datetime, id_capteur: int, id_salle: int,
+                                 type_evenement: str, description: str,
+                                 mesure: Optional[float] = None,
+                                 photo_blob: Optional[bytes] = None) -> int:
+        """
+        Ajoute au spool une donnée accompagnée de son événement
+        (rejouées ensemble dans une seule transaction)
+
+        Args:
+            date_heure: Horodatage de la mesure
+            id_capteur: ID du capteur
+            id_salle: ID de la salle
+            type_evenement: Type d'événement (BRUIT_FORT, CAPTURE, etc.)
+            description: Description de l'événement
+            mesure: Valeur mesurée (optionnel)
+            photo_blob: Photo ou vidéo (optionnel)
+
+        Returns:
+            Numéro de la ligne dans le spool (pour maj_evenement)
+        """
+        return self._ajouter((date_heure.isoformat(), id_capteur, mesure, photo_blob, id_salle,
+                              type_evenement, description, None))
+
+    def maj_evenement(self, id_ligne: int, description: str) -> bool:
+        """
+        Met à jour la description d'un événement encore dans le spool
+
+        Args:
+            id_ligne: Numéro de ligne retourné par ajouter_donnee_evenement
+            description: Nouvelle description
+
+        Returns:
+            False si la ligne a déjà quitté le spool (voir evenement_rejoue)
+        """
+        with self._lock:
+            curseur = self._sqlite.execute(
+                "UPDATE spool SET description = ? WHERE id = ? AND type_evenement IS NOT NULL",
+                (description, id_ligne)
+            )
+            self._sqlite.commit()
+            return curseur.rowcount > 0
+
+    def evenement_rejoue(self, id_ligne: int) -> Optional[int]:
+        """
+        ID de l'événement écrit dans la BD pour une ligne déjà rejouée
+        (retiré de la correspondance: l'appelant le garde pour les mises à jour suivantes)
+
+        Args:
+            id_ligne: Numéro de ligne retourné par ajouter_donnee_evenement
+
+        Returns:
+            idEvenement, ou None si la ligne n'a pas été rejouée (quarantaine, quota)
+        """
+        with self._lock:
+            return self._evenements.pop(id_ligne, None)
+
+    def ajouter_resume(self, resume: dict):
+        """
+        Ajoute au spool le résumé d'une fenêtre (rejoué dans DonneesResume)
+
+        Args:
+            resume: Dictionnaire produit par AgregateurFenetres
+        """
+        contenu = dict(resume, date_debut=resume['date_debut'].isoformat(),
+                       date_fin=resume['date_fin'].isoformat())
+        self._ajouter((resume['date_debut'].isoformat(), resume['id_capteur'], None, None,
+                       resume['id_salle'], None, None, json.dumps(contenu)))
+
+    def en_attente(self) -> int:
+        """Nombre de lignes en attente dans le spool"""
+        with self._lock:
+            return self._sqlite.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+
+    def en_quarantaine(self) -> int:
+        """Nombre de lignes refusées par la BD, conservées dans spool_rejet"""
+        with self._lock:
+            return self._sqlite.execute("SELECT COUNT(*) FROM spool_rejet").fetchone()[0]
+
+    def taille_octets(self) -> int:
+        """Espace occupé par les lignes du spool (pages libres exclues)"""
+        with self._lock:
+            return self._taille_locked()
+
+    def vider(self) -> int:
+        """
+        Rejoue le spool vers la BD jusqu'à ce qu'il soit vide ou qu'une erreur survienne
+
+        Returns:
+            Nombre de lignes envoyées (les lignes mises en quarantaine ne comptent pas)
+        """
+        envoyes_avant = self.compteur_envoyes
+        while self._vider_lot() > 0:
+            pass
+        return self.compteur_envoyes - envoyes_avant
+
+    def arreter(self, vider: bool = True):
+        """
+        Arrête le thread de vidage et ferme le spool
+
+        Args:
+            vider: Tenter un dernier vidage avant la fermeture (défaut: True)
+        """
+        self._arret.set()
+        self._thread.join(timeout=self.attente_max + 5)
+
+        if vider:
+            nb = self.vider()
+            if nb:
+                print(f"✓ Spool: {nb} ligne(s) envoyée(s) avant l'arrêt")
+
+        restantes = self.en_attente()
+        if restantes:
+            print(f"⚠ Spool: {restantes} ligne(s) conservée(s) dans '{self.chemin}' pour le prochain démarrage")
+        rejetees = self.en_quarantaine()
+        if rejetees:
+            print(f"⚠ Spool: {rejetees} ligne(s) refusée(s) par la BD, "
+                  f"conservée(s) dans la table spool_rejet de '{self.chemin}'")
+
+        with self._lock:
+            self._sqlite.close()
+
+    def _ajouter(self, ligne: tuple) -> int:
+        """Insère une ligne dans le spool en respectant le quota et retourne son numéro"""
+        with self._lock:
+            curseur = self._sqlite.execute(
+                """INSERT INTO spool (date_heure, id_capteur, mesure, photo, id_salle,
+                                      type_evenement, description, resume)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                ligne
+            )
+            self._sqlite.commit()
+            self._appliquer_quota_locked()
+            return curseur.lastrowid
+
+    def _taille_locked(self) -> int:
+        """Espace occupé par les lignes (verrou déjà pris)"""
+        pages = self._sqlite.execute("PRAGMA page_count").fetchone()[0]
+        libres = self._sqlite.execute("PRAGMA freelist_count").fetchone()[0]
+        return (pages - libres) * self._page_size
+
+    def _appliquer_quota_locked(self):
+        """
+        Abandonne les lignes les plus anciennes tant que le quota est dépassé (verrou déjà pris)
+        Les lignes en quarantaine partent en premier.
+        """
+        while self._taille_locked() > self.quota_octets:
+            rejets = self._sqlite.execute("SELECT COUNT(*) FROM spool_rejet").fetchone()[0]
+            if rejets:
+                nb = max(1, rejets // 10)
+                self._sqlite.execute(
+                    "DELETE FROM spool_rejet WHERE id IN (SELECT id FROM spool_rejet ORDER BY id LIMIT ?)",
+                    (nb,)
+                )
+                self._sqlite.commit()
+                print(f"⚠ Quota du spool atteint: {nb} ligne(s) en quarantaine supprimée(s)")
+                continue
+
+            total = self._sqlite.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+            if total <= 1:
+                return
+
+            # Retirer 10 % des lignes à la fois pour ne pas recalculer la taille à chaque ligne
+            nb = max(1, total // 10)
+            self._sqlite.execute(
+                "DELETE FROM spool WHERE id IN (SELECT id FROM spool ORDER BY id LIMIT ?)", (nb,)
+            )
+            self._sqlite.commit()
+            self.compteur_abandonnes += nb
+            print(f"⚠ Quota du spool atteint: {nb} ligne(s) ancienne(s) abandonnée(s)")
+
+    def _vider_lot(self) -> int:
+        """
+        Rejoue les lignes les plus anciennes du spool
+
+        Une ligne refusée définitivement par la BD est mise en quarantaine et la
+        suivante est rejouée; une erreur passagère (connexion, délai) arrête le lot.
+
+        Returns:
+            Nombre de lignes traitées (envoyées ou mises en quarantaine),
+            0 si le spool est vide, -1 si la BD est en erreur
+        """
+        with self._lock:
+            lignes = self._sqlite.execute(
+                """SELECT id, date_heure, id_capteur, mesure, photo, id_salle,
+                          type_evenement, description, resume
+                   FROM spool ORDER BY id LIMIT ?""",
+                (self.taille_lot,)
+            ).fetchall()
+
+        if not lignes:
+            return 0
+
+        traites = 0
+
+        # Mesures simples (sans photo, événement ni résumé): un seul executemany
+        simples = [l for l in lignes if l[4] is None and l[6] is None and l[8] is None]
+        if simples:
+            ok = self.db.execute_many_prepared(
+                'donnees_lot',
+                [(datetime.fromisoformat(l[1]), l[2], l[3], l[5]) for l in simples]
+            )
+            if ok:
+                self._supprimer([l[0] for l in simples])
+                traites = len(simples)
+                lignes = [l for l in lignes if not (l[4] is None and l[6] is None and l[8] is None)]
+            elif erreur_permanente(self.db.derniere_erreur()):
+                # Au moins une ligne est refusée: rejouer le lot ligne par ligne pour l'isoler
+                print(f"⚠ Spool: lot de {len(simples)} mesure(s) refusé, rejeu ligne par ligne")
+            else:
+                return -1
+
+        # Photos, événements et résumés: une transaction par ligne pour lier l'événement à sa donnée
+        for l in lignes:
+            resultat = self._rejouer(l)
+            if resultat is not None and l[6] is not None:
+                self._evenement_rejoue(l, resultat[1])
+            elif resultat is not None:
+                self._supprimer([l[0]])
+            elif erreur_permanente(self.db.derniere_erreur()):
+                self._rejeter(l, self.db.derniere_erreur())
+            else:
+                return traites if traites else -1
+            traites += 1
+
+        return traites
+
+    def _rejouer(self, ligne: tuple):
+        """
+        Envoie une ligne du spool dans sa propre transaction
+
+        Returns:
+            Résultat de l'insertion ((idDonnee, idEvenement) pour un événement),
+            None en cas d'erreur BD
+        """
+        date_heure = datetime.fromisoformat(ligne[1])
+        if ligne[8] is not None:
+            resume = json.loads(ligne[8])
+            resume['date_debut'] = datetime.fromisoformat(resume['date_debut'])
+            resume['date_fin'] = datetime.fromisoformat(resume['date_fin'])
+            return True if self.db.insert_resume(resume) else None
+        if ligne[6] is not None:
+            return self.db.insert_donnee_evenement(
+                ligne[2], ligne[5], ligne[6], ligne[7], mesure=ligne[3],
+                photo_blob=ligne[4], date_heure=date_heure
+            )
+        return self.db.insert_donnee(ligne[2], ligne[5], mesure=ligne[3],
+                                     photo_blob=ligne[4], date_heure=date_heure)
+
+    def _evenement_rejoue(self, ligne: tuple, id_evenement: int):
+        """
+        Retire du spool un événement rejoué et retient son ID pour les mises à jour suivantes
+
+        Si la description a changé dans le spool pendant l'envoi (maj_evenement),
+        la nouvelle description est reportée sur l'événement écrit.
+        """
+        with self._lock:
+            actuelle = self._sqlite.execute(
+                "SELECT description FROM spool WHERE id = ?", (ligne[0],)
+            ).fetchone()
+            self._sqlite.execute("DELETE FROM spool WHERE id = ?", (ligne[0],))
+            self._sqlite.commit()
+            self.compteur_envoyes += 1
+            self._evenements[ligne[0]] = id_evenement
+
+        if actuelle is not None and actuelle[0] != ligne[7]:
+            self.db.update_evenement(id_evenement, actuelle[0], durable=True)
+
+    def _rejeter(self, ligne: tuple, erreur: Exception):
+        """Déplace dans spool_rejet une ligne que la BD refuse définitivement"""
+        with self._lock:
+            self._sqlite.execute(
+                """INSERT OR REPLACE INTO spool_rejet (id, date_heure, id_capteur, mesure, photo, id_salle,
+                                                      type_evenement, description, resume,
+                                                      erreur, date_rejet)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                tuple(ligne) + (str(erreur), datetime.now().isoformat())
+            )
+            self._sqlite.execute("DELETE FROM spool WHERE id = ?", (ligne[0],))
+            self._sqlite.commit()
+            self.compteur_rejetes += 1
+        print(f"⚠ Spool: ligne {ligne[0]} (capteur {ligne[2]}, {ligne[1]}) refusée par la BD, "
+              f"mise en quarantaine: {erreur}")
+
+    def _supprimer(self, ids: list):
+        """Retire du spool les lignes envoyées"""
+        with self._lock:
+            self._sqlite.executemany("DELETE FROM spool WHERE id = ?", [(i,) for i in ids])
+            self._sqlite.commit()
+            self.compteur_envoyes += len(ids)
+
+    def _boucle_vidage(self):
+        """Boucle du thread de vidage, avec attente croissante si la BD est en erreur"""
+        attente_erreur = self.intervalle
+        try:
+            while not self._arret.is_set():
+                nb = self._vider_lot()
+
+                if nb < 0:
+                    self.compteur_echecs += 1
+                    self._arret.wait(attente_erreur)
+                    attente_erreur = min(self.attente_max, attente_erreur * 2)
+                    continue
+
+                attente_erreur = self.intervalle
+
+                # Lot complet: il en reste sans doute, enchaîner sans attendre
+                if nb < self.taille_lot:
+                    self._arret.wait(self.intervalle)
+        finally:
+            self.db.release_connection()
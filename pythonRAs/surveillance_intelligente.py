@@ -3,20 +3,30 @@ Système de surveillance intelligente
 Capture du son en continu + enregistrement vidéo lors de bruit fort
 """
 
-import spidev
+import os
+import tempfile
 import time
 from datetime import datetime
 from io import BytesIO
 from threading import Thread, Event
+from typing import Optional
 from db_connection import DatabaseConnection
-from config import DB_SERVER, DB_NAME, DB_USERNAME, DB_PASSWORD, ID_SALLE
-
-try:
-    import spidev
-    SPI_AVAILABLE = True
-except ImportError:
-    print("⚠ spidev non disponible - mode simulation")
-    SPI_AVAILABLE = False
+from agregation_fenetres import AgregateurFenetres
+from analyse_spectrale import AnalyseurSpectral, classer
+from bande_morte import FiltreBandeMorte
+from detecteur_episodes import DetecteurEpisodes, Episode, DEBUT, FIN
+from echantillonneur_adc import EchantillonneurMCP3008
+from ligne_de_base import LignesDeBase
+from source_trace import SourceTrace
+from metriques_acoustiques import calculer_metriques
+from planificateur import Planificateur
+from reference_cache import shared_cache
+from spool_local import SpoolLocal
+from config import DB_SERVER, DB_NAME, DB_USERNAME, DB_PASSWORD, ID_SALLE, SPOOL_DIR, SPOOL_QUOTA_MO, ADC_FREQUENCE
+from config import AGREGATION_FENETRE, AGREGATION_AVANT_EVENEMENT, AGREGATION_APRES_EVENEMENT
+from config import ANALYSE_TAILLE_FFT, ANALYSE_TIERS_OCTAVE, BRUIT_FORT_CLASSES_IGNOREES
+from config import LIGNE_BASE_DIR, ADC_TRACE, ADC_TRACE_VITESSE, BANDE_MORTE_DB
+from config import BRUIT_FORT_HYSTERESIS, BRUIT_FORT_DUREE_MIN, BRUIT_FORT_ECART_FUSION, BRUIT_FORT_INTERVALLE_MAJ
 
 try:
     from picamera2 import Picamera2
@@ -35,7 +45,10 @@ class SurveillanceIntelligente:
 
     def __init__(self, db_connection: DatabaseConnection, id_salle: int,
                  intervalle: int = 1, seuil_bruit_fort: float = 50.0,
-                 duree_video: int = 10):
+                 duree_video: int = 10, spool: Optional[SpoolLocal] = None,
+                 frequence: float = ADC_FREQUENCE, fenetre_agregation: Optional[float] = None,
+                 ligne_base: Optional[LignesDeBase] = None, source: Optional[SourceTrace] = None,
+                 bande_morte: Optional[FiltreBandeMorte] = None):
         """
         Initialise le système de surveillance
 
@@ -43,17 +56,37 @@ class SurveillanceIntelligente:
             db_connection: Connexion à la base de données
             id_salle: ID de la salle à monitorer
             intervalle: Intervalle en secondes entre mesures son (défaut: 1)
-            seuil_bruit_fort: Seuil pour déclencher vidéo (défaut: 50.0)
+            seuil_bruit_fort: Seuil d'entrée minimum d'un épisode BRUIT_FORT (une vidéo par épisode);
+                              le seuil suit le bruit de fond au-dessus (défaut: 50.0)
             duree_video: Durée de la vidéo en secondes (défaut: 10)
+            spool: Spool local pour les mesures ordinaires; les bruits forts restent
+                   écrits directement car la vidéo a besoin de l'ID de l'événement (défaut: None)
+            frequence: Fréquence d'échantillonnage continue du micro en Hz (défaut: config)
+            fenetre_agregation: Si fourni, un résumé par fenêtre de cette durée (s) est écrit
+                                dans DonneesResume et les mesures ordinaires ne sont gardées
+                                qu'autour des événements (défaut: None)
+            ligne_base: Suivi de la valeur au repos et du bruit de fond; s'il a un fichier,
+                        la ligne de base sauvegardée remplace la calibration (défaut: en mémoire)
+            source: Trace ADC rejouée au lieu du MCP3008, en temps réel ou accélérée;
+                    le programme s'arrête à la fin de la trace (défaut: None)
+            bande_morte: Si fourni, une mesure ordinaire n'est écrite dans Donnees que si elle
+                         change assez ou si le battement est écoulé (défaut: None, tout écrire)
         """
         self.db = db_connection
         self.id_salle = id_salle
         self.intervalle = intervalle
         self.seuil_bruit_fort = seuil_bruit_fort
         self.duree_video = duree_video
+        self.spool = spool
+        self.fenetre_agregation = fenetre_agregation
+        self.agregateur = None
+        self.analyseur = None
+        self.detecteur = None
+        self.bande_morte = bande_morte
+        self.planificateur = None
 
         # Composants
-        self.spi = None
+        self.echantillonneur = None
         self.camera = None
         self.id_capteur_bruit = None
         self.id_capteur_camera = None
@@ -67,7 +100,11 @@ class SurveillanceIntelligente:
         self.spi_bus = 0
         self.spi_device = 0
         self.spi_speed = 1350000
+        self.frequence = frequence
+        self.source = source
+        self.position_lecture = 0
         self.valeur_repos = None
+        self.ligne_base = ligne_base or LignesDeBase()
 
         # État d'enregistrement
         self.en_enregistrement = False
@@ -79,51 +116,63 @@ class SurveillanceIntelligente:
 
         # 1. Récupérer les IDs des capteurs
         try:
+            references = shared_cache(self.db)
+
             # Capteur BRUIT
-            capteur_bruit = self.db.execute_query(
-                "SELECT idCapteur_PK FROM Capteur WHERE type = 'BRUIT'"
-            )
-            if not capteur_bruit:
+            self.id_capteur_bruit = references.sensor_id('BRUIT')
+            if self.id_capteur_bruit is None:
                 print("✗ Aucun capteur BRUIT trouvé")
                 return False
-            self.id_capteur_bruit = capteur_bruit[0][0]
             print(f"✓ Capteur BRUIT trouvé - ID: {self.id_capteur_bruit}")
 
             # Capteur CAMERA
-            capteur_camera = self.db.execute_query(
-                "SELECT idCapteur_PK FROM Capteur WHERE type = 'CAMERA'"
-            )
-            if not capteur_camera:
+            self.id_capteur_camera = references.sensor_id('CAMERA')
+            if self.id_capteur_camera is None:
                 print("✗ Aucun capteur CAMERA trouvé")
                 return False
-            self.id_capteur_camera = capteur_camera[0][0]
             print(f"✓ Capteur CAMERA trouvé - ID: {self.id_capteur_camera}")
 
         except Exception as e:
             print(f"✗ Erreur récupération capteurs: {e}")
             return False
 
-        # 2. Initialiser MCP3008
-        if SPI_AVAILABLE:
-            try:
-                self.spi = spidev.SpiDev()
-                self.spi.open(self.spi_bus, self.spi_device)
-                self.spi.max_speed_hz = self.spi_speed
-                print(f"✓ MCP3008 initialisé (SPI {self.spi_bus}.{self.spi_device})")
-
-                # Calibration
-                if self.calibrer():
-                    print(f"✓ Calibration audio - Valeur repos: {self.valeur_repos}")
-                else:
-                    self.valeur_repos = 512
-                    print("⚠ Calibration par défaut")
+        # 2. Démarrer l'échantillonnage continu du MCP3008
+        self.echantillonneur = EchantillonneurMCP3008(self.adc_channel, self.frequence,
+                                                      self.spi_bus, self.spi_device, self.spi_speed,
+                                                      source=self.source)
+        self.frequence = self.echantillonneur.frequence
+        self.analyseur = AnalyseurSpectral(self.frequence, ANALYSE_TAILLE_FFT, ANALYSE_TIERS_OCTAVE)
+        if not self.echantillonneur.demarrer():
+            print("✗ Erreur MCP3008")
+            return False
 
-            except Exception as e:
-                print(f"✗ Erreur MCP3008: {e}")
-                return False
+        if not self.echantillonneur.simulation:
+            if self.source is not None:
+                print(f"✓ Rejeu de la trace {self.source.chemin} ({self.source.duree:.0f}s, "
+                      f"{self.frequence:.0f} Hz, vitesse x{self.source.vitesse:g})")
+                # La trace ne doit pas remplacer la ligne de base du vrai micro
+                self.ligne_base.chemin = None
+            else:
+                print(f"✓ MCP3008 initialisé (SPI {self.spi_bus}.{self.spi_device}, "
+                      f"{self.frequence:.0f} Hz)")
+
+            # Ligne de base sauvegardée: pas besoin des 2 secondes de calibration
+            if self.ligne_base.charger([self.adc_channel]):
+                self.valeur_repos = int(self.ligne_base.valeur_repos(self.adc_channel))
+                print(f"✓ Ligne de base restaurée - Valeur repos: {self.valeur_repos} (calibration sautée)")
+            elif self.calibrer():
+                print(f"✓ Calibration audio - Valeur repos: {self.valeur_repos}")
+            else:
+                self.valeur_repos = 512
+                print("⚠ Calibration par défaut")
         else:
             print("⚠ Mode simulation - Pas de vrai MCP3008")
             self.valeur_repos = 512
+            # Les valeurs simulées ne doivent pas remplacer la ligne de base du vrai micro
+            self.ligne_base.chemin = None
+
+        if self.ligne_base.valeur_repos(self.adc_channel) is None:
+            self.ligne_base.initialiser(self.adc_channel, self.valeur_repos)
 
         # 3. Initialiser caméra
         if CAMERA_AVAILABLE:
@@ -143,72 +192,71 @@ class SurveillanceIntelligente:
         else:
             print("⚠ Mode simulation - Pas de vraie caméra")
 
+        # 4. Agrégation par fenêtres: résumés + mesures brutes autour des événements
+        if self.fenetre_agregation:
+            self.agregateur = AgregateurFenetres(
+                self.id_salle, self._ecrire_resume, self._ecrire_brut,
+                duree_fenetre=self.fenetre_agregation,
+                avant_evenement=AGREGATION_AVANT_EVENEMENT,
+                apres_evenement=AGREGATION_APRES_EVENEMENT
+            )
+            print(f"✓ Agrégation par fenêtres de {self.fenetre_agregation:.0f}s")
+
+        # 5. Un seul événement BRUIT_FORT (et une seule vidéo) par épisode de bruit
+        self.detecteur = DetecteurEpisodes(
+            self.seuil_bruit_fort, self.seuil_bruit_fort - BRUIT_FORT_HYSTERESIS,
+            duree_min=BRUIT_FORT_DUREE_MIN, ecart_fusion=BRUIT_FORT_ECART_FUSION,
+            intervalle_maj=BRUIT_FORT_INTERVALLE_MAJ, classes_ignorees=BRUIT_FORT_CLASSES_IGNOREES
+        )
+
         print("\n✓ Configuration terminée\n")
         return True
 
     def read_adc(self, channel: int) -> int:
-        """Lit une valeur du MCP3008"""
-        if not SPI_AVAILABLE or self.spi is None:
-            import random
-            return random.randint(480, 550)
-
-        if channel < 0 or channel > 7:
-            return -1
-
-        try:
-            adc = self.spi.xfer2([1, (8 + channel) << 4, 0])
-            data = ((adc[1] & 3) << 8) + adc[2]
-            return data
-        except Exception as e:
+        """Dernière valeur lue par l'échantillonneur continu (-1 si indisponible)"""
+        if self.echantillonneur is None or channel != self.echantillonneur.canal:
             return -1
+        return self.echantillonneur.derniere_valeur()
 
     def calibrer(self) -> bool:
         """Calibre le micro"""
         print("⏳ Calibration audio... (2 secondes)")
         try:
-            valeurs = []
-            for _ in range(20):
-                valeur = self.read_adc(self.adc_channel)
-                if valeur >= 0:
-                    valeurs.append(valeur)
-                time.sleep(0.1)
-
-            if valeurs:
-                self.valeur_repos = sum(valeurs) // len(valeurs)
-                return True
-            return False
+            nb_echantillons = int(2 * self.echantillonneur.frequence)
+            if not self.echantillonneur.attendre(nb_echantillons, timeout=4.0):
+                return False
+
+            metriques = calculer_metriques(self.echantillonneur.tampon.derniers(nb_echantillons),
+                                           self.echantillonneur.frequence)
+            self.valeur_repos = int(metriques['moyenne'])
+            self.position_lecture = self.echantillonneur.tampon.total
+            self.ligne_base.initialiser(self.adc_channel, metriques['moyenne'], metriques['l90'])
+            self.ligne_base.sauvegarder(forcer=True)
+            return True
         except:
             return False
 
     def mesurer_son(self) -> dict:
-        """Mesure le niveau sonore"""
-        nb_echantillons = 10
-        valeurs = []
-
-        for _ in range(nb_echantillons):
-            valeur = self.read_adc(self.adc_channel)
-            if valeur >= 0:
-                valeurs.append(valeur)
-            time.sleep(0.01)
+        """Mesure le niveau sonore (dB SPL et métriques) sur les échantillons reçus depuis la mesure précédente"""
+        valeurs, self.position_lecture, _ = self.echantillonneur.tampon.depuis(self.position_lecture)
 
-        if not valeurs:
+        metriques = calculer_metriques(valeurs, self.echantillonneur.frequence)
+        if metriques is None:
             return None
 
-        valeur_moyenne = sum(valeurs) // len(valeurs)
-        valeur_max = max(valeurs)
-        valeur_min = min(valeurs)
-        amplitude = valeur_max - valeur_min
+        # Niveaux par bande et classe du bruit (pour ignorer la ventilation, par exemple)
+        metriques['bandes'] = self.analyseur.analyser(valeurs)
+        metriques['classe'] = classer(metriques['bandes'], metriques)
 
+        valeur_moyenne = int(metriques['moyenne'])
         voltage = (valeur_moyenne * 3.3) / 1023
         difference = abs(valeur_moyenne - self.valeur_repos) if self.valeur_repos else 0
-        niveau_db = min(100, (amplitude / 10.23) * 10)
 
         return {
+            **metriques,
             'valeur_brute': valeur_moyenne,
-            'amplitude': amplitude,
             'voltage': voltage,
-            'difference': difference,
-            'niveau_db': niveau_db
+            'difference': difference
         }
 
     def enregistrer_video(self, id_evenement: int, niveau_db: float):
@@ -229,15 +277,19 @@ class SurveillanceIntelligente:
         print(f"\n         🎬 ENREGISTREMENT VIDÉO DÉCLENCHÉ!")
         print(f"         📹 Durée: {self.duree_video}s | Déclencheur: {niveau_db:.1f} dB")
 
+        chemin_video = None
+
         try:
             if CAMERA_AVAILABLE and self.camera:
-                # Enregistrer en mémoire (BytesIO)
-                video_buffer = BytesIO()
+                # Enregistrer dans un fichier temporaire: la vidéo n'est jamais
+                # entièrement en mémoire, elle est envoyée ensuite par morceaux
+                fd, chemin_video = tempfile.mkstemp(suffix=".h264", prefix="video_")
+                os.close(fd)
 
                 # Démarrer l'enregistrement
                 self.camera.start_recording(
                     encoder=H264Encoder(),
-                    output=FileOutput(video_buffer)
+                    output=FileOutput(chemin_video)
                 )
 
                 # Enregistrer pendant la durée spécifiée
@@ -251,37 +303,30 @@ class SurveillanceIntelligente:
                 # Arrêter l'enregistrement
                 self.camera.stop_recording()
 
-                # Récupérer les bytes de la vidéo
-                video_bytes = video_buffer.getvalue()
-                video_buffer.close()
-
-                print(f"         ✓ Vidéo capturée ({len(video_bytes)/1024:.1f} KB)      ")
+                taille = os.path.getsize(chemin_video)
+                print(f"         ✓ Vidéo capturée ({taille/1024:.1f} KB)      ")
+                source = open(chemin_video, 'rb')
 
             else:
                 # Mode simulation
                 video_bytes = b"VIDEO_SIMULEE_" + timestamp.encode() + b"_" + str(self.duree_video).encode() + b"s"
                 time.sleep(2)  # Simuler un enregistrement
                 print(f"         ✓ Vidéo simulée ({len(video_bytes)} bytes)")
+                source = BytesIO(video_bytes)
+
+            # Envoyer vers la BD par morceaux (vidéo + événement CAPTURE, une transaction)
+            with source:
+                ids = self.db.insert_blob_chunked(
+                    self.id_capteur_camera, self.id_salle, source,
+                    type_evenement='CAPTURE',
+                    description=f'Vidéo {self.duree_video}s - Déclenchée par BRUIT_FORT ({niveau_db:.1f} dB) - Event ID: {id_evenement}'
+                )
+            if ids is None:
+                return
 
-            # Envoyer vers la BD
-            date_heure = datetime.now()
-            self.db.execute_non_query(
-                """INSERT INTO Donnees (dateHeure, idCapteur, mesure, photoBlob, noSalle)
-                   VALUES (?, ?, NULL, ?, ?)""",
-                (date_heure, self.id_capteur_camera, video_bytes, self.id_salle)
-            )
-
-            id_donnee = self.db.execute_query("SELECT @@IDENTITY AS id")[0][0]
+            id_donnee = ids[0]
             self.compteur_videos += 1
 
-            # Créer un événement
-            self.db.execute_non_query(
-                """INSERT INTO Evenement (type, idDonnee, description)
-                   VALUES (?, ?, ?)""",
-                ('CAPTURE', id_donnee,
-                 f'Vidéo {self.duree_video}s - Déclenchée par BRUIT_FORT ({niveau_db:.1f} dB) - Event ID: {id_evenement}')
-            )
-
             print(f"         ✓ Vidéo enregistrée en BD - ID: {id_donnee}")
             print()
 
@@ -289,7 +334,42 @@ class SurveillanceIntelligente:
             print(f"         ✗ Erreur enregistrement vidéo: {e}\n")
 
         finally:
+            if chemin_video and os.path.exists(chemin_video):
+                os.remove(chemin_video)
             self.en_enregistrement = False
+            # Rendre au pool la connexion empruntée par ce thread
+            self.db.release_connection()
+
+    def _suivre_episode(self, etat: str, episode: Episode):
+        """
+        Met à jour la description de l'événement d'un épisode (en cours ou terminé)
+
+        Args:
+            etat: MISE_A_JOUR ou FIN
+            episode: Épisode de DetecteurEpisodes
+        """
+        if episode.id_evenement is not None:
+            self.db.update_evenement(episode.id_evenement, episode.description(), durable=etat == FIN)
+
+        if etat == FIN:
+            print(f"         ✓ Fin d'épisode: {episode.description()}")
+
+    def _ecrire_brut(self, date_heure: datetime, id_capteur: int, niveau_db: float):
+        """Écrit une mesure brute conservée par l'agrégateur (spool ou BD)"""
+        if self.bande_morte is not None and not self.bande_morte.a_envoyer(id_capteur, date_heure, niveau_db):
+            return
+
+        if self.spool is not None:
+            self.spool.ajouter_mesure(date_heure, id_capteur, niveau_db, self.id_salle)
+        else:
+            self.db.insert_donnee(id_capteur, self.id_salle, mesure=niveau_db, date_heure=date_heure)
+
+    def _ecrire_resume(self, resume: dict):
+        """Écrit le résumé d'une fenêtre (spool ou BD)"""
+        if self.spool is not None:
+            self.spool.ajouter_resume(resume)
+        else:
+            self.db.insert_resume(resume)
 
     def surveiller_en_continu(self):
         """Boucle principale de surveillance"""
@@ -298,29 +378,76 @@ class SurveillanceIntelligente:
         print("╚═══════════════════════════════════════════════════════════╝\n")
         print(f"🎤 Intervalle mesures: {self.intervalle}s")
         print(f"🏢 Salle: {self.id_salle}")
-        print(f"📊 Seuil déclenchement: {self.seuil_bruit_fort} dB")
+        print(f"📊 Seuil déclenchement: {self.seuil_bruit_fort} dB minimum, "
+              f"bruit de fond + {self.ligne_base.marge_db:.0f} dB")
         print(f"🎬 Durée vidéo: {self.duree_video}s")
         print(f"💾 Stockage: Base de données")
         print("\nAppuyez sur Ctrl+C pour arrêter\n")
         print("─" * 63)
 
+        # Échéances absolues: la mesure, l'envoi et le lancement d'une vidéo ne rallongent
+        # pas la période (plus courte si une trace est rejouée accélérée)
+        self.planificateur = Planificateur(self.intervalle / self.echantillonneur.vitesse, "Son",
+                                           arret=self.stop_event)
+
         try:
             while not self.stop_event.is_set():
+                # Fin d'une trace rejouée: dernière mesure puis arrêt
+                fin_trace = self.echantillonneur.termine
+
                 # Mesurer le son
                 mesure = self.mesurer_son()
 
                 if mesure:
-                    date_heure = datetime.now()
+                    date_heure = self.echantillonneur.maintenant()
                     niveau_db = mesure['niveau_db']
 
-                    # Enregistrer la mesure de son
-                    self.db.execute_non_query(
-                        """INSERT INTO Donnees (dateHeure, idCapteur, mesure, photoBlob, noSalle)
-                           VALUES (?, ?, ?, NULL, ?)""",
-                        (date_heure, self.id_capteur_bruit, niveau_db, self.id_salle)
-                    )
+                    # Épisodes de bruit fort: seule la mesure qui confirme un épisode
+                    # porte l'événement (et déclenche la vidéo)
+                    id_evenement = None
+                    bruit_fort = None
+                    seuil = self.ligne_base.seuil(self.adc_channel, self.seuil_bruit_fort)
+                    for etat, episode in self.detecteur.ajouter(self.id_capteur_bruit, date_heure,
+                                                                mesure, seuil):
+                        if etat == DEBUT:
+                            bruit_fort = episode
+                        else:
+                            self._suivre_episode(etat, episode)
+
+                    # La ligne de base suit le micro; le bruit de fond seulement hors épisode
+                    calme = (not self.detecteur.en_cours(self.id_capteur_bruit)
+                             and niveau_db < seuil - self.detecteur.hysteresis)
+                    self.ligne_base.mettre_a_jour(self.adc_channel, mesure, calme)
+                    self.valeur_repos = int(self.ligne_base.valeur_repos(self.adc_channel))
+
+                    if self.agregateur is not None:
+                        self.agregateur.ajouter(self.id_capteur_bruit, date_heure, mesure,
+                                                evenement=bruit_fort is not None,
+                                                prolonger=self.detecteur.actif(self.id_capteur_bruit))
+
+                    # Enregistrer la mesure de son (avec son événement si début d'épisode)
+                    if bruit_fort is not None:
+                        ids = self.db.insert_donnee_evenement(
+                            self.id_capteur_bruit, self.id_salle, 'BRUIT_FORT', bruit_fort.description(),
+                            mesure=niveau_db, date_heure=date_heure
+                        )
+                        id_donnee, id_evenement = ids if ids else (None, None)
+                        bruit_fort.id_evenement = id_evenement
+                        if self.bande_morte is not None:
+                            self.bande_morte.envoyee(self.id_capteur_bruit, date_heure, niveau_db)
+                    elif self.agregateur is not None:
+                        id_donnee = "agrégée"
+                    elif self.bande_morte is not None and not self.bande_morte.a_envoyer(
+                            self.id_capteur_bruit, date_heure, niveau_db):
+                        id_donnee = "inchangée"
+                    elif self.spool is not None:
+                        self.spool.ajouter_mesure(date_heure, self.id_capteur_bruit,
+                                                  niveau_db, self.id_salle)
+                        id_donnee = "spool"
+                    else:
+                        id_donnee = self.db.insert_donnee(self.id_capteur_bruit, self.id_salle,
+                                                          mesure=niveau_db, date_heure=date_heure)
 
-                    id_donnee = self.db.execute_query("SELECT @@IDENTITY AS id")[0][0]
                     self.compteur_mesures += 1
 
                     # Affichage
@@ -330,18 +457,10 @@ class SurveillanceIntelligente:
                           f"Amplitude: {mesure['amplitude']:4d} | "
                           f"ID: {id_donnee}")
 
-                    # Si bruit fort : créer événement + déclencher vidéo
-                    if niveau_db > self.seuil_bruit_fort:
-                        # Créer événement BRUIT_FORT
-                        self.db.execute_non_query(
-                            """INSERT INTO Evenement (type, idDonnee, description)
-                               VALUES (?, ?, ?)""",
-                            ('BRUIT_FORT', id_donnee,
-                             f'Niveau sonore élevé: {niveau_db:.1f} dB (amplitude: {mesure["amplitude"]})')
-                        )
-                        id_evenement = self.db.execute_query("SELECT @@IDENTITY AS id")[0][0]
-
-                        print(f"         ⚠ BRUIT_FORT détecté! (Event ID: {id_evenement})")
+                    # Début d'épisode : événement créé, déclencher la vidéo
+                    if id_evenement is not None:
+                        print(f"         ⚠ BRUIT_FORT: épisode commencé à "
+                              f"{bruit_fort.debut.strftime('%H:%M:%S')} (Event ID: {id_evenement})")
 
                         # Lancer l'enregistrement vidéo dans un thread séparé
                         # pour ne pas bloquer la surveillance audio
@@ -355,8 +474,14 @@ class SurveillanceIntelligente:
                 else:
                     print("✗ Échec mesure son")
 
-                # Attendre avant la prochaine mesure
-                time.sleep(self.intervalle)
+                if fin_trace:
+                    print(f"\n✓ Fin de la trace - {self.compteur_mesures} mesures, "
+                          f"{self.compteur_videos} vidéo(s)")
+                    break
+
+                # Attendre l'échéance de la prochaine mesure
+                if not self.planificateur.attendre():
+                    break
 
         except KeyboardInterrupt:
             print("\n\n─" * 63)
@@ -369,12 +494,29 @@ class SurveillanceIntelligente:
         """Nettoie les ressources"""
         self.stop_event.set()
 
-        if self.spi:
-            try:
-                self.spi.close()
-                print("✓ SPI fermé")
-            except:
-                pass
+        if self.planificateur is not None:
+            print(self.planificateur.resume())
+
+        if self.detecteur is not None:
+            for etat, episode in self.detecteur.terminer():
+                self._suivre_episode(etat, episode)
+
+        if self.ligne_base.sauvegarder(forcer=True):
+            print("✓ Ligne de base sauvegardée")
+
+        if self.agregateur is not None:
+            self.agregateur.vider()
+
+        if self.bande_morte is not None:
+            # La dernière valeur implicite date la fin de la période stable
+            for id_capteur, date_heure, niveau_db in self.bande_morte.vider():
+                self._ecrire_brut(date_heure, id_capteur, niveau_db)
+            print(f"✓ Bande morte: {self.bande_morte.compteur_supprimees} mesure(s) implicite(s) "
+                  f"(-{self.bande_morte.reduction():.0%})")
+
+        if self.echantillonneur is not None:
+            self.echantillonneur.arreter()
+            print("✓ SPI fermé")
 
         if self.camera:
             try:
@@ -391,6 +533,15 @@ def main():
     print("║    SalleSense - Surveillance Intelligente avec Vidéo     ║")
     print("╚═══════════════════════════════════════════════════════════╝\n")
 
+    # Trace enregistrée rejouée au lieu du micro (banc d'essai, incident du terrain)
+    source = None
+    if ADC_TRACE:
+        try:
+            source = SourceTrace(ADC_TRACE, ADC_TRACE_VITESSE)
+        except (OSError, ValueError) as e:
+            print(f"✗ Trace illisible: {e}")
+            return 1
+
     # Connexion BD
     db = DatabaseConnection(DB_SERVER, DB_NAME, DB_USERNAME, DB_PASSWORD)
 
@@ -398,17 +549,26 @@ def main():
         print("\n✗ Impossible de se connecter à la base de données")
         return 1
 
+    # Spool local pour les mesures ordinaires
+    spool = SpoolLocal(db, os.path.join(SPOOL_DIR, "surveillance.db"), quota_mo=SPOOL_QUOTA_MO)
+
     # Créer le système de surveillance
     # Paramètres: intervalle=1s, seuil=50dB, durée_vidéo=10s
     surveillance = SurveillanceIntelligente(
         db, ID_SALLE,
         intervalle=1,
         seuil_bruit_fort=50.0,
-        duree_video=10
+        duree_video=10,
+        spool=spool,
+        fenetre_agregation=AGREGATION_FENETRE,
+        ligne_base=LignesDeBase(os.path.join(LIGNE_BASE_DIR, "surveillance.json")),
+        source=source,
+        bande_morte=FiltreBandeMorte() if BANDE_MORTE_DB else None
     )
 
     # Configuration
     if not surveillance.setup():
+        spool.arreter()
         db.disconnect()
         return 1
 
@@ -419,6 +579,7 @@ def main():
     finally:
         # Nettoyage
         surveillance.cleanup()
+        spool.arreter()
         db.disconnect()
         print("✓ Connexion BD fermée\n")
 
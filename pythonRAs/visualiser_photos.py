@@ -127,8 +127,19 @@ def extraire_toutes_photos():
         return
 
     try:
-        # Récupérer toutes les photos
-        photos = db.execute_query("""
+        # Compter d'abord: les photos sont ensuite lues une à une, sans tout charger en mémoire
+        total = db.execute_query("SELECT COUNT(*) FROM Donnees WHERE photoBlob IS NOT NULL")
+
+        if not total or not total[0][0]:
+            print("Aucune photo trouvée")
+            return
+
+        # Créer le dossier
+        os.makedirs("photos_extraites", exist_ok=True)
+
+        print(f"Extraction de {total[0][0]} photo(s)...\n")
+
+        photos = db.iter_query("""
             SELECT
                 d.idDonnee_PK,
                 d.photoBlob,
@@ -136,16 +147,9 @@ def extraire_toutes_photos():
             FROM Donnees d
             WHERE d.photoBlob IS NOT NULL
             ORDER BY d.dateHeure DESC
-        """)
-
-        if not photos:
-            print("Aucune photo trouvée")
-            return
-
-        # Créer le dossier
-        os.makedirs("photos_extraites", exist_ok=True)
+        """, arraysize=10)
 
-        print(f"Extraction de {len(photos)} photo(s)...\n")
+        nb_extraites = 0
 
         for photo in photos:
             id_donnee = photo[0]
@@ -159,10 +163,11 @@ def extraire_toutes_photos():
             with open(chemin_complet, 'wb') as f:
                 f.write(photo_bytes)
 
+            nb_extraites += 1
             taille_kb = len(photo_bytes) / 1024
             print(f"  ✓ {nom_fichier} ({taille_kb:.1f} KB)")
 
-        print(f"\n✓ {len(photos)} photo(s) extraite(s) dans le dossier 'photos_extraites/'")
+        print(f"\n✓ {nb_extraites} photo(s) extraite(s) dans le dossier 'photos_extraites/'")
 
     except Exception as e:
         print(f"✗ Erreur: {e}")
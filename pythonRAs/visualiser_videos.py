@@ -2,7 +2,7 @@
 Script pour visualiser et extraire les vidéos stockées dans la base de données
 """
 
-from db_connection import DatabaseConnection
+from db_connection import DatabaseConnection, parse_byte_range
 from config import DB_SERVER, DB_NAME, DB_USERNAME, DB_PASSWORD
 import os
 
@@ -78,13 +78,17 @@ def lister_videos():
         db.disconnect()
 
 
-def extraire_video(id_donnee: int, nom_fichier: str = None):
+def extraire_video(id_donnee: int, nom_fichier: str = None, plage: str = None):
     """
     Extrait une vidéo de la BD et la sauvegarde en fichier
 
+    La vidéo est lue par morceaux (SUBSTRING côté serveur): la mémoire utilisée
+    reste celle d'un morceau, quelle que soit la taille de la vidéo.
+
     Args:
         id_donnee: ID de la donnée contenant la vidéo
         nom_fichier: Nom du fichier de sortie (optionnel)
+        plage: Plage d'octets au format HTTP, ex: "bytes=0-1048575" ou "-500000" (optionnel)
     """
 
     db = DatabaseConnection(DB_SERVER, DB_NAME, DB_USERNAME, DB_PASSWORD)
@@ -94,9 +98,9 @@ def extraire_video(id_donnee: int, nom_fichier: str = None):
         return
 
     try:
-        # Récupérer la vidéo
+        # Récupérer la taille et la date (sans le BLOB)
         result = db.execute_query(
-            """SELECT photoBlob, dateHeure
+            """SELECT DATALENGTH(photoBlob), dateHeure
                FROM Donnees
                WHERE idDonnee_PK = ?""",
             (id_donnee,)
@@ -106,28 +110,42 @@ def extraire_video(id_donnee: int, nom_fichier: str = None):
             print(f"✗ Aucune vidéo trouvée avec l'ID {id_donnee}")
             return
 
-        video_bytes = result[0][0]
+        taille_totale = int(result[0][0])
         date_heure = result[0][1]
 
         # Vérifier la taille
-        if len(video_bytes) < 100:
-            print(f"⚠ Attention: fichier très petit ({len(video_bytes)} bytes)")
+        if taille_totale < 100:
+            print(f"⚠ Attention: fichier très petit ({taille_totale} bytes)")
             print("  Cela pourrait être une simulation, pas une vraie vidéo")
 
+        # Plage demandée (toute la vidéo par défaut)
+        if plage:
+            try:
+                debut, fin = parse_byte_range(plage, taille_totale)
+            except ValueError as e:
+                print(f"✗ {e}")
+                return
+        else:
+            debut, fin = 0, taille_totale - 1
+
         # Générer le nom de fichier si non fourni
         if not nom_fichier:
             timestamp = date_heure.strftime("%Y%m%d_%H%M%S")
-            nom_fichier = f"video_{id_donnee}_{timestamp}.h264"
+            suffixe = f"_{debut}-{fin}" if plage else ""
+            nom_fichier = f"video_{id_donnee}_{timestamp}{suffixe}.h264"
 
         # Créer le dossier videos_extraites s'il n'existe pas
         os.makedirs("videos_extraites", exist_ok=True)
         chemin_complet = os.path.join("videos_extraites", nom_fichier)
 
-        # Sauvegarder la vidéo
+        # Sauvegarder la vidéo morceau par morceau
+        taille_ecrite = 0
         with open(chemin_complet, 'wb') as f:
-            f.write(video_bytes)
+            for morceau in db.iter_blob_chunks(id_donnee, debut, fin):
+                f.write(morceau)
+                taille_ecrite += len(morceau)
 
-        taille_kb = len(video_bytes) / 1024
+        taille_kb = taille_ecrite / 1024
         taille_mb = taille_kb / 1024
 
         if taille_mb > 1:
@@ -135,10 +153,13 @@ def extraire_video(id_donnee: int, nom_fichier: str = None):
         else:
             taille_str = f"{taille_kb:.1f} KB"
 
-        print(f"✓ Vidéo extraite: {chemin_complet} ({taille_str})")
+        if plage:
+            print(f"✓ Octets {debut}-{fin}/{taille_totale} extraits: {chemin_complet} ({taille_str})")
+        else:
+            print(f"✓ Vidéo extraite: {chemin_complet} ({taille_str})")
 
         # Si c'est un vrai fichier H.264, donner des instructions
-        if len(video_bytes) > 1000:
+        if taille_ecrite > 1000 and not plage:
             print("\n📹 Pour lire la vidéo H.264:")
             print(f"   vlc {chemin_complet}")
             print(f"   # ou")
@@ -165,28 +186,34 @@ def extraire_toutes_videos():
         return
 
     try:
-        # Récupérer toutes les vidéos
-        videos = db.execute_query("""
-            SELECT
-                d.idDonnee_PK,
-                d.photoBlob,
-                d.dateHeure
+        filtre_videos = """
             FROM Donnees d
             JOIN Capteur c ON d.idCapteur = c.idCapteur_PK
             WHERE d.photoBlob IS NOT NULL
               AND c.type = N'CAMERA'
               AND DATALENGTH(d.photoBlob) > 100
-            ORDER BY d.dateHeure DESC
-        """)
+        """
 
-        if not videos:
+        # Compter d'abord: les vidéos sont ensuite lues une à une, sans tout charger en mémoire
+        total = db.execute_query("SELECT COUNT(*) " + filtre_videos)
+
+        if not total or not total[0][0]:
             print("Aucune vidéo trouvée")
             return
 
         # Créer le dossier
         os.makedirs("videos_extraites", exist_ok=True)
 
-        print(f"Extraction de {len(videos)} vidéo(s)...\n")
+        print(f"Extraction de {total[0][0]} vidéo(s)...\n")
+
+        videos = db.iter_query(
+            "SELECT d.idDonnee_PK, d.photoBlob, d.dateHeure "
+            + filtre_videos +
+            "ORDER BY d.dateHeure DESC",
+            arraysize=1
+        )
+
+        nb_extraites = 0
 
         for video in videos:
             id_donnee = video[0]
@@ -200,6 +227,7 @@ def extraire_toutes_videos():
             with open(chemin_complet, 'wb') as f:
                 f.write(video_bytes)
 
+            nb_extraites += 1
             taille_kb = len(video_bytes) / 1024
             taille_mb = taille_kb / 1024
 
@@ -210,7 +238,7 @@ def extraire_toutes_videos():
 
             print(f"  ✓ {nom_fichier} ({taille_str})")
 
-        print(f"\n✓ {len(videos)} vidéo(s) extraite(s) dans 'videos_extraites/'")
+        print(f"\n✓ {nb_extraites} vidéo(s) extraite(s) dans 'videos_extraites/'")
 
         # Instructions
         print("\n📹 Pour lire les vidéos:")
@@ -314,7 +342,8 @@ def menu():
         elif choix == "2":
             try:
                 id_donnee = int(input("\nID de la vidéo à extraire: "))
-                extraire_video(id_donnee)
+                plage = input("Plage d'octets (ex: 0-1048575, -500000; Entrée = tout): ").strip()
+                extraire_video(id_donnee, plage=plage or None)
             except ValueError:
                 print("✗ ID invalide")
 